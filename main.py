@@ -1,13 +1,27 @@
 import csv
-from src import (agrupar_por, atualiza_rendimento, atualizar_registro,
-                 criar_registro, deletar_registro, exportar_relatorio,
-                 ler_registros, ler_registros_por, salvar_registros)
+from src import (agrupar_por, atualiza_rendimento, atualizar_registro, caminho_eventos,
+                 configurar_eventos, criar_orcamento, criar_recorrencia, criar_registro,
+                 deletar_registro, exibir_estatisticas, exibir_orcamentos, exibir_projecao,
+                 exibir_totais_categoria,
+                 exportar_ordenado, exportar_relatorio, formatar_alerta, gerenciar_backups,
+                 gravar_totais_orcamentos,
+                 ler_orcamentos,
+                 ler_recorrencias, ler_registros, ler_registros_por,
+                 materializar_recorrencias, salvar_orcamentos, salvar_recorrencias,
+                 salvar_registros, verificar_orcamentos)
+
+def avisar_orcamentos(registros):
+    """Exibe os alertas de orçamento gerados pelas últimas alterações."""
+    for alerta in verificar_orcamentos(registros):
+        print(formatar_alerta(alerta))
 
 def menu():
     """Exibe o menu interativo e processa as escolhas do usuário."""
 
     arquivo = 'financas.json'
+    configurar_eventos(caminho_eventos(arquivo), arquivo)
     registros = ler_registros(arquivo)
+    avisar_orcamentos(registros)
 
     while True:
         print("\n--- Menu ---")
@@ -18,16 +32,27 @@ def menu():
         print("5. Atualizar rendimento")
         print("6. Exportar relatório")
         print("7. Agrupar por mês e tipo")
+        print("8. Projetar investimentos")
+        print("9. Maiores registros e quantis")
+        print("10. Totais por categoria")
+        print("11. Cadastrar recorrência")
+        print("12. Lançar recorrências pendentes")
+        print("13. Exportar relatório ordenado (arquivos grandes)")
+        print("14. Cadastrar orçamento")
+        print("15. Situação dos orçamentos")
+        print("16. Abrir interface em tela cheia")
+        print("17. Backups")
         print("0. Sair")
 
         opcao = input("Escolha uma opção: ")
 
         if opcao == '1':
-            novo_registro = criar_registro()
+            novo_registro = criar_registro(registros)
             
             registros.append(novo_registro)
             salvar_registros(registros, arquivo)
             print("Registro criado com sucesso!")
+            avisar_orcamentos(registros)
         elif opcao == '2':
             registros_filtrados = ler_registros_por.ler_registros_por(registros)
             if registros_filtrados:
@@ -38,6 +63,7 @@ def menu():
         elif opcao == '3':
             atualizar_registro(registros)
             salvar_registros(registros, arquivo)
+            avisar_orcamentos(registros)
         elif opcao == '4':
             deletar_registro(registros)
             salvar_registros(registros, arquivo)
@@ -46,11 +72,56 @@ def menu():
             salvar_registros(registros, arquivo)
             print("Rendimento atualizado!")
         elif opcao == '6':
-            formato = input("Formato do relatório (csv ou json): ")
-            exportar_relatorio(registros, 'relatorio.' + formato, formato)
+            formato = input("Formato do relatório (csv, json ou parquet): ")
+            moeda = input("Moeda do relatório (em branco para manter a de cada registro): ").strip().upper()
+            centavos = input("Exportar os valores em centavos? (s/n): ").strip().lower() == 's'
+            exportar_relatorio(registros, 'relatorio.' + formato, formato, centavos=centavos, moeda=moeda or None)
         elif opcao == '7':
             resultado = agrupar_por(registros)
+        elif opcao == '8':
+            exibir_projecao(registros)
+        elif opcao == '9':
+            exibir_estatisticas(registros)
+        elif opcao == '10':
+            exibir_totais_categoria(registros)
+        elif opcao == '11':
+            regras = ler_recorrencias()
+            criar_recorrencia(regras)
+            salvar_recorrencias(regras)
+            print("Recorrência cadastrada com sucesso!")
+        elif opcao == '12':
+            regras = ler_recorrencias()
+            novos = materializar_recorrencias(regras, registros)
+            salvar_registros(registros, arquivo)
+            salvar_recorrencias(regras)
+            print(f"{len(novos)} registros lançados.")
+            avisar_orcamentos(registros)
+        elif opcao == '13':
+            formato = input("Formato do relatório (csv ou json): ")
+            ordenar_por = input("Ordenar por (data ou valor): ")
+            try:
+                quantidade = exportar_ordenado(arquivo, 'relatorio.' + formato, formato, ordenar_por)
+                print(f"{quantidade} registros exportados com sucesso!")
+            except (ValueError, FileNotFoundError) as e:
+                print(f"Erro ao exportar relatório: {e}")
+        elif opcao == '14':
+            orcamentos = ler_orcamentos()
+            criar_orcamento(orcamentos)
+            salvar_orcamentos(orcamentos)
+            verificar_orcamentos(registros, orcamentos)
+            print("Orçamento cadastrado com sucesso!")
+        elif opcao == '15':
+            exibir_orcamentos(registros)
+        elif opcao == '16':
+            import tui  # só aqui: carrega o curses apenas para quem abre a interface
+
+            gravar_totais_orcamentos(registros)
+            tui.executar(arquivo)
+            registros = ler_registros(arquivo)
+        elif opcao == '17':
+            registros = gerenciar_backups(registros, arquivo)
         elif opcao == '0':
+            gravar_totais_orcamentos(registros)
             break
         else:
             print("Opção inválida.")
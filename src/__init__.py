@@ -1,8 +1,38 @@
-from src.agruparmes import agrupar_por_mes
+from src.agregacao_externa import (agregar_arquivo, agregar_parcial, exportar_ordenado,
+                                   iterar_registros, juntar_parciais, ordenar_externo,
+                                   totais_agregados)
+from src.agruparmes import agrupar_por, totalizar_mes
 from src.atualizar_registro import atualizar_registro
 from src.atualizar_rendimento import atualiza_rendimento
-from src.criar_registro import criar_registro
+from src.backup_registros import (criar_backup, criar_backup_particionado, diferenca_backups,
+                                   gerenciar_backups, listar_backups, restaurar_backup)
+from src.cache_consultas import ListaRegistros, estatisticas_cache, limpar_cache, marcar_alteracao
+from src.consultar_registros import consultar_registros
+from src.cotacoes import (carregar_cotacoes, converter_registros, fator_conversao, ler_cotacoes,
+                          montar_tabelas, saldo_convertido, totais_por_moeda)
+from src.criar_registro import criar_registro, proximo_id
 from src.deletar_registro import deletar_registro
+from src.estatisticas import (exibir_estatisticas, maiores_registros, obter_estatisticas,
+                             quantis_registros)
+from src.eventos import (caminho_eventos, configurar_eventos, consumir_eventos, gravar_eventos,
+                         ler_eventos, log_dos_registros, montar_eventos)
+from src.exportar_parquet import exportar_parquet, importar_parquet, iterar_parquet
 from src.exportar_relatorio import exportar_relatorio
+from src.ler_registros_por import filtrar_registros
+from src.indice_categorias import (exibir_totais_categoria, filtrar_por_categorias,
+                                   obter_indice_categorias, totais_por_categoria)
+from src.indice_descricoes import (buscar_descricoes, buscar_registros_por_descricao,
+                                   construir_indice_descricoes)
 from src.ler_registros import ler_registros
-from src.salvar_registros import salvar_registros
+from src.orcamentos import (criar_orcamento, exibir_orcamentos, formatar_alerta, gravar_totais_orcamentos,
+                            ler_orcamentos, salvar_orcamentos, verificar_orcamentos)
+from src.particionar_registros import (compactar_particoes, ler_registros_particionado,
+                                       salvar_registros_particionado)
+from src.projetar_investimentos import (exibir_projecao, fatores_crescimento,
+                                        gerar_datas_futuras, projetar_carteira)
+from src.recorrencias import (criar_recorrencia, ler_recorrencias, materializar_recorrencias,
+                              ocorrencias, salvar_recorrencias)
+from src.salvar_registros import gravar_registros, salvar_registros
+from src.tarefas import (agendar_tarefa, aplicar_resultados, encerrar_trabalhador, estado_trabalhador,
+                         iniciar_trabalhador, salvar_em_segundo_plano, tarefa_exportar, tarefa_importar,
+                         tarefa_rendimento, tarefa_salvar)
@@ -0,0 +1,358 @@
+import csv
+import heapq
+import json
+import os
+import tempfile
+from datetime import datetime
+from itertools import chain, count, islice
+from typing import Callable, Iterable, Iterator
+
+from src.cotacoes import carregar_cotacoes, converter_registros
+from src.exportar_parquet import iterar_parquet
+from utilitarios.centavos import de_centavos, para_centavos, registro_de_centavos, registro_para_centavos
+from utilitarios.iterar_json import TAMANHO_BLOCO, iterar_json
+
+TAMANHO_LOTE = 100_000
+MAXIMO_ARQUIVOS = 64
+
+
+def iterar_registros(arquivo: str, tamanho_bloco: int = TAMANHO_BLOCO,
+                     progresso: Callable[[int], None] | None = None) -> Iterator[dict]:
+    '''
+    Percorre os registros de um arquivo sem carregá-lo inteiro na memória.
+
+    Arquivos '.parquet' são lidos um row group por vez, '.jsonl' uma linha
+    por vez e os demais são tratados como a lista JSON de ler_registros,
+    decodificada em blocos. Registros gravados em centavos são convertidos
+    para reais.
+
+    Args:
+        arquivo (str):
+            Caminho do arquivo de registros.
+        tamanho_bloco (int):
+            Quantidade de bytes lidos por vez (apenas para JSON).
+        progresso (Callable[[int], None] | None):
+            Função chamada com o total de bytes lidos (apenas para JSON).
+
+    Returns:
+        Iterator[dict]:
+            Gerador com os registros.
+    '''
+    if arquivo.endswith('.parquet'):
+        yield from iterar_parquet(arquivo)
+    elif arquivo.endswith('.jsonl'):
+        with open(arquivo, 'r', encoding='utf-8') as f:
+            for linha in f:
+                if linha.strip():
+                    yield registro_de_centavos(json.loads(linha))
+    else:
+        for registro in iterar_json(arquivo, tamanho_bloco, progresso):
+            yield registro_de_centavos(registro)
+
+
+def iterar_lotes(registros: Iterable[dict], tamanho_lote: int = TAMANHO_LOTE) -> Iterator[list[dict]]:
+    '''
+    Divide um fluxo de registros em listas de no máximo 'tamanho_lote' itens.
+
+    Args:
+        registros (Iterable[dict]):
+            Registros em qualquer iterável (lista, gerador de arquivo etc.).
+        tamanho_lote (int):
+            Quantidade máxima de registros por lote.
+
+    Returns:
+        Iterator[list[dict]]:
+            Gerador com os lotes.
+    '''
+    registros = iter(registros)
+    while lote := list(islice(registros, tamanho_lote)):
+        yield lote
+
+
+def agregar_parcial(registros: Iterable[dict]) -> dict:
+    '''
+    Soma valor, rendimento e quantidade por mês e tipo.
+
+    Os valores ficam em centavos inteiros, então resultados parciais de
+    lotes diferentes podem ser juntados em qualquer ordem sem erro de
+    arredondamento.
+
+    Args:
+        registros (Iterable[dict]):
+            Registros financeiros.
+
+    Returns:
+        dict:
+            Dicionário (mes 'mm/aaaa', tipo) -> {'valor', 'rendimento',
+            'quantidade'}, com valor e rendimento em centavos.
+    '''
+    parcial = {}
+    for registro in registros:
+        data = registro.get('data')
+        if not isinstance(data, dict):
+            continue
+        chave = (f"{data['mes']}/{data['ano']}", registro['tipo'])
+        totais = parcial.get(chave)
+        if totais is None:
+            totais = parcial[chave] = {'valor': 0, 'rendimento': 0, 'quantidade': 0}
+        totais['valor'] += para_centavos(registro['valor'])
+        totais['rendimento'] += para_centavos(registro.get('rendimento') or 0)
+        totais['quantidade'] += 1
+    return parcial
+
+
+def juntar_parciais(parciais: Iterable[dict]) -> dict:
+    '''
+    Junta resultados de agregar_parcial em um só.
+
+    Args:
+        parciais (Iterable[dict]):
+            Resultados parciais, por exemplo um por lote ou por arquivo.
+
+    Returns:
+        dict:
+            Resultado no mesmo formato de agregar_parcial.
+    '''
+    juntado = {}
+    for parcial in parciais:
+        for chave, totais in parcial.items():
+            destino = juntado.get(chave)
+            if destino is None:
+                juntado[chave] = dict(totais)
+            else:
+                for campo, valor in totais.items():
+                    destino[campo] += valor
+    return juntado
+
+
+def agregar_arquivo(arquivo: str, tamanho_lote: int = TAMANHO_LOTE,
+                    progresso: Callable[[int], None] | None = None,
+                    moeda: str | None = None, tabelas: dict | None = None) -> dict:
+    '''
+    Agrega um arquivo de registros por mês e tipo, lote a lote.
+
+    Apenas um lote de registros fica na memória por vez; o resultado
+    acumulado tem uma entrada por (mês, tipo), independente do tamanho do
+    arquivo.
+
+    Args:
+        arquivo (str):
+            Arquivo de registros (JSON, JSON lines ou Parquet).
+        tamanho_lote (int):
+            Quantidade de registros agregados por vez.
+        progresso (Callable[[int], None] | None):
+            Função chamada com o total de bytes lidos (apenas para JSON).
+        moeda (str | None):
+            Se informada, cada lote é convertido para esta moeda antes de somar.
+        tabelas (dict | None):
+            Tabelas de cotação. Padrão: as de carregar_cotacoes().
+
+    Returns:
+        dict:
+            Resultado no formato de agregar_parcial.
+
+    Raises:
+        ValueError: Se faltar cotação para algum registro.
+    '''
+    if moeda is not None and tabelas is None:
+        tabelas = carregar_cotacoes()
+    agregado = {}
+    for lote in iterar_lotes(iterar_registros(arquivo, progresso=progresso), tamanho_lote):
+        if moeda is not None:
+            lote = converter_registros(lote, moeda, tabelas)
+        agregado = juntar_parciais([agregado, agregar_parcial(lote)])
+    return agregado
+
+
+def totais_agregados(agregado: dict, mes: str, tipo: str) -> dict:
+    '''
+    Retorna os totais de um mês e tipo no mesmo formato de totalizar_mes.
+
+    Args:
+        agregado (dict):
+            Resultado de agregar_parcial, juntar_parciais ou agregar_arquivo.
+        mes (str):
+            Mês no formato 'mm/aaaa'.
+        tipo (str):
+            Tipo do registro.
+
+    Returns:
+        dict:
+            Dicionário com as chaves 'valor', 'rendimento' e 'quantidade'.
+            O rendimento só é somado para o tipo 'Investimento'.
+    '''
+    totais = agregado.get((mes, tipo), {'valor': 0, 'rendimento': 0, 'quantidade': 0})
+    rendimento = totais['rendimento'] if tipo == 'Investimento' else 0
+    return {'valor': de_centavos(totais['valor']), 'rendimento': de_centavos(rendimento),
+            'quantidade': totais['quantidade']}
+
+
+def _chave_ordenacao(ordenar_por: str) -> Callable[[dict], float]:
+    if ordenar_por == 'data':
+        def chave(registro: dict) -> float:
+            try:
+                return datetime.strptime(registro['data']['data_completa'], '%d/%m/%Y').toordinal()
+            except (KeyError, TypeError, ValueError):
+                return 0
+        return chave
+    if ordenar_por == 'valor':
+        return lambda registro: abs(float(registro['valor']))
+    raise ValueError("Ordenação inválida. Use 'data' ou 'valor'.")
+
+
+def _gravar_sequencia(caminho: str, itens: Iterable[tuple]) -> None:
+    with open(caminho, 'w', encoding='utf-8') as f:
+        for item in itens:
+            f.write(json.dumps(item, ensure_ascii=False) + '\n')
+
+
+def _ler_sequencia(caminho: str) -> Iterator[tuple]:
+    with open(caminho, 'r', encoding='utf-8') as f:
+        for linha in f:
+            chave, posicao, registro = json.loads(linha)
+            yield chave, posicao, registro
+
+
+def _intercalar(caminhos: list[str], decrescente: bool) -> Iterator[tuple]:
+    # A posição original desempata chaves iguais, mantendo a ordenação estável.
+    if decrescente:
+        return heapq.merge(*(_ler_sequencia(c) for c in caminhos),
+                           key=lambda item: (item[0], -item[1]), reverse=True)
+    return heapq.merge(*(_ler_sequencia(c) for c in caminhos), key=lambda item: (item[0], item[1]))
+
+
+def ordenar_externo(registros: Iterable[dict], ordenar_por: str = 'data', decrescente: bool = False,
+                    tamanho_lote: int = TAMANHO_LOTE, diretorio_temporario: str | None = None) -> Iterator[dict]:
+    '''
+    Ordena um fluxo de registros maior que a memória (ordenação externa).
+
+    Cada lote é ordenado na memória e gravado em um arquivo temporário; os
+    arquivos são intercalados com heapq.merge. Se houver mais de
+    MAXIMO_ARQUIVOS arquivos, eles são intercalados em grupos antes, para
+    não abrir arquivos demais ao mesmo tempo. A ordenação é estável.
+
+    Args:
+        registros (Iterable[dict]):
+            Registros a ordenar (por exemplo, iterar_registros(arquivo)).
+        ordenar_por (str):
+            'data' ou 'valor' (valor absoluto).
+        decrescente (bool):
+            Ordena do maior para o menor.
+        tamanho_lote (int):
+            Quantidade de registros ordenados na memória por vez.
+        diretorio_temporario (str | None):
+            Onde gravar os arquivos intermediários. Padrão: o do sistema.
+
+    Returns:
+        Iterator[dict]:
+            Gerador com os registros ordenados. Os arquivos temporários são
+            removidos quando o gerador termina ou é fechado.
+    '''
+    chave = _chave_ordenacao(ordenar_por)
+    posicoes = count()
+    with tempfile.TemporaryDirectory(dir=diretorio_temporario) as temporario:
+        nomes = (os.path.join(temporario, f'{n}.jsonl') for n in count())
+        caminhos = []
+        for lote in iterar_lotes(registros, tamanho_lote):
+            itens = [(chave(registro), next(posicoes), registro) for registro in lote]
+            if decrescente:
+                itens.sort(key=lambda item: (item[0], -item[1]), reverse=True)
+            else:
+                itens.sort(key=lambda item: (item[0], item[1]))
+            caminhos.append(next(nomes))
+            _gravar_sequencia(caminhos[-1], itens)
+
+        while len(caminhos) > MAXIMO_ARQUIVOS:
+            grupos = [caminhos[i:i + MAXIMO_ARQUIVOS] for i in range(0, len(caminhos), MAXIMO_ARQUIVOS)]
+            caminhos = []
+            for grupo in grupos:
+                caminhos.append(next(nomes))
+                _gravar_sequencia(caminhos[-1], _intercalar(grupo, decrescente))
+                for caminho in grupo:
+                    os.remove(caminho)
+
+        for _, _, registro in _intercalar(caminhos, decrescente):
+            yield registro
+
+
+def exportar_ordenado(entrada: str, saida: str, formato: str = 'csv', ordenar_por: str = 'data',
+                      decrescente: bool = False, centavos: bool = False,
+                      tamanho_lote: int = TAMANHO_LOTE) -> int:
+    '''
+    Exporta um arquivo de registros ordenado, sem carregá-lo inteiro na memória.
+
+    No CSV, as colunas são a união dos campos de todos os registros, na
+    ordem em que aparecem; registros sem um campo ficam com a célula vazia.
+
+    Args:
+        entrada (str):
+            Arquivo de registros (JSON, JSON lines ou Parquet).
+        saida (str):
+            Arquivo de saída.
+        formato (str):
+            'csv' ou 'json'.
+        ordenar_por (str):
+            'data' ou 'valor' (valor absoluto).
+        decrescente (bool):
+            Ordena do maior para o menor.
+        centavos (bool):
+            Se True, exporta os campos monetários como inteiros em centavos.
+        tamanho_lote (int):
+            Quantidade de registros ordenados na memória por vez.
+
+    Returns:
+        int:
+            Quantidade de registros exportados.
+
+    Raises:
+        ValueError: Se o formato ou a ordenação forem inválidos.
+    '''
+    if formato not in ('csv', 'json'):
+        raise ValueError("Formato inválido. Use 'csv' ou 'json'.")
+    # ordenar_externo só valida a ordenação quando começa a ser percorrido,
+    # e a essa altura o arquivo de saída já teria sido truncado.
+    _chave_ordenacao(ordenar_por)
+
+    campos = {}
+
+    def coletar_campos(registros: Iterable[dict]) -> Iterator[dict]:
+        for registro in registros:
+            campos.update(dict.fromkeys(registro_para_centavos(registro) if centavos else registro))
+            yield registro
+
+    # A ordenação externa lê a entrada inteira antes de devolver o primeiro
+    # registro, então o cabeçalho do CSV já tem a união das colunas de todos.
+    ordenados = ordenar_externo(coletar_campos(iterar_registros(entrada)), ordenar_por, decrescente, tamanho_lote)
+    if centavos:
+        ordenados = (registro_para_centavos(registro) for registro in ordenados)
+    # Puxar o primeiro registro antes de abrir a saída faz erros de leitura da
+    # entrada (arquivo ausente ou corrompido) aparecerem sem tocar na saída.
+    primeiro = next(ordenados, None)
+    if primeiro is not None:
+        ordenados = chain((primeiro,), ordenados)
+
+    quantidade = 0
+    temporario = saida + '.tmp'
+    try:
+        with open(temporario, 'w', newline='', encoding='utf-8') as f:
+            if formato == 'csv':
+                writer = None
+                for registro in ordenados:
+                    if writer is None:
+                        writer = csv.DictWriter(f, fieldnames=list(campos), restval='')
+                        writer.writeheader()
+                    writer.writerow(registro)
+                    quantidade += 1
+            else:
+                f.write('[')
+                for registro in ordenados:
+                    texto = json.dumps(registro, indent=4, ensure_ascii=False).replace('\n', '\n    ')
+                    f.write((',\n    ' if quantidade else '\n    ') + texto)
+                    quantidade += 1
+                f.write('\n]' if quantidade else ']')
+        os.replace(temporario, saida)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+    return quantidade
+
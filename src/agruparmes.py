@@ -1,9 +1,67 @@
 from datetime import datetime
 
-from utilitarios.validacao import validar_tipo
+from src.agregacao_externa import agregar_arquivo, totais_agregados
+from src.cache_consultas import consultar_cache
+from src.cotacoes import carregar_cotacoes, converter_registros, totais_por_moeda
+from src.particionar_registros import ler_registros_particionado
+from utilitarios.centavos import de_centavos, para_centavos
+from utilitarios.validacao import validar_moeda, validar_tipo
 
 
-def agrupar_por(registros: list[dict]) -> None:
+def _calcular_totais(registros: list[dict], mes_desejado: str, tipo_desejado: str) -> dict:
+    total_rendimento = 0
+    valor = 0
+    quantidade = 0
+
+    for registro in registros:
+        mes = datetime.strptime(registro['data']['data_completa'], '%d/%m/%Y').strftime('%m/%Y')
+        if mes == mes_desejado and registro['tipo'] == tipo_desejado:
+            quantidade += 1
+            valor += para_centavos(registro['valor'])
+            if tipo_desejado == 'Investimento':
+                total_rendimento += para_centavos(registro.get('rendimento') or 0)
+
+    return {'valor': de_centavos(valor), 'rendimento': de_centavos(total_rendimento),
+            'quantidade': quantidade}
+
+
+def totalizar_mes(registros: list[dict], mes_desejado: str, tipo_desejado: str,
+                  moeda: str | None = None, tabelas: dict | None = None) -> dict:
+    '''
+    Calcula o total de valor e de rendimento de um mês e tipo, usando o cache de consultas.
+
+    Sem moeda, os valores são somados como estão. Com moeda, cada valor é
+    convertido para ela pela cotação da data do registro.
+
+    Args:
+        registros (list[dict]):
+            Lista de registros financeiros.
+        mes_desejado (str):
+            Mês no formato 'mm/aaaa'.
+        tipo_desejado (str):
+            Tipo do registro ('Receita', 'Despesa' ou 'Investimento').
+        moeda (str | None):
+            Moeda em que os totais são calculados.
+        tabelas (dict | None):
+            Tabelas de cotação. Padrão: as de carregar_cotacoes().
+
+    Returns:
+        dict:
+            Dicionário com as chaves 'valor', 'rendimento' e 'quantidade'.
+
+    Raises:
+        ValueError: Se faltar cotação para algum registro do mês.
+    '''
+    if moeda is not None:
+        tabelas = carregar_cotacoes() if tabelas is None else tabelas
+        totais = totais_por_moeda(registros, mes_desejado, moeda, tabelas)
+        return dict(totais.get(tipo_desejado, {'valor': 0.0, 'rendimento': 0.0, 'quantidade': 0}))
+    totais = consultar_cache(registros, 'totalizar', (mes_desejado, tipo_desejado),
+                             lambda: _calcular_totais(registros, mes_desejado, tipo_desejado))
+    return dict(totais)
+
+
+def agrupar_por(registros: list[dict], diretorio: str | None = None, arquivo: str | None = None) -> None:
     '''
     Agrupa os registros por mês e tipo, calculando o total de cada um.
 
@@ -12,6 +70,12 @@ def agrupar_por(registros: list[dict]) -> None:
             Lista de dicionários contendo os registros financeiros.
             Cada registro contém uma chave 'data' com outra chave 'data_completa',
             e uma chave 'tipo' para categorizar o registro.
+        diretorio (str | None):
+            Diretório com os registros particionados por mês. Se informado,
+            apenas a partição do mês desejado é lida, no lugar de 'registros'.
+        arquivo (str | None):
+            Arquivo de registros lido em fluxo, lote a lote, no lugar de
+            'registros'. Permite agrupar arquivos maiores que a memória.
 
     Returns:
         None: 
@@ -26,27 +90,29 @@ def agrupar_por(registros: list[dict]) -> None:
             break
         except ValueError:
             print('Digite o mês e o ano de acordo com o exemplo: 05/2000')
+    moeda = validar_moeda('Moeda do total (em branco para BRL): ')
 
-    total_rendimento = 0
-    valor = 0
-
-    nenhum_registro = True
-
-    for registro in registros:
-        mes = datetime.strptime(registro['data']['data_completa'], '%d/%m/%Y').strftime('%m/%Y')
-        if mes == mes_desejado and registro['tipo'] == tipo_desejado:
-            nenhum_registro = False
-            if tipo_desejado == 'Investimento':
-                valor += float(registro['valor'])
-                total_rendimento += float(registro.get('rendimento', 0))
-            else:
-                valor += float(registro['valor'])
+    try:
+        if arquivo is not None:
+            totais = totais_agregados(agregar_arquivo(arquivo, moeda=moeda), mes_desejado, tipo_desejado)
+        elif diretorio is not None:
+            registros = ler_registros_particionado(diretorio, mes_desejado, mes_desejado)
+            registros = converter_registros(registros, moeda, carregar_cotacoes())
+            totais = _calcular_totais(registros, mes_desejado, tipo_desejado)
+        else:
+            totais = totalizar_mes(registros, mes_desejado, tipo_desejado, moeda)
+    except ValueError as e:
+        print(f'Não foi possível converter os valores: {e}')
+        return
+    valor = totais['valor']
+    total_rendimento = totais['rendimento']
+    nenhum_registro = totais['quantidade'] == 0
 
     if nenhum_registro:
         print(f'Nenhum registro encontrado para {mes_desejado} com o tipo {tipo_desejado}.')
     else:
         if tipo_desejado == 'Investimento':
-            print(f'Total investido em {mes_desejado}: {valor}')
-            print(f'Total do rendimento em {mes_desejado}: {total_rendimento}')
+            print(f'Total investido em {mes_desejado}: {valor} {moeda}')
+            print(f'Total do rendimento em {mes_desejado}: {total_rendimento} {moeda}')
         else:
-            print(f'Total para {mes_desejado} ({tipo_desejado}): {valor}')
+            print(f'Total para {mes_desejado} ({tipo_desejado}): {valor} {moeda}')
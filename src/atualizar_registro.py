@@ -1,16 +1,19 @@
-from datetime import datetime
+import copy
 from src.atualizar_rendimento import atualiza_rendimento
+from src.cache_consultas import marcar_alteracao
 from utilitarios.calcular_tempo import tempo
 from utilitarios.entrada_data import validar_data
-from utilitarios.validacao import validar_tipo, validar_valor, validar_indice
+from utilitarios.relogio import agora
+from utilitarios.validacao import normalizar_categorias, validar_moeda, validar_tipo, validar_valor, validar_indice
 
 
 def atualizar_registro(registros: list[dict]) -> None:
     '''Atualiza um registro já existente conforme solicitação do usuário.
     
             O usuário pode selecionar um registro financeiro de uma lista e atualizar seus valores.
-            Também pode optar em alterar o valor já existente, o tipo e a data.
+            Também pode optar em alterar o valor já existente, o tipo, a data, a moeda, as categorias e a descrição.
             Se o usuário deixar algum valor em branco, o valor atual do registro será mantido.
+            Para remover todas as categorias, basta digitar '-'.
          
         Args:
             registros (list[dict]): 
@@ -30,9 +33,13 @@ def atualizar_registro(registros: list[dict]) -> None:
         print(f"{i}: {registro}")
     
     indice = validar_indice(registros)
+    anterior = copy.deepcopy(registros[indice])
     novo_valor = validar_valor()
     novo_tipo = validar_tipo('Digite o tipo que deseja alterar. [Receita, Despesa, Investimento]: ')
     nova_data = validar_data('Nova data: ')
+    nova_moeda = validar_moeda('Nova moeda (em branco para manter): ', padrao=None)
+    novas_categorias = input("Novas categorias separadas por vírgula (em branco para manter, '-' para remover todas): ").strip()
+    nova_descricao = input('Nova descrição (em branco para manter): ').strip()
 
     if novo_valor:
         registros[indice]['valor'] = float(novo_valor) if novo_tipo != 'Despesa' else -float(novo_valor)
@@ -40,7 +47,15 @@ def atualizar_registro(registros: list[dict]) -> None:
         registros[indice]['tipo'] = novo_tipo
     if nova_data:
         registros[indice]['data'] = nova_data
-    registros[indice]['data_atualizacao'] = datetime.now().strftime("%d/%m/%Y")
+    if nova_moeda:
+        registros[indice]['moeda'] = nova_moeda
+    if novas_categorias == '-':
+        registros[indice]['categorias'] = []
+    elif novas_categorias:
+        registros[indice]['categorias'] = normalizar_categorias(novas_categorias)
+    if nova_descricao:
+        registros[indice]['descricao'] = nova_descricao
+    registros[indice]['data_atualizacao'] = agora().strftime("%d/%m/%Y")
 
     if novo_tipo == 'Investimento':
 
@@ -49,4 +64,8 @@ def atualizar_registro(registros: list[dict]) -> None:
         montante = round(montante_inicial, 2)
         rendimento_inicial = montante - novo_valor
         rendimento = round(rendimento_inicial, 2)
+    # O evento 'atualizar' já leva o rendimento recalculado e vem antes dos
+    # eventos de 'rendimento' dos demais investimentos.
+    atualiza_rendimento([registros[indice]])
+    marcar_alteracao(registros, 'atualizar', [registros[indice]], [anterior])
     atualiza_rendimento(registros)
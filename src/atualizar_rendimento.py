@@ -1,6 +1,9 @@
 from datetime import datetime
 from typing import Union
 
+from src.cache_consultas import marcar_alteracao
+from utilitarios.relogio import agora
+
 def atualiza_rendimento(registros: list[dict]) -> None:
     '''Atualiza o rendimento dos investimentos informados pelo usuário.
     
@@ -18,9 +21,11 @@ def atualiza_rendimento(registros: list[dict]) -> None:
                 Não retorna nenhum valor, apenas atualiza o registro.
     '''
 
-    hoje = datetime.now()
+    hoje = agora()
+    alterados = []
 
     for registro in registros:
+        antes = (registro.get('rendimento'), registro.get('montante'))
         if registro['tipo'] == 'Investimento':
             data_investimento = datetime.strptime(registro['data']['data_completa'], '%d/%m/%Y')
             dias = (hoje - data_investimento).days
@@ -30,7 +35,11 @@ def atualiza_rendimento(registros: list[dict]) -> None:
             montante = capital * (1 + taxa_juros) ** dias
             registro['rendimento'] = round(rendimento, 2)
             registro['montante'] = round(montante, 2)
-            registro['data_atualizacao'] = datetime.now().strftime("%d/%m/%Y")
+            registro['data_atualizacao'] = agora().strftime("%d/%m/%Y")
         else:
             registro['rendimento'] = None
             registro['montante'] = None
+        if (registro['rendimento'], registro['montante']) != antes:
+            alterados.append(registro)
+
+    marcar_alteracao(registros, 'rendimento', alterados)
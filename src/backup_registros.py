@@ -0,0 +1,313 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+from src.cache_consultas import ListaRegistros
+from src.particionar_registros import chave_particao, ler_manifesto
+from src.salvar_registros import salvar_registros
+from utilitarios.relogio import agora
+
+DIRETORIO_BACKUPS = 'backups'
+
+
+def _caminho_objeto(diretorio: str, hash_conteudo: str) -> str:
+    return os.path.join(diretorio, 'objetos', hash_conteudo[:2], hash_conteudo + '.json.gz')
+
+
+def _gravar_objeto(diretorio: str, conteudo: bytes, hash_conteudo: str | None = None) -> tuple[str, bool]:
+    hash_conteudo = hash_conteudo or hashlib.sha256(conteudo).hexdigest()
+    caminho = _caminho_objeto(diretorio, hash_conteudo)
+    if os.path.exists(caminho):
+        return hash_conteudo, False
+
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temporario = caminho + '.tmp'
+    with gzip.open(temporario, 'wb') as f:
+        f.write(conteudo)
+    os.replace(temporario, caminho)
+    return hash_conteudo, True
+
+
+def _ler_objeto(diretorio: str, hash_conteudo: str) -> list[dict]:
+    with gzip.open(_caminho_objeto(diretorio, hash_conteudo), 'rb') as f:
+        return json.loads(f.read().decode('utf-8'))
+
+
+def _salvar_snapshot(diretorio: str, particoes: dict, quantidade: int) -> str:
+    pasta = os.path.join(diretorio, 'snapshots')
+    os.makedirs(pasta, exist_ok=True)
+
+    nome = agora().strftime('%Y%m%d-%H%M%S')
+    sufixo = 1
+    while os.path.exists(os.path.join(pasta, nome + '.json')):
+        nome = f"{agora().strftime('%Y%m%d-%H%M%S')}-{sufixo}"
+        sufixo += 1
+
+    snapshot = {
+        'nome': nome,
+        'momento': agora().strftime('%d/%m/%Y %H:%M:%S'),
+        'quantidade': quantidade,
+        'particoes': particoes
+    }
+    with open(os.path.join(pasta, nome + '.json'), 'w') as f:
+        json.dump(snapshot, f, indent=4)
+    return nome
+
+
+def criar_backup(registros: list[dict], diretorio: str = DIRETORIO_BACKUPS) -> dict:
+    '''
+    Cria um backup incremental dos registros.
+
+    Os registros são divididos em blocos por ano/mês e cada bloco é guardado
+    uma única vez, com o hash SHA-256 do seu conteúdo como nome. Um snapshot
+    lista o hash de cada bloco; blocos que não mudaram desde outro backup
+    são apenas referenciados, sem nova gravação.
+
+    Args:
+        registros (list[dict]):
+            Registros a salvar.
+        diretorio (str):
+            Diretório dos backups.
+
+    Returns:
+        dict:
+            Resumo com as chaves 'nome' (do snapshot), 'gravados' e 'reaproveitados'.
+    '''
+    blocos = {}
+    for registro in registros:
+        blocos.setdefault(chave_particao(registro), []).append(registro)
+
+    particoes = {}
+    gravados = 0
+    for chave, lista in blocos.items():
+        conteudo = json.dumps(lista, indent=4).encode('utf-8')
+        particoes[chave], novo = _gravar_objeto(diretorio, conteudo)
+        gravados += novo
+
+    nome = _salvar_snapshot(diretorio, particoes, len(registros))
+    return {'nome': nome, 'gravados': gravados, 'reaproveitados': len(particoes) - gravados}
+
+
+def criar_backup_particionado(diretorio_particoes: str, diretorio: str = DIRETORIO_BACKUPS) -> dict:
+    '''
+    Cria um backup incremental a partir do armazenamento particionado.
+
+    Usa os hashes já guardados no manifesto das partições, então apenas as
+    partições que ainda não estão no backup são lidas e copiadas.
+
+    Args:
+        diretorio_particoes (str):
+            Diretório gerado por salvar_registros_particionado.
+        diretorio (str):
+            Diretório dos backups.
+
+    Returns:
+        dict:
+            Resumo com as chaves 'nome' (do snapshot), 'gravados' e 'reaproveitados'.
+    '''
+    manifesto = ler_manifesto(diretorio_particoes)
+
+    particoes = {}
+    gravados = 0
+    for chave, particao in manifesto['particoes'].items():
+        hash_conteudo = particao['hash']
+        caminho = _caminho_objeto(diretorio, hash_conteudo)
+        if not os.path.exists(caminho):
+            origem = os.path.join(diretorio_particoes, particao['arquivo'])
+            if particao['compactada']:
+                os.makedirs(os.path.dirname(caminho), exist_ok=True)
+                temporario = caminho + '.tmp'
+                shutil.copyfile(origem, temporario)
+                os.replace(temporario, caminho)
+            else:
+                with open(origem, 'rb') as f:
+                    _gravar_objeto(diretorio, f.read(), hash_conteudo)
+            gravados += 1
+        particoes[chave] = hash_conteudo
+
+    quantidade = sum(particao['quantidade'] for particao in manifesto['particoes'].values())
+    nome = _salvar_snapshot(diretorio, particoes, quantidade)
+    return {'nome': nome, 'gravados': gravados, 'reaproveitados': len(particoes) - gravados}
+
+
+def listar_backups(diretorio: str = DIRETORIO_BACKUPS) -> list[str]:
+    '''
+    Lista os snapshots existentes, do mais antigo para o mais recente.
+
+    Args:
+        diretorio (str):
+            Diretório dos backups.
+
+    Returns:
+        list[str]:
+            Nomes dos snapshots.
+    '''
+    pasta = os.path.join(diretorio, 'snapshots')
+    if not os.path.isdir(pasta):
+        return []
+    return sorted((nome.removesuffix('.json') for nome in os.listdir(pasta) if nome.endswith('.json')),
+                  key=_ordem_snapshot)
+
+
+def _ordem_snapshot(nome: str) -> tuple[str, int]:
+    # 'AAAAMMDD-HHMMSS' ou 'AAAAMMDD-HHMMSS-N': o sufixo é comparado como
+    # número, para que '-10' venha depois de '-9'.
+    momento, _, sufixo = nome.partition('-')[2].partition('-')
+    return nome[:8] + '-' + momento, int(sufixo) if sufixo.isdigit() else 0
+
+
+def _ler_snapshot(nome: str, diretorio: str) -> dict:
+    with open(os.path.join(diretorio, 'snapshots', nome + '.json'), 'r') as f:
+        return json.load(f)
+
+
+def restaurar_backup(nome: str, diretorio: str = DIRETORIO_BACKUPS, arquivo: str | None = None,
+                     centavos: bool | None = None) -> list[dict]:
+    '''
+    Restaura os registros de um snapshot.
+
+    Os registros voltam agrupados por ano/mês, na ordem em que estavam
+    dentro de cada mês. Se um arquivo for informado, os registros
+    restaurados são salvos nele com salvar_registros.
+
+    Args:
+        nome (str):
+            Nome do snapshot.
+        diretorio (str):
+            Diretório dos backups.
+        arquivo (str | None):
+            Arquivo de registros a substituir pelos restaurados.
+        centavos (bool | None):
+            Formato do arquivo salvo (ver salvar_registros).
+
+    Returns:
+        list[dict]:
+            Registros do snapshot, em uma ListaRegistros.
+    '''
+    snapshot = _ler_snapshot(nome, diretorio)
+    registros = ListaRegistros()
+    for chave in sorted(snapshot['particoes']):
+        registros.extend(_ler_objeto(diretorio, snapshot['particoes'][chave]))
+    registros.pendentes.clear()  # os registros já existiam: não são eventos de criação
+    if arquivo is not None:
+        salvar_registros(registros, arquivo, centavos)
+    return registros
+
+
+def _chave_registro(registro: dict):
+    if isinstance(registro.get('id'), int):
+        return registro['id']
+    return json.dumps(registro, sort_keys=True)
+
+
+def diferenca_backups(nome_antigo: str, nome_novo: str, diretorio: str = DIRETORIO_BACKUPS) -> dict:
+    '''
+    Compara dois snapshots e retorna os registros adicionados, removidos e alterados.
+
+    Blocos com o mesmo hash nos dois snapshots são ignorados sem serem lidos;
+    apenas os blocos diferentes são abertos e comparados pelo 'id' dos registros.
+
+    Args:
+        nome_antigo (str):
+            Nome do snapshot mais antigo.
+        nome_novo (str):
+            Nome do snapshot mais recente.
+        diretorio (str):
+            Diretório dos backups.
+
+    Returns:
+        dict:
+            Dicionário com as chaves 'adicionados', 'removidos' (listas de
+            registros) e 'alterados' (lista de pares (antes, depois)).
+    '''
+    antigo = _ler_snapshot(nome_antigo, diretorio)['particoes']
+    novo = _ler_snapshot(nome_novo, diretorio)['particoes']
+
+    antes = {}
+    depois = {}
+    for chave in set(antigo) | set(novo):
+        if antigo.get(chave) == novo.get(chave):
+            continue
+        if chave in antigo:
+            antes.update((_chave_registro(r), r) for r in _ler_objeto(diretorio, antigo[chave]))
+        if chave in novo:
+            depois.update((_chave_registro(r), r) for r in _ler_objeto(diretorio, novo[chave]))
+
+    return {
+        'adicionados': [registro for chave, registro in depois.items() if chave not in antes],
+        'removidos': [registro for chave, registro in antes.items() if chave not in depois],
+        'alterados': [(antes[chave], registro) for chave, registro in depois.items()
+                      if chave in antes and antes[chave] != registro]
+    }
+
+
+def _escolher_backup(nomes: list[str], msg: str) -> str | None:
+    for posicao, nome in enumerate(nomes, start=1):
+        print(f'{posicao}. {nome}')
+    escolha = input(msg).strip()
+    if escolha.isdigit() and 1 <= int(escolha) <= len(nomes):
+        return nomes[int(escolha) - 1]
+    print('Backup inválido.')
+    return None
+
+
+def gerenciar_backups(registros: list[dict], arquivo: str, diretorio: str = DIRETORIO_BACKUPS) -> list[dict]:
+    '''
+    Exibe o menu de backups: criar, listar, restaurar e comparar snapshots.
+
+    Antes de uma restauração, os registros atuais ganham um backup próprio,
+    para que ela possa ser desfeita.
+
+    Args:
+        registros (list[dict]):
+            Lista de registros financeiros.
+        arquivo (str):
+            Arquivo de registros, substituído ao restaurar um backup.
+        diretorio (str):
+            Diretório dos backups.
+
+    Returns:
+        list[dict]:
+            Os registros atuais, ou os restaurados se houve restauração.
+    '''
+    print("\n--- Backups ---")
+    print("1. Criar backup")
+    print("2. Listar backups")
+    print("3. Restaurar backup")
+    print("4. Comparar backups")
+
+    opcao = input("Escolha uma opção: ")
+    nomes = listar_backups(diretorio)
+
+    if opcao == '1':
+        resumo = criar_backup(registros, diretorio)
+        print(f"Backup {resumo['nome']} criado: {resumo['gravados']} blocos gravados, "
+              f"{resumo['reaproveitados']} reaproveitados.")
+    elif opcao in ('2', '3', '4') and not nomes:
+        print('Nenhum backup encontrado.')
+    elif opcao == '2':
+        for nome in nomes:
+            print(nome)
+    elif opcao == '3':
+        nome = _escolher_backup(nomes, 'Backup a restaurar: ')
+        if nome is not None:
+            atual = criar_backup(registros, diretorio)['nome']
+            registros = restaurar_backup(nome, diretorio, arquivo, getattr(registros, 'centavos', False))
+            print(f'{len(registros)} registros restaurados de {nome} (registros anteriores no backup {atual}).')
+    elif opcao == '4':
+        antigo = _escolher_backup(nomes, 'Backup mais antigo: ')
+        novo = _escolher_backup(nomes, 'Backup mais recente: ') if antigo is not None else None
+        if novo is not None:
+            diferenca = diferenca_backups(antigo, novo, diretorio)
+            for registro in diferenca['adicionados']:
+                print(f'+ {registro}')
+            for registro in diferenca['removidos']:
+                print(f'- {registro}')
+            for antes, depois in diferenca['alterados']:
+                print(f'~ {antes} -> {depois}')
+            print(f"{len(diferenca['adicionados'])} adicionados, {len(diferenca['removidos'])} removidos, "
+                  f"{len(diferenca['alterados'])} alterados.")
+    else:
+        print("Opção inválida.")
+    return registros
@@ -0,0 +1,331 @@
+from collections import OrderedDict
+from itertools import count
+from typing import Callable
+
+import json
+
+from src.eventos import montar_eventos
+
+TAMANHO_MAXIMO = 128
+OPERACOES_REGISTRADAS = ('criar', 'deletar', 'atualizar', 'rendimento')
+
+_cache = OrderedDict()
+_chaves = count()
+_acertos = 0
+_falhas = 0
+
+
+class ListaRegistros(list):
+    '''
+    Lista de registros que acompanha as próprias alterações.
+
+    Cada lista recebe uma chave única, que nunca é reaproveitada (ao contrário
+    de id(), que pode ser repetido depois que a lista é descartada), e uma
+    versão incrementada a cada append, extend, pop, remove etc. Alterações
+    feitas diretamente dentro de um registro não passam pela lista; depois
+    delas é preciso chamar marcar_alteracao.
+
+    Estruturas derivadas (ver manter_derivado) ficam guardadas na própria
+    lista e são avisadas de cada registro criado, removido ou alterado. As
+    mesmas alterações geram os eventos do log (ver montar_eventos), que
+    ficam pendentes na própria lista até ela ser salva.
+    Depois de cada salvamento, salvar_registros chama avisar_salvamento.
+    O atributo centavos guarda se o arquivo de origem grava os valores em
+    centavos, para que salvar_registros mantenha o mesmo formato; origem e
+    sincronizada, de que arquivo a lista veio e se ele conferia com o log
+    (ver lista_sincronizada).
+
+    ler_registros devolve uma ListaRegistros. Listas comuns continuam
+    funcionando em todas as consultas, mas sem cache.
+    '''
+
+    def __init__(self, registros=()):
+        super().__init__(registros)
+        self.chave = next(_chaves)
+        self.versao = 0
+        self.derivados = {}
+        self.ouvintes = []
+        self.ao_salvar = []
+        self.pendentes = []
+        self.centavos = False
+        self.origem = None
+        self.sincronizada = False
+
+    def __reduce_ex__(self, protocolo):
+        # Cópias (copy, deepcopy, pickle) recebem chave, versão e derivados próprios.
+        return (ListaRegistros, (list(self),))
+
+    def _alterada(self, operacao: str, registros: list[dict],
+                  anteriores: list[dict | None] | None = None) -> None:
+        self.versao += 1
+        if operacao in OPERACOES_REGISTRADAS:
+            self.pendentes.extend(montar_eventos(operacao, registros, anteriores))
+        if registros or operacao == 'reconstruir':
+            for ouvinte in list(self.ouvintes):
+                ouvinte(operacao, registros, anteriores)
+
+    def append(self, registro):
+        super().append(registro)
+        self._alterada('criar', [registro])
+
+    def extend(self, registros):
+        registros = list(registros)
+        super().extend(registros)
+        self._alterada('criar', registros)
+
+    def insert(self, indice, registro):
+        super().insert(indice, registro)
+        self._alterada('criar', [registro])
+
+    def pop(self, indice=-1):
+        registro = super().pop(indice)
+        self._alterada('deletar', [registro])
+        return registro
+
+    def remove(self, registro):
+        removido = self[self.index(registro)]
+        super().remove(registro)
+        self._alterada('deletar', [removido])
+
+    def clear(self):
+        removidos = list(self)
+        super().clear()
+        self._alterada('deletar', removidos)
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self._alterada('reordenar', list(self))
+
+    def reverse(self):
+        super().reverse()
+        self._alterada('reordenar', list(self))
+
+    def __setitem__(self, indice, valor):
+        if isinstance(indice, slice):
+            removidos, novos = self[indice], list(valor)
+            super().__setitem__(indice, novos)
+        else:
+            removidos, novos = [self[indice]], [valor]
+            super().__setitem__(indice, valor)
+        self._alterada('deletar', removidos)
+        self._alterada('criar', novos)
+
+    def __delitem__(self, indice):
+        removidos = self[indice] if isinstance(indice, slice) else [self[indice]]
+        super().__delitem__(indice)
+        self._alterada('deletar', removidos)
+
+    def __iadd__(self, registros):
+        self.extend(registros)
+        return self
+
+    def __imul__(self, vezes):
+        antes = list(self)
+        super().__imul__(vezes)
+        if vezes < 1:
+            self._alterada('deletar', antes)
+        else:
+            self._alterada('criar', antes * (vezes - 1))
+        return self
+
+
+def versao_registros(registros: list[dict]) -> int:
+    '''
+    Retorna a versão atual de uma lista de registros.
+
+    Args:
+        registros (list[dict]):
+            Lista de registros.
+
+    Returns:
+        int:
+            Número incrementado a cada alteração da lista, ou 0 se ela não
+            for uma ListaRegistros.
+    '''
+    return registros.versao if isinstance(registros, ListaRegistros) else 0
+
+
+def marcar_alteracao(registros: list[dict], operacao: str = 'reconstruir',
+                     alterados: list[dict] | None = None,
+                     anteriores: list[dict | None] | None = None) -> None:
+    '''
+    Incrementa a versão dos registros, invalidando as consultas em cache.
+
+    Deve ser chamada logo depois de alterar um registro que já está na lista
+    (atualização, rendimento). Acrescentar ou remover registros pelos
+    métodos da ListaRegistros já incrementa a versão.
+
+    Args:
+        registros (list[dict]):
+            Lista que contém os registros alterados.
+        operacao (str):
+            Operação feita ('atualizar', 'rendimento'...). Com o padrão,
+            'reconstruir', as estruturas derivadas são refeitas do zero.
+        alterados (list[dict] | None):
+            Registros alterados, já com os valores novos.
+        anteriores (list[dict | None] | None):
+            Cópia de cada registro antes da alteração, na mesma ordem.
+    '''
+    if isinstance(registros, ListaRegistros):
+        registros._alterada(operacao, alterados or [], anteriores)
+
+
+def manter_derivado(registros: list[dict], nome: str, construir: Callable[[list[dict]], object],
+                    atualizar: Callable[[object, str, list[dict], list[dict | None] | None], None],
+                    salvar: Callable[[object], None] | None = None) -> object:
+    '''
+    Retorna uma estrutura derivada dos registros, mantida em dia a cada alteração.
+
+    Na primeira chamada a estrutura é montada com construir(registros) e
+    guardada na ListaRegistros. Depois disso, cada alteração da lista chama
+    atualizar(estrutura, operacao, registros_afetados, anteriores), com
+    operacao igual a 'criar', 'deletar', 'atualizar', 'rendimento',
+    'reordenar' (sort e reverse, com todos os registros) ou 'reconstruir'.
+    Para listas comuns a estrutura é montada a cada chamada.
+
+    Args:
+        registros (list[dict]):
+            Lista de registros.
+        nome (str):
+            Nome da estrutura, único por lista.
+        construir (Callable):
+            Monta a estrutura a partir de todos os registros.
+        atualizar (Callable):
+            Aplica uma alteração à estrutura.
+        salvar (Callable | None):
+            Chamada com a estrutura depois de cada salvamento dos registros
+            (ver avisar_salvamento), para gravar o que ela guarda em disco.
+
+    Returns:
+        object:
+            Estrutura derivada.
+    '''
+    if not isinstance(registros, ListaRegistros):
+        return construir(registros)
+    if nome not in registros.derivados:
+        estrutura = registros.derivados[nome] = construir(registros)
+        registros.ouvintes.append(
+            lambda operacao, afetados, anteriores: atualizar(estrutura, operacao, afetados, anteriores))
+        if salvar is not None:
+            registros.ao_salvar.append(lambda: salvar(estrutura))
+    return registros.derivados[nome]
+
+
+def avisar_salvamento(registros: list[dict]) -> None:
+    '''
+    Avisa as estruturas derivadas de que os registros foram salvos.
+
+    Chamada por salvar_registros depois de gravar o arquivo e o log de
+    eventos. Não faz nada para listas comuns.
+
+    Args:
+        registros (list[dict]):
+            Lista de registros salva.
+    '''
+    if isinstance(registros, ListaRegistros):
+        for salvar in list(registros.ao_salvar):
+            salvar()
+
+
+def retirar_eventos_pendentes(registros: list[dict]) -> list[str]:
+    '''
+    Retira e retorna as linhas de eventos ainda não gravadas de uma lista de registros.
+
+    Args:
+        registros (list[dict]):
+            Lista de registros.
+
+    Returns:
+        list[str]:
+            Linhas JSON na ordem em que as alterações foram feitas. Vazia
+            para listas comuns.
+    '''
+    if not isinstance(registros, ListaRegistros):
+        return []
+    linhas, registros.pendentes = registros.pendentes, []
+    return linhas
+
+
+def eventos_pendentes(registros: list[dict]) -> list[dict]:
+    '''
+    Retorna os eventos de uma lista de registros ainda não gravados no log, sem retirá-los.
+
+    Args:
+        registros (list[dict]):
+            Lista de registros.
+
+    Returns:
+        list[dict]:
+            Eventos na ordem em que as alterações foram feitas.
+    '''
+    if not isinstance(registros, ListaRegistros):
+        return []
+    return [json.loads(linha) for linha in registros.pendentes]
+
+
+def consultar_cache(registros: list[dict], operacao: str, parametros: tuple,
+                    calcular: Callable[[], object]) -> object:
+    '''
+    Retorna o resultado de uma consulta a partir do cache, calculando se necessário.
+
+    A chave do cache é formada pela chave e pela versão da lista, pela
+    operação e pelos parâmetros. Quando o cache passa de TAMANHO_MAXIMO
+    entradas, a consulta usada há mais tempo é descartada. Listas que não
+    são ListaRegistros não têm versão, então a consulta é sempre calculada.
+
+    Args:
+        registros (list[dict]):
+            Lista consultada.
+        operacao (str):
+            Nome da operação (ex.: 'filtrar', 'totalizar').
+        parametros (tuple):
+            Parâmetros da consulta. Devem ser imutáveis.
+        calcular (Callable):
+            Função sem argumentos que calcula o resultado em caso de falha.
+
+    Returns:
+        object:
+            Resultado da consulta.
+    '''
+    global _acertos, _falhas
+
+    if not isinstance(registros, ListaRegistros):
+        return calcular()
+
+    chave = (registros.chave, registros.versao, operacao, parametros)
+    if chave in _cache:
+        _acertos += 1
+        _cache.move_to_end(chave)
+        return _cache[chave]
+
+    _falhas += 1
+    resultado = calcular()
+    _cache[chave] = resultado
+    if len(_cache) > TAMANHO_MAXIMO:
+        _cache.popitem(last=False)
+    return resultado
+
+
+def limpar_cache() -> None:
+    '''
+    Remove todas as consultas em cache e zera os contadores.
+    '''
+    global _acertos, _falhas
+    _cache.clear()
+    _acertos = 0
+    _falhas = 0
+
+
+def estatisticas_cache() -> dict:
+    '''
+    Retorna os contadores de uso do cache.
+
+    Returns:
+        dict:
+            Dicionário com as chaves 'acertos', 'falhas' e 'tamanho'.
+    '''
+    return {
+        'acertos': _acertos,
+        'falhas': _falhas,
+        'tamanho': len(_cache)
+    }
@@ -0,0 +1,332 @@
+import heapq
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from itertools import islice
+from typing import Iterator
+
+from src.cache_consultas import manter_derivado
+
+
+def _ordinal(data: dict | str) -> int:
+    if isinstance(data, dict):
+        data = data['data_completa']
+    return datetime.strptime(data, '%d/%m/%Y').toordinal()
+
+
+def _ordinal_registro(registro: dict) -> int | None:
+    try:
+        return _ordinal(registro['data'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _chave_valor(registro: dict) -> float:
+    return abs(float(registro['valor']))
+
+
+def _inserir(chaves: list, slots: list, chave, slot: int) -> None:
+    # Valores iguais ficam na ordem dos slots, que é a ordem da lista.
+    posicao = bisect_left(chaves, chave)
+    while posicao < len(chaves) and chaves[posicao] == chave and slots[posicao] < slot:
+        posicao += 1
+    chaves.insert(posicao, chave)
+    slots.insert(posicao, slot)
+
+
+def _retirar(chaves: list, slots: list, chave, slot: int) -> None:
+    posicao = bisect_left(chaves, chave)
+    while slots[posicao] != slot:
+        posicao += 1
+    del chaves[posicao]
+    del slots[posicao]
+
+
+def _incluir(indices: dict, registro: dict, slot: int | None = None) -> None:
+    if slot is None:
+        slot = indices['proximo']
+        indices['proximo'] += 1
+        indices['registros'][slot] = registro
+    indices['slots'][id(registro)] = slot
+    ordinal = _ordinal_registro(registro)
+    if ordinal is not None:
+        _inserir(*indices['data'], ordinal, slot)
+    _inserir(*indices['valor'], _chave_valor(registro), slot)
+    insort(indices['tipo'].setdefault(registro['tipo'], []), slot)
+
+
+def _excluir(indices: dict, registro: dict, slot: int) -> None:
+    ordinal = _ordinal_registro(registro)
+    if ordinal is not None:
+        _retirar(*indices['data'], ordinal, slot)
+    _retirar(*indices['valor'], _chave_valor(registro), slot)
+    slots_tipo = indices['tipo'][registro['tipo']]
+    del slots_tipo[bisect_left(slots_tipo, slot)]
+    if not slots_tipo:
+        del indices['tipo'][registro['tipo']]
+
+
+def construir_indices(registros: list[dict]) -> dict:
+    '''
+    Constrói os índices por data, tipo e valor usados pelo planejador de consultas.
+
+    Cada registro recebe uma posição no índice (slot), na ordem da lista.
+    Os índices de data e valor guardam as chaves ordenadas e os slots
+    correspondentes, para permitir buscas por intervalo com bisect; valores
+    iguais ficam na ordem da lista.
+
+    Args:
+        registros (list[dict]):
+            Lista de registros financeiros.
+
+    Returns:
+        dict:
+            Dicionário com as chaves 'data', 'valor' (pares de listas chaves,
+            slots), 'tipo' (tipo -> slots em ordem) e 'registros' (slot ->
+            registro, em ordem de slot).
+    '''
+    por_data = []
+    por_valor = []
+    por_tipo = {}
+
+    for posicao, registro in enumerate(registros):
+        ordinal = _ordinal_registro(registro)
+        if ordinal is not None:
+            por_data.append((ordinal, posicao))
+        por_valor.append((_chave_valor(registro), posicao))
+        por_tipo.setdefault(registro['tipo'], []).append(posicao)
+
+    por_data.sort()
+    por_valor.sort()
+
+    slots = {}
+    for posicao, registro in enumerate(registros):
+        slots.setdefault(id(registro), posicao)
+    return {
+        'data': ([chave for chave, _ in por_data], [posicao for _, posicao in por_data]),
+        'valor': ([chave for chave, _ in por_valor], [posicao for _, posicao in por_valor]),
+        'tipo': por_tipo,
+        'registros': dict(enumerate(registros)),
+        'slots': slots,
+        'proximo': len(registros),
+        'lista': registros,
+        # O mesmo registro duas vezes na lista (ex.: lista *= 2) não pode ser
+        # localizado pelo id(): o índice vale só para esta consulta.
+        'valido': len(slots) == len(registros)
+    }
+
+
+def _atualizar_indices(indices: dict, operacao: str, afetados: list[dict],
+                       anteriores: list[dict | None] | None) -> None:
+    if not indices['valido'] or operacao == 'rendimento':
+        return
+    lista = indices['lista']
+    if operacao == 'criar':
+        # Slots novos só mantêm a ordem da lista se os registros foram
+        # acrescentados ao final (append, extend).
+        if (len(afetados) > len(lista) or any(nova is not registro for nova, registro
+                                              in zip(lista[len(lista) - len(afetados):], afetados))
+                or any(id(registro) in indices['slots'] for registro in afetados)):
+            indices['valido'] = False
+            return
+        for registro in afetados:
+            _incluir(indices, registro)
+    elif operacao in ('deletar', 'atualizar'):
+        for registro, anterior in zip(afetados, anteriores or [None] * len(afetados)):
+            slot = indices['slots'].get(id(registro))
+            if slot is None or (operacao == 'atualizar' and anterior is None):
+                indices['valido'] = False
+                return
+            try:
+                if operacao == 'deletar':
+                    _excluir(indices, registro, slot)
+                    del indices['slots'][id(registro)]
+                    del indices['registros'][slot]
+                else:
+                    _excluir(indices, anterior, slot)
+                    _incluir(indices, registro, slot)
+            except (IndexError, KeyError):
+                # O registro foi alterado sem aviso antes desta operação.
+                indices['valido'] = False
+                return
+    else:
+        # 'reordenar' e 'reconstruir': a ordem ou o conteúdo mudaram por inteiro.
+        indices['valido'] = False
+
+
+def obter_indices(registros: list[dict]) -> dict:
+    '''
+    Retorna os índices do planejador, mantidos em dia a cada alteração dos registros.
+
+    Os índices ficam junto à ListaRegistros (ver manter_derivado): registros
+    acrescentados ao final, removidos ou atualizados são inseridos ou
+    retirados dos índices com bisect, sem refazê-los. Só reordenar a lista,
+    inserir no meio dela ou uma alteração sem detalhes fazem os índices
+    serem reconstruídos, na próxima consulta. O mesmo acontece quando os
+    slots abandonados passam da metade.
+
+    Args:
+        registros (list[dict]):
+            Lista de registros financeiros.
+
+    Returns:
+        dict:
+            Índices gerados por construir_indices.
+    '''
+    indices = manter_derivado(registros, 'indices', construir_indices, _atualizar_indices)
+    if not indices['valido'] or indices['proximo'] > 2 * len(indices['registros']) + 64:
+        indices.update(construir_indices(registros))
+    return indices
+
+
+def _intervalo(chaves: list, minimo, maximo) -> tuple[int, int]:
+    inicio = 0 if minimo is None else bisect_left(chaves, minimo)
+    fim = len(chaves) if maximo is None else bisect_right(chaves, maximo)
+    return inicio, max(inicio, fim)
+
+
+def planejar_consulta(indices: dict, data_inicio=None, data_fim=None,
+                      tipo: str | None = None, valor_min: float | None = None,
+                      valor_max: float | None = None) -> dict:
+    '''
+    Escolhe o índice mais seletivo para os critérios da consulta.
+
+    A quantidade de candidatos de cada índice é calculada com bisect (data e
+    valor) ou pelo tamanho da lista (tipo), sem copiar nenhuma parte dos
+    índices. O índice com menos candidatos é usado e os demais critérios
+    são verificados registro a registro.
+
+    Args:
+        indices (dict):
+            Índices gerados por construir_indices.
+        data_inicio, data_fim (dict | str | None):
+            Limites do período (dicionário de validar_data ou 'dd/mm/aaaa').
+        tipo (str | None):
+            Tipo do registro.
+        valor_min, valor_max (float | None):
+            Limites do valor absoluto do registro.
+
+    Returns:
+        dict:
+            Plano com as chaves 'indice' (nome do índice ou None para varredura
+            completa), 'chaves' e 'slots' (listas do índice usado), 'inicio' e
+            'fim' (limites dos candidatos nessas listas) e 'estimativa'.
+    '''
+    slots = list(indices['registros'])
+    plano = {'indice': None, 'chaves': None, 'slots': slots, 'inicio': 0, 'fim': len(slots),
+             'estimativa': len(slots)}
+
+    opcoes = []
+    if data_inicio is not None or data_fim is not None:
+        chaves, slots = indices['data']
+        minimo = _ordinal(data_inicio) if data_inicio is not None else None
+        maximo = _ordinal(data_fim) if data_fim is not None else None
+        opcoes.append(('data', chaves, slots, *_intervalo(chaves, minimo, maximo)))
+    if tipo is not None:
+        slots = indices['tipo'].get(tipo, [])
+        opcoes.append(('tipo', None, slots, 0, len(slots)))
+    if valor_min is not None or valor_max is not None:
+        chaves, slots = indices['valor']
+        opcoes.append(('valor', chaves, slots, *_intervalo(chaves, valor_min, valor_max)))
+
+    for nome, chaves, slots, inicio, fim in opcoes:
+        if fim - inicio < plano['estimativa'] or plano['indice'] is None:
+            plano = {'indice': nome, 'chaves': chaves, 'slots': slots, 'inicio': inicio, 'fim': fim,
+                     'estimativa': fim - inicio}
+    return plano
+
+
+def _crescente(plano: dict) -> Iterator[int]:
+    slots = plano['slots']
+    for posicao in range(plano['inicio'], plano['fim']):
+        yield slots[posicao]
+
+
+def _decrescente_estavel(plano: dict) -> Iterator[int]:
+    chaves, slots = plano['chaves'], plano['slots']
+    inicio_plano, fim = plano['inicio'], plano['fim']
+    while fim > inicio_plano:
+        inicio = bisect_left(chaves, chaves[fim - 1], inicio_plano, fim)
+        for posicao in range(inicio, fim):
+            yield slots[posicao]
+        fim = inicio
+
+
+def consultar_registros(registros: list[dict], data_inicio=None, data_fim=None,
+                        tipo: str | None = None, valor_min: float | None = None,
+                        valor_max: float | None = None, ordenar_por: str | None = None,
+                        decrescente: bool = False, limite: int | None = None) -> Iterator[dict]:
+    '''
+    Executa uma consulta combinada sobre os registros, devolvendo um gerador.
+
+    Todos os critérios informados precisam ser atendidos (E lógico). O
+    planejador escolhe o índice mais seletivo e os registros são entregues
+    um a um, sem montar listas intermediárias. Quando a ordenação coincide
+    com o índice escolhido, os registros já saem ordenados; com limite,
+    apenas os 'limite' primeiros são mantidos em memória.
+
+    Args:
+        registros (list[dict]):
+            Lista de registros financeiros.
+        data_inicio, data_fim (dict | str | None):
+            Limites do período, inclusivos.
+        tipo (str | None):
+            Tipo do registro ('Receita', 'Despesa' ou 'Investimento').
+        valor_min, valor_max (float | None):
+            Limites do valor absoluto, inclusivos.
+        ordenar_por (str | None):
+            'data' ou 'valor'. Se None, mantém a ordem do índice usado.
+        decrescente (bool):
+            Ordena do maior para o menor.
+        limite (int | None):
+            Quantidade máxima de registros retornados.
+
+    Returns:
+        Iterator[dict]:
+            Gerador com os registros encontrados.
+    '''
+    indices = obter_indices(registros)
+    plano = planejar_consulta(indices, data_inicio, data_fim, tipo, valor_min, valor_max)
+    por_slot = indices['registros']
+
+    minimo = _ordinal(data_inicio) if data_inicio is not None else None
+    maximo = _ordinal(data_fim) if data_fim is not None else None
+    filtra_data = minimo is not None or maximo is not None
+
+    def atende(registro: dict) -> bool:
+        if tipo is not None and registro['tipo'] != tipo:
+            return False
+        valor = abs(float(registro['valor']))
+        if (valor_min is not None and valor < valor_min) or (valor_max is not None and valor > valor_max):
+            return False
+        if filtra_data:
+            ordinal = _ordinal_registro(registro)
+            if ordinal is None:
+                return False
+            if (minimo is not None and ordinal < minimo) or (maximo is not None and ordinal > maximo):
+                return False
+        return True
+
+    if ordenar_por is not None and ordenar_por == plano['indice'] and decrescente:
+        slots = _decrescente_estavel(plano)
+    else:
+        slots = _crescente(plano)
+    slots = (slot for slot in slots if atende(por_slot[slot]))
+
+    if ordenar_por is not None and ordenar_por != plano['indice']:
+        # O slot (ordem da lista) desempata valores iguais, então o resultado
+        # é o mesmo de um sorted() estável sobre a lista, qualquer que seja o
+        # índice usado.
+        if ordenar_por == 'data':
+            chave = lambda slot: ((_ordinal_registro(por_slot[slot]) or 0), -slot if decrescente else slot)
+        else:
+            chave = lambda slot: (_chave_valor(por_slot[slot]), -slot if decrescente else slot)
+        if limite is not None:
+            selecionar = heapq.nlargest if decrescente else heapq.nsmallest
+            slots = iter(selecionar(limite, slots, key=chave))
+        else:
+            slots = iter(sorted(slots, key=chave, reverse=decrescente))
+
+    encontrados = (por_slot[slot] for slot in slots)
+    if limite is not None:
+        encontrados = islice(encontrados, limite)
+    return encontrados
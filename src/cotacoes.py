@@ -0,0 +1,277 @@
+import csv
+import json
+import os
+from bisect import bisect_right
+from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal
+from itertools import count
+
+from src.cache_consultas import consultar_cache
+from src.eventos import caminho_junto_ao_log
+from utilitarios.centavos import CAMPOS_MONETARIOS, de_centavos, para_centavos
+from utilitarios.validacao import MOEDA_PADRAO
+
+ARQUIVO_COTACOES = 'cotacoes.json'
+
+_tabelas_carregadas = {}
+_chaves_tabelas = count()
+
+
+def montar_tabelas(cotacoes: dict) -> dict:
+    '''
+    Monta as tabelas de cotação indexadas por data.
+
+    Para cada moeda, as datas são convertidas em ordinais e ordenadas junto
+    com as cotações, de modo que a cotação de qualquer dia é encontrada com
+    uma busca binária. Cada chamada gera uma 'chave' nova, usada pelo cache
+    de consultas para distinguir tabelas recarregadas.
+
+    Args:
+        cotacoes (dict):
+            Dicionário moeda -> {data 'dd/mm/aaaa': cotação}, com a cotação
+            em MOEDA_PADRAO por unidade da moeda (ex.: {'USD': {'02/01/2024': 4.89}}).
+
+    Returns:
+        dict:
+            Dicionário com as chaves 'chave' (int) e 'moedas' (moeda ->
+            (ordinais, cotações), duas tuplas alinhadas).
+    '''
+    moedas = {}
+    for moeda, por_data in cotacoes.items():
+        pares = sorted((datetime.strptime(data, '%d/%m/%Y').toordinal(), float(taxa))
+                       for data, taxa in por_data.items())
+        moedas[moeda.upper()] = (tuple(o for o, _ in pares), tuple(t for _, t in pares))
+    return {'chave': next(_chaves_tabelas), 'moedas': moedas}
+
+
+def ler_cotacoes(arquivo: str | None = None) -> dict:
+    '''
+    Lê as cotações diárias de um arquivo JSON ou CSV.
+
+    O JSON segue o formato de montar_tabelas. O CSV deve ter as colunas
+    'data', 'moeda' e 'cotacao'.
+
+    Args:
+        arquivo (str | None):
+            Arquivo de cotações. Padrão: ARQUIVO_COTACOES junto ao log de eventos.
+
+    Returns:
+        dict:
+            Tabelas geradas por montar_tabelas. Se o arquivo não existir,
+            as tabelas ficam vazias (apenas MOEDA_PADRAO é conhecida).
+    '''
+    arquivo = arquivo or caminho_junto_ao_log(ARQUIVO_COTACOES)
+    try:
+        with open(arquivo, 'r', newline='', encoding='utf-8') as f:
+            if arquivo.endswith('.csv'):
+                cotacoes = {}
+                for linha in csv.DictReader(f):
+                    cotacoes.setdefault(linha['moeda'].strip().upper(), {})[linha['data'].strip()] = \
+                        float(linha['cotacao'].replace(',', '.'))
+            else:
+                cotacoes = json.load(f)
+    except FileNotFoundError:
+        cotacoes = {}
+    return montar_tabelas(cotacoes)
+
+
+def carregar_cotacoes(arquivo: str | None = None) -> dict:
+    '''
+    Retorna as tabelas de cotação, relendo o arquivo apenas quando ele muda.
+
+    Args:
+        arquivo (str | None):
+            Arquivo de cotações. Padrão: ARQUIVO_COTACOES junto ao log de eventos.
+
+    Returns:
+        dict:
+            Tabelas geradas por montar_tabelas.
+    '''
+    arquivo = arquivo or caminho_junto_ao_log(ARQUIVO_COTACOES)
+    try:
+        modificacao = os.path.getmtime(arquivo)
+    except OSError:
+        modificacao = None
+    carregado = _tabelas_carregadas.get(arquivo)
+    if carregado is None or carregado[0] != modificacao:
+        carregado = _tabelas_carregadas[arquivo] = (modificacao, ler_cotacoes(arquivo))
+    return carregado[1]
+
+
+def _taxa(tabelas: dict, moeda: str, ordinal: int) -> float:
+    if moeda == MOEDA_PADRAO:
+        return 1.0
+    ordinais, taxas = tabelas['moedas'].get(moeda, ((), ()))
+    posicao = bisect_right(ordinais, ordinal) - 1
+    if posicao < 0:
+        data = datetime.fromordinal(ordinal).strftime('%d/%m/%Y')
+        raise ValueError(f'Sem cotação de {moeda} em {data} ou antes')
+    return taxas[posicao]
+
+
+def fator_conversao(tabelas: dict, origem: str, destino: str, ordinal: int) -> float:
+    '''
+    Retorna o fator que converte um valor de 'origem' para 'destino' em uma data.
+
+    É usada a cotação do próprio dia ou, se não houver (fins de semana e
+    feriados), a do último dia anterior com cotação.
+
+    Args:
+        tabelas (dict):
+            Tabelas geradas por montar_tabelas.
+        origem (str):
+            Moeda do valor.
+        destino (str):
+            Moeda desejada.
+        ordinal (int):
+            Data da conversão (datetime.toordinal()).
+
+    Returns:
+        float:
+            Fator de conversão.
+
+    Raises:
+        ValueError: Se não houver cotação de uma das moedas até a data.
+    '''
+    if origem == destino:
+        return 1.0
+    return _taxa(tabelas, origem, ordinal) / _taxa(tabelas, destino, ordinal)
+
+
+def _ordinal(registro: dict) -> int:
+    data = registro.get('data')
+    try:
+        return datetime(int(data['ano']), int(data['mes']), int(data['dia'])).toordinal()
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"Registro {registro.get('id')} com data fora do formato atual ({data!r}). "
+                         'Migre o arquivo com python -m src.migrar_registros') from None
+
+
+def _converter_centavos(centavos: int, fator: float) -> int:
+    if fator == 1.0:
+        return centavos
+    return int((Decimal(centavos) * Decimal(repr(fator))).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def converter_registros(registros: list[dict], destino: str, tabelas: dict) -> list[dict]:
+    '''
+    Retorna cópias dos registros com os valores convertidos para a moeda de destino.
+
+    O fator de conversão é calculado uma vez por (moeda, data) e reaplicado
+    a todos os registros do grupo. Os campos monetários são convertidos na
+    data do registro.
+
+    Args:
+        registros (list[dict]):
+            Lista de registros financeiros.
+        destino (str):
+            Moeda desejada.
+        tabelas (dict):
+            Tabelas geradas por montar_tabelas.
+
+    Returns:
+        list[dict]:
+            Novos registros, com 'moeda' igual ao destino.
+
+    Raises:
+        ValueError: Se faltar cotação ou a data for inválida em algum registro.
+    '''
+    fatores = {}
+    convertidos = []
+    for registro in registros:
+        moeda = registro.get('moeda') or MOEDA_PADRAO
+        chave = (moeda, _ordinal(registro))
+        fator = fatores.get(chave)
+        if fator is None:
+            fator = fatores[chave] = fator_conversao(tabelas, moeda, destino, chave[1])
+        convertido = dict(registro, moeda=destino)
+        for campo in CAMPOS_MONETARIOS:
+            if convertido.get(campo) is not None:
+                convertido[campo] = de_centavos(_converter_centavos(para_centavos(convertido[campo]), fator))
+        convertidos.append(convertido)
+    return convertidos
+
+
+def _somar_convertido(grupos: dict, destino: str, tabelas: dict) -> int:
+    return sum(_converter_centavos(centavos, fator_conversao(tabelas, moeda, destino, ordinal))
+               for (moeda, ordinal), centavos in grupos.items())
+
+
+def _calcular_totais_moeda(registros: list[dict], mes: str, destino: str, tabelas: dict) -> dict:
+    mes, ano = mes.split('/')
+    grupos = {}
+    for registro in registros:
+        data = registro.get('data')
+        if not isinstance(data, dict) or data['mes'] != mes or data['ano'] != ano:
+            continue
+        chave = (registro.get('moeda') or MOEDA_PADRAO, _ordinal(registro))
+        grupo = grupos.setdefault(registro['tipo'], {'valor': {}, 'rendimento': {}, 'quantidade': 0})
+        grupo['valor'][chave] = grupo['valor'].get(chave, 0) + para_centavos(registro['valor'])
+        if registro['tipo'] == 'Investimento':
+            grupo['rendimento'][chave] = grupo['rendimento'].get(chave, 0) + \
+                para_centavos(registro.get('rendimento') or 0)
+        grupo['quantidade'] += 1
+
+    return {tipo: {'valor': de_centavos(_somar_convertido(grupo['valor'], destino, tabelas)),
+                   'rendimento': de_centavos(_somar_convertido(grupo['rendimento'], destino, tabelas)),
+                   'quantidade': grupo['quantidade']}
+            for tipo, grupo in grupos.items()}
+
+
+def totais_por_moeda(registros: list[dict], mes: str, destino: str, tabelas: dict) -> dict:
+    '''
+    Calcula os totais de um mês por tipo, convertidos para a moeda de destino.
+
+    Os valores são somados em centavos por (moeda, data) e cada soma é
+    convertida com uma única multiplicação, então o custo da conversão
+    depende da quantidade de dias com movimento e não da de registros. O
+    resultado fica no cache de consultas por (mês, moeda, tabelas).
+
+    Args:
+        registros (list[dict]):
+            Lista de registros financeiros.
+        mes (str):
+            Mês no formato 'mm/aaaa'.
+        destino (str):
+            Moeda desejada.
+        tabelas (dict):
+            Tabelas geradas por montar_tabelas.
+
+    Returns:
+        dict:
+            Dicionário tipo -> {'valor', 'rendimento', 'quantidade'}.
+
+    Raises:
+        ValueError: Se faltar cotação para algum registro do mês.
+    '''
+    return consultar_cache(registros, 'totais_moeda', (mes, destino, tabelas['chave']),
+                           lambda: _calcular_totais_moeda(registros, mes, destino, tabelas))
+
+
+def saldo_convertido(registros: list[dict], destino: str, tabelas: dict) -> float:
+    '''
+    Calcula o saldo (soma dos valores) de todos os registros na moeda de destino.
+
+    Args:
+        registros (list[dict]):
+            Lista de registros financeiros.
+        destino (str):
+            Moeda desejada.
+        tabelas (dict):
+            Tabelas geradas por montar_tabelas.
+
+    Returns:
+        float:
+            Saldo convertido.
+
+    Raises:
+        ValueError: Se faltar cotação ou a data for inválida em algum registro.
+    '''
+    def calcular() -> float:
+        grupos = {}
+        for registro in registros:
+            chave = (registro.get('moeda') or MOEDA_PADRAO, _ordinal(registro))
+            grupos[chave] = grupos.get(chave, 0) + para_centavos(registro['valor'])
+        return de_centavos(_somar_convertido(grupos, destino, tabelas))
+
+    return consultar_cache(registros, 'saldo_moeda', (destino, tabelas['chave']), calcular)
@@ -1,25 +1,48 @@
 from datetime import datetime
 from utilitarios.calcular_tempo import tempo
 from utilitarios.entrada_data import validar_data
-from utilitarios.validacao import validar_tipo, validar_valor
+from utilitarios.validacao import validar_categorias, validar_moeda, validar_tipo, validar_valor
 
 
-def criar_registro() -> dict:
+def proximo_id(registros: list[dict]) -> int:
+    '''
+    Retorna o próximo 'id' livre para um novo registro.
+
+    Args:
+        registros (list[dict]):
+            Registros já existentes.
+
+    Returns:
+        int:
+            Maior 'id' existente mais um, ou 0 se não houver registros com 'id'.
+    '''
+    ids = [registro['id'] for registro in registros if isinstance(registro.get('id'), int)]
+    return max(ids) + 1 if ids else 0
+
+
+def criar_registro(registros: list[dict] | None = None) -> dict:
     '''
     Cria um novo registro financeiro com interação do usuário.
 
     Solicita ao usuário que digite uma data, tipo de movimentação (Receita, Despesa ou Investimento),
-    e o valor. 
+    o valor e a moeda (padrão BRL), além de uma descrição e categorias opcionais (ex.: mercado, conta corrente). 
     Se o usuário selecionar 'Investimento' ela irá calcular o montante e o rendimento com base em um percentula de juros fixo.
 
+    Args:
+        registros (list[dict] | None):
+            Registros já existentes, usados para gerar o 'id' do novo registro.
+
     Returns:
         Dict
         Retorna um dicionário representando o registro financeiro que contém as chaves:
-        'id', 'data', 'tipo', 'valor', 'montante', e 'rendimento'.
+        'id', 'data', 'tipo', 'valor', 'moeda', 'montante', 'rendimento', 'categorias' e 'descricao'.
     '''
     data = validar_data('Insira uma data no formáto válido, dd/mm/yyyy')
     tipo = validar_tipo('Digite o tipo que deseja criar. [Receita, Despesa, Investimento]: ')
     valor = validar_valor()
+    moeda = validar_moeda()
+    categorias = validar_categorias()
+    descricao = input('Descrição (opcional): ').strip()
 
     montante = None
     rendimento = None
@@ -34,12 +57,16 @@ def criar_registro() -> dict:
         rendimento = round(rendimento_inicial, 2)
 
     registro = {
+        'id': proximo_id(registros or []),
         'data': data,
         'tipo': tipo,
         'valor': valor if tipo != 'Despesa' else -valor, 
+        'moeda': moeda,
         'montante': montante,
         'rendimento': rendimento,
-        'data_atualizacao': None
+        'data_atualizacao': None,
+        'categorias': categorias,
+        'descricao': descricao
         }
 
     return registro
@@ -23,5 +23,5 @@ def deletar_registro(registros: list[dict])-> None:
         print(f"{i}: {registro}")
 
     indice = validar_indice(registros)
-    del registros[indice]
+    registro = registros.pop(indice)
     print(f'{indice} deletado com sucesso')
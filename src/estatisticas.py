@@ -0,0 +1,352 @@
+import heapq
+from itertools import count
+
+from src.cache_consultas import manter_derivado
+from utilitarios.validacao import validar_tipo
+
+TOP_MAXIMO = 100
+CAPACIDADE_SKETCH = 200
+
+
+def novo_sketch(k: int = CAPACIDADE_SKETCH) -> dict:
+    '''
+    Cria um sketch de quantis (no estilo KLL) vazio.
+
+    O sketch guarda no máximo k valores por nível. Quando um nível enche,
+    ele é ordenado e metade dos valores (alternando pares e ímpares) sobe
+    para o nível seguinte com o dobro do peso. A memória fica proporcional
+    a k * log(n / k), independente da quantidade de valores.
+
+    Args:
+        k (int):
+            Capacidade de cada nível. Valores maiores dão mais precisão.
+
+    Returns:
+        dict:
+            Sketch vazio.
+    '''
+    return {'k': k, 'n': 0, 'niveis': [[]], 'alternar': 0}
+
+
+def _compactar(sketch: dict, nivel: int) -> None:
+    niveis = sketch['niveis']
+    while nivel < len(niveis) and len(niveis[nivel]) >= sketch['k']:
+        valores = sorted(niveis[nivel])
+        sobra = [valores.pop()] if len(valores) % 2 else []
+        if nivel + 1 == len(niveis):
+            niveis.append([])
+        niveis[nivel + 1].extend(valores[sketch['alternar']::2])
+        sketch['alternar'] ^= 1
+        niveis[nivel] = sobra
+        nivel += 1
+
+
+def adicionar_sketch(sketch: dict, valor: float) -> None:
+    '''
+    Adiciona um valor ao sketch.
+
+    Args:
+        sketch (dict):
+            Sketch criado por novo_sketch.
+        valor (float):
+            Valor a adicionar.
+    '''
+    sketch['n'] += 1
+    sketch['niveis'][0].append(valor)
+    if len(sketch['niveis'][0]) >= sketch['k']:
+        _compactar(sketch, 0)
+
+
+def juntar_sketches(sketches: list[dict]) -> dict:
+    '''
+    Junta vários sketches em um novo, sem alterar os originais.
+
+    Args:
+        sketches (list[dict]):
+            Sketches com a mesma capacidade.
+
+    Returns:
+        dict:
+            Sketch que resume todos os valores dos sketches informados.
+    '''
+    juntado = novo_sketch(sketches[0]['k'] if sketches else CAPACIDADE_SKETCH)
+    for sketch in sketches:
+        juntado['n'] += sketch['n']
+        for nivel, valores in enumerate(sketch['niveis']):
+            while len(juntado['niveis']) <= nivel:
+                juntado['niveis'].append([])
+            juntado['niveis'][nivel].extend(valores)
+    for nivel in range(len(juntado['niveis'])):
+        _compactar(juntado, nivel)
+    return juntado
+
+
+def quantil_sketch(sketch: dict, q: float, removidos: dict | None = None) -> float | None:
+    '''
+    Estima o quantil q (entre 0 e 1) dos valores do sketch.
+
+    Args:
+        sketch (dict):
+            Sketch de quantis.
+        q (float):
+            Quantil desejado (0.5 para a mediana).
+        removidos (dict | None):
+            Sketch com os valores que saíram do conjunto (registros removidos
+            ou alterados). Os pesos dele são descontados dos de 'sketch'.
+
+    Returns:
+        float | None:
+            Valor estimado, ou None se o sketch estiver vazio.
+    '''
+    pesados = [(valor, 2 ** nivel) for nivel, valores in enumerate(sketch['niveis']) for valor in valores]
+    if removidos is not None:
+        pesados.extend((valor, -2 ** nivel) for nivel, valores in enumerate(removidos['niveis'])
+                       for valor in valores)
+    pesados.sort()
+    total = sum(peso for _, peso in pesados)
+    if total <= 0:
+        return None
+    alvo = q * total
+    acumulado = 0
+    for valor, peso in pesados:
+        acumulado += peso
+        if acumulado >= alvo:
+            return valor
+    return pesados[-1][0]
+
+
+def _chave_grupo(registro: dict) -> tuple | None:
+    data = registro.get('data')
+    if not isinstance(data, dict):
+        return None
+    return (data['ano'], data['mes'], registro.get('tipo'))
+
+
+def _adicionar(estatisticas: dict, registro: dict) -> None:
+    chave = _chave_grupo(registro)
+    if chave is None:
+        return
+    grupo = estatisticas['grupos'].get(chave)
+    if grupo is None:
+        grupo = estatisticas['grupos'][chave] = {'top': [], 'sketch': novo_sketch(),
+                                                 'removidos': novo_sketch(), 'quantidade': 0}
+
+    # Empates: menor 'id' primeiro e, entre 'id' iguais, quem entrou antes.
+    id_registro = registro.get('id')
+    desempate = (-id_registro if isinstance(id_registro, int) else 0, -next(estatisticas['sequencia']))
+    item = (abs(float(registro['valor'])), desempate, registro)
+
+    # O heap guarda sempre os maiores 'len(top)' registros do grupo. Se ele
+    # já tem todos, o novo registro entra direto; senão, só se superar o menor.
+    top = grupo['top']
+    if len(top) == grupo['quantidade'] and len(top) < estatisticas['top_maximo']:
+        heapq.heappush(top, item)
+    elif top and item > top[0]:
+        if len(top) < estatisticas['top_maximo']:
+            heapq.heappush(top, item)
+        else:
+            heapq.heapreplace(top, item)
+    grupo['quantidade'] += 1
+    adicionar_sketch(grupo['sketch'], item[0])
+
+
+def _remover(estatisticas: dict, registro: dict, anterior: dict) -> None:
+    chave = _chave_grupo(anterior)
+    grupo = estatisticas['grupos'].get(chave) if chave is not None else None
+    if grupo is None:
+        return
+    top = grupo['top']
+    for posicao, item in enumerate(top):
+        if item[2] is registro:
+            top[posicao] = top[-1]
+            top.pop()
+            heapq.heapify(top)
+            break
+    grupo['quantidade'] -= 1
+    adicionar_sketch(grupo['removidos'], abs(float(anterior['valor'])))
+    if not grupo['quantidade']:
+        del estatisticas['grupos'][chave]
+
+
+def _atualizar_estatisticas(estatisticas: dict, operacao: str, registros: list[dict],
+                            anteriores: list[dict | None] | None) -> None:
+    if estatisticas['grupos'] is None:
+        return
+    if operacao == 'criar':
+        for registro in registros:
+            _adicionar(estatisticas, registro)
+    elif operacao == 'deletar':
+        for registro in registros:
+            _remover(estatisticas, registro, registro)
+    elif operacao == 'atualizar':
+        for registro, anterior in zip(registros, anteriores or [None] * len(registros)):
+            if anterior is None:
+                estatisticas['grupos'] = None
+                return
+            if _chave_grupo(anterior) != _chave_grupo(registro) \
+                    or abs(float(anterior['valor'])) != abs(float(registro['valor'])):
+                _remover(estatisticas, registro, anterior)
+                _adicionar(estatisticas, registro)
+    elif operacao == 'reconstruir':
+        estatisticas['grupos'] = None
+
+
+def construir_estatisticas(registros: list[dict], top_maximo: int = TOP_MAXIMO) -> dict:
+    '''
+    Monta, para cada (ano, mês, tipo), os maiores valores e um sketch de quantis.
+
+    Os maiores valores (em valor absoluto) ficam em um heap limitado a
+    'top_maximo' registros; os demais valores só entram no sketch. Em caso
+    de empate, o registro de menor 'id' tem preferência.
+
+    Args:
+        registros (list[dict]):
+            Lista de registros financeiros.
+        top_maximo (int):
+            Quantidade de maiores registros guardados por grupo.
+
+    Returns:
+        dict:
+            Dicionário com 'grupos' ((ano, mes, tipo) -> 'top', 'sketch',
+            'removidos' e 'quantidade'), 'top_maximo' e 'sequencia'.
+    '''
+    estatisticas = {'grupos': {}, 'top_maximo': top_maximo, 'sequencia': count()}
+    for registro in registros:
+        _adicionar(estatisticas, registro)
+    return estatisticas
+
+
+def obter_estatisticas(registros: list[dict]) -> dict:
+    '''
+    Retorna as estatísticas dos registros, mantidas em dia a cada alteração.
+
+    As estatísticas são montadas uma vez por lista; depois disso cada
+    registro criado entra no heap e no sketch do seu grupo, e cada registro
+    removido sai do heap e tem o valor descontado do sketch. Só uma
+    alteração sem detalhes (marcar_alteracao sem operação) refaz tudo.
+
+    Args:
+        registros (list[dict]):
+            Lista de registros financeiros.
+
+    Returns:
+        dict:
+            Estatísticas geradas por construir_estatisticas.
+    '''
+    estatisticas = manter_derivado(registros, 'estatisticas', construir_estatisticas,
+                                   _atualizar_estatisticas)
+    if estatisticas['grupos'] is None:
+        estatisticas.update(construir_estatisticas(registros, estatisticas['top_maximo']))
+    return estatisticas
+
+
+def _grupos(registros: list[dict], tipo: str, ano: str, mes: str | None, n: int = 0) -> list[dict]:
+    estatisticas = obter_estatisticas(registros)
+    meses = [mes] if mes else [str(m).zfill(2) for m in range(1, 13)]
+    grupos = []
+    for chave in ((ano, m, tipo) for m in meses):
+        grupo = estatisticas['grupos'].get(chave)
+        if grupo is None:
+            continue
+        if len(grupo['top']) < min(n, grupo['quantidade']):
+            # Remoções esvaziaram o heap além do pedido: refaz só este grupo.
+            del estatisticas['grupos'][chave]
+            for registro in registros:
+                if _chave_grupo(registro) == chave:
+                    _adicionar(estatisticas, registro)
+            grupo = estatisticas['grupos'][chave]
+        grupos.append(grupo)
+    return grupos
+
+
+def maiores_registros(registros: list[dict], tipo: str, ano: str, mes: str | None = None,
+                      n: int = 20) -> list[dict]:
+    '''
+    Retorna os n registros de maior valor absoluto de um tipo no ano ou no mês.
+
+    Args:
+        registros (list[dict]):
+            Lista de registros financeiros.
+        tipo (str):
+            Tipo do registro.
+        ano (str):
+            Ano com quatro dígitos.
+        mes (str | None):
+            Mês com dois dígitos. Se None, considera o ano todo.
+        n (int):
+            Quantidade de registros (no máximo TOP_MAXIMO).
+
+    Returns:
+        list[dict]:
+            Registros do maior para o menor valor absoluto.
+    '''
+    n = min(n, TOP_MAXIMO)
+    tops = [grupo['top'] for grupo in _grupos(registros, tipo, ano, mes, n)]
+    maiores = heapq.nlargest(n, (item for top in tops for item in top))
+    return [registro for _, _, registro in maiores]
+
+
+def quantis_registros(registros: list[dict], tipo: str, ano: str, mes: str | None = None,
+                      quantis: tuple = (0.25, 0.5, 0.75, 0.9)) -> dict:
+    '''
+    Estima quantis do valor absoluto dos registros de um tipo no ano ou no mês.
+
+    Args:
+        registros (list[dict]):
+            Lista de registros financeiros.
+        tipo (str):
+            Tipo do registro.
+        ano (str):
+            Ano com quatro dígitos.
+        mes (str | None):
+            Mês com dois dígitos. Se None, considera o ano todo.
+        quantis (tuple):
+            Quantis desejados, entre 0 e 1.
+
+    Returns:
+        dict:
+            Dicionário quantil -> valor estimado (None se não houver registros).
+    '''
+    grupos = _grupos(registros, tipo, ano, mes)
+    if len(grupos) == 1:
+        sketch, removidos = grupos[0]['sketch'], grupos[0]['removidos']
+    else:
+        sketch = juntar_sketches([g['sketch'] for g in grupos])
+        removidos = juntar_sketches([g['removidos'] for g in grupos])
+    return {q: quantil_sketch(sketch, q, removidos) for q in quantis}
+
+
+def exibir_estatisticas(registros: list[dict]) -> None:
+    '''
+    Solicita tipo e período e exibe os maiores registros e os quantis do valor.
+
+    Args:
+        registros (list[dict]):
+            Lista de registros financeiros.
+
+    Returns:
+        None:
+            Apenas imprime as estatísticas.
+    '''
+    tipo = validar_tipo('Digite o tipo. [Receita, Despesa, Investimento]: ')
+    while not (ano := input('Ano (aaaa): ').strip()).isdigit() or len(ano) != 4:
+        print('Digite o ano com quatro dígitos. Exemplo: 2024')
+    while (mes := input('Mês (mm, em branco para o ano todo): ').strip()) \
+            and not (mes.isdigit() and 1 <= int(mes) <= 12):
+        print('Digite o mês com dois dígitos, de 01 a 12. Exemplo: 05')
+    mes = mes.zfill(2) if mes else None
+    n = input(f'Quantidade de maiores registros (até {TOP_MAXIMO}): ').strip()
+    n = int(n) if n.isdigit() else 20
+
+    periodo = f'{mes}/{ano}' if mes else ano
+    maiores = maiores_registros(registros, tipo, ano, mes, n)
+    if not maiores:
+        print(f'Nenhum registro encontrado para {periodo} com o tipo {tipo}.')
+        return
+
+    print(f'\nMaiores registros ({tipo}) em {periodo}:')
+    for registro in maiores:
+        print(registro)
+    print(f'\nQuantis do valor ({tipo}) em {periodo}:')
+    for q, valor in quantis_registros(registros, tipo, ano, mes).items():
+        print(f'{int(q * 100)}%: {valor}')
@@ -0,0 +1,410 @@
+import json
+import os
+from typing import Callable, Iterator
+
+from utilitarios.relogio import agora
+
+ARQUIVO_EVENTOS = 'eventos.log'
+ARQUIVO_CONSUMIDORES = 'consumidores.json'
+ARQUIVO_SALVAMENTO = 'ultimo_salvamento.json'
+
+_arquivo_eventos = None
+_arquivo_registros = None
+
+
+def configurar_eventos(arquivo: str | None, arquivo_registros: str | None = None) -> None:
+    '''
+    Define o arquivo onde os eventos de alteração são gravados.
+
+    Enquanto esta função não é chamada, o log fica desligado.
+
+    Args:
+        arquivo (str | None):
+            Caminho do log de eventos (ver caminho_eventos). Se None, os
+            eventos deixam de ser gravados.
+        arquivo_registros (str | None):
+            Arquivo de registros a que o log pertence. Se informado, só os
+            salvamentos desse arquivo gravam eventos no log (ver
+            log_dos_registros).
+    '''
+    global _arquivo_eventos, _arquivo_registros
+    _arquivo_eventos = arquivo
+    _arquivo_registros = os.path.abspath(arquivo_registros) if arquivo_registros else None
+
+
+def eventos_ativos() -> bool:
+    '''
+    Indica se os eventos de alteração estão sendo gravados.
+
+    Returns:
+        bool:
+            False se o log foi desligado com configurar_eventos(None).
+    '''
+    return _arquivo_eventos is not None
+
+
+def log_dos_registros(arquivo_registros: str) -> str | None:
+    '''
+    Retorna o log de eventos onde os salvamentos de um arquivo de registros são gravados.
+
+    Args:
+        arquivo_registros (str):
+            Arquivo de registros sendo salvo.
+
+    Returns:
+        str | None:
+            O log configurado, ou None se o log estiver desligado ou
+            pertencer a outro arquivo de registros.
+    '''
+    if _arquivo_eventos is None:
+        return None
+    if _arquivo_registros is not None and os.path.abspath(arquivo_registros) != _arquivo_registros:
+        return None
+    return _arquivo_eventos
+
+
+def caminho_eventos(arquivo_registros: str) -> str:
+    '''
+    Retorna o caminho do log de eventos de um arquivo de registros.
+
+    O log fica na mesma pasta do arquivo de registros, independente da
+    pasta de onde o programa é executado.
+
+    Args:
+        arquivo_registros (str):
+            Arquivo de registros (ex.: 'financas.json').
+
+    Returns:
+        str:
+            Caminho absoluto de ARQUIVO_EVENTOS ao lado do arquivo.
+    '''
+    return os.path.join(os.path.dirname(os.path.abspath(arquivo_registros)), ARQUIVO_EVENTOS)
+
+
+def caminho_junto_ao_log(nome: str) -> str:
+    '''
+    Retorna o caminho de um arquivo auxiliar na mesma pasta do log configurado.
+
+    Arquivos que guardam offsets do log (consumidores, índices) ficam junto
+    dele, para que um offset nunca seja aplicado ao log de outra pasta.
+
+    Args:
+        nome (str):
+            Nome do arquivo auxiliar.
+
+    Returns:
+        str:
+            Caminho do arquivo.
+    '''
+    return os.path.join(os.path.dirname(_arquivo_eventos or ''), nome)
+
+
+def montar_eventos(operacao: str, registros: list[dict],
+                   anteriores: list[dict | None] | None = None) -> list[str]:
+    '''
+    Monta as linhas de evento de uma alteração, uma por registro alterado.
+
+    Cada evento é uma linha JSON com a operação ('criar', 'atualizar',
+    'deletar' ou 'rendimento'), o registro após a alteração e, quando
+    houver, o registro anterior. O offset de um evento é a posição em bytes
+    da sua linha no arquivo, o que permite retomar a leitura com seek.
+
+    As alterações feitas pelos métodos de uma ListaRegistros (e avisadas
+    com marcar_alteracao) chamam esta função automaticamente e guardam as
+    linhas na própria lista; salvar_registros as grava no log depois de
+    gravar o arquivo, de modo que o log nunca descreve uma alteração que
+    não foi salva nem recebe alterações de outra lista.
+
+    Args:
+        operacao (str):
+            Nome da operação que gerou os eventos.
+        registros (list[dict]):
+            Registros afetados.
+        anteriores (list[dict | None] | None):
+            Estado de cada registro antes da alteração.
+
+    Returns:
+        list[str]:
+            Linhas JSON, ou uma lista vazia se o log estiver desligado.
+    '''
+    if _arquivo_eventos is None or not registros:
+        return []
+
+    momento = agora().strftime('%d/%m/%Y %H:%M:%S')
+    anteriores = anteriores or [None] * len(registros)
+    linhas = []
+    for registro, anterior in zip(registros, anteriores):
+        evento = {'operacao': operacao, 'momento': momento, 'registro': registro}
+        if anterior is not None:
+            evento['anterior'] = anterior
+        linhas.append(json.dumps(evento, ensure_ascii=False) + '\n')
+    return linhas
+
+
+def gravar_eventos(linhas: list[str], arquivo: str | None = None) -> None:
+    '''
+    Acrescenta linhas de eventos ao final do log.
+
+    Args:
+        linhas (list[str]):
+            Linhas obtidas com montar_eventos.
+        arquivo (str | None):
+            Log de eventos. Padrão: o arquivo configurado.
+    '''
+    arquivo = arquivo or _arquivo_eventos
+    if arquivo is None or not linhas:
+        return
+    with open(arquivo, 'a', encoding='utf-8') as f:
+        f.write(''.join(linhas))
+
+
+def ler_eventos(offset: int = 0, arquivo: str | None = None) -> Iterator[dict]:
+    '''
+    Lê os eventos do log a partir de um offset.
+
+    Cada evento retornado recebe as chaves 'offset' (posição do evento) e
+    'proximo_offset' (posição do evento seguinte, usada para continuar a
+    leitura). Uma linha incompleta no final do arquivo, ainda sendo gravada,
+    não é retornada.
+
+    Args:
+        offset (int):
+            Posição a partir da qual ler. Use 0 para ler desde o início.
+        arquivo (str | None):
+            Log de eventos. Padrão: o arquivo configurado.
+
+    Returns:
+        Iterator[dict]:
+            Gerador com os eventos em ordem de gravação.
+    '''
+    arquivo = arquivo or _arquivo_eventos
+    if arquivo is None or not os.path.exists(arquivo):
+        return
+
+    with open(arquivo, 'rb') as f:
+        f.seek(offset)
+        while True:
+            linha = f.readline()
+            if not linha.endswith(b'\n'):
+                return
+            evento = json.loads(linha)
+            evento['offset'] = offset
+            offset += len(linha)
+            evento['proximo_offset'] = offset
+            yield evento
+
+
+def tamanho_log_eventos(arquivo: str | None = None) -> int:
+    '''
+    Retorna o offset do fim do log, ou seja, onde o próximo evento será gravado.
+
+    Args:
+        arquivo (str | None):
+            Log de eventos. Padrão: o arquivo configurado.
+
+    Returns:
+        int:
+            Tamanho do log em bytes, ou 0 se ele ainda não existir.
+    '''
+    arquivo = arquivo or _arquivo_eventos
+    if arquivo is None or not os.path.exists(arquivo):
+        return 0
+    return os.path.getsize(arquivo)
+
+
+def _ler_salvamento() -> dict | None:
+    try:
+        with open(caminho_junto_ao_log(ARQUIVO_SALVAMENTO), 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _assinatura(arquivo_registros: str) -> dict | None:
+    try:
+        informacoes = os.stat(arquivo_registros)
+    except FileNotFoundError:
+        return None
+    return {'tamanho': informacoes.st_size, 'modificacao': informacoes.st_mtime_ns}
+
+
+def registrar_salvamento(arquivo_registros: str, continuacao: bool) -> None:
+    '''
+    Guarda, junto ao log, o tamanho e a data de modificação do arquivo de registros recém-salvo.
+
+    Com isso é possível saber se o arquivo foi regravado sem passar pelo log
+    (migrar_registros, edição manual, cópia de outro arquivo): nesse caso o
+    tamanho ou a data não conferem mais (ver salvamento_confere). Também é
+    guardada a base: o offset do log a partir do qual os eventos descrevem
+    o arquivo. Ela só avança quando a lista salva não veio de um arquivo que
+    conferia com o log, e estruturas gravadas com um offset anterior a ela
+    precisam ser refeitas (ver offset_confere).
+
+    Args:
+        arquivo_registros (str):
+            Arquivo de registros salvo.
+        continuacao (bool):
+            Se a lista salva foi lida (ou salva pela última vez) quando o
+            arquivo conferia com o log (ver lista_sincronizada).
+    '''
+    anterior = _ler_salvamento()
+    salvamento = _assinatura(arquivo_registros)
+    if salvamento is None:
+        return
+    salvamento['base'] = anterior['base'] if continuacao and anterior is not None else tamanho_log_eventos()
+    caminho = caminho_junto_ao_log(ARQUIVO_SALVAMENTO)
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w') as f:
+        json.dump(salvamento, f, indent=4)
+    os.replace(temporario, caminho)
+
+
+def salvamento_confere(arquivo_registros: str) -> bool:
+    '''
+    Verifica se o arquivo de registros continua como foi deixado pelo último salvamento registrado.
+
+    Args:
+        arquivo_registros (str):
+            Arquivo de registros.
+
+    Returns:
+        bool:
+            False se o log estiver desligado ou pertencer a outro arquivo, se
+            nenhum salvamento foi registrado ou se o arquivo foi alterado
+            depois dele.
+    '''
+    if log_dos_registros(arquivo_registros) is None or _arquivo_registros is None:
+        return False
+    salvamento = _ler_salvamento()
+    assinatura = _assinatura(arquivo_registros)
+    return (salvamento is not None and assinatura is not None
+            and all(salvamento.get(chave) == valor for chave, valor in assinatura.items()))
+
+
+def lista_sincronizada(registros: list[dict]) -> bool:
+    '''
+    Verifica se uma lista de registros corresponde ao arquivo a que o log pertence.
+
+    Uma lista está sincronizada quando foi lida (ver ler_registros) ou salva
+    pela última vez nesse arquivo enquanto ele conferia com o log. Só
+    estruturas derivadas dessas listas podem ser lidas do disco e postas em
+    dia com o log, ou gravadas com o offset do log.
+
+    Args:
+        registros (list[dict]):
+            Lista de registros.
+
+    Returns:
+        bool:
+            True se a lista estiver sincronizada com o arquivo do log.
+    '''
+    return (_arquivo_eventos is not None and _arquivo_registros is not None
+            and getattr(registros, 'sincronizada', False) and getattr(registros, 'origem', None) == _arquivo_registros)
+
+
+def offset_confere(offset: int) -> bool:
+    '''
+    Verifica se uma estrutura gravada com um offset do log ainda pode ser posta em dia com ele.
+
+    Args:
+        offset (int):
+            Offset do log guardado junto à estrutura.
+
+    Returns:
+        bool:
+            True se o arquivo de registros não foi regravado fora do log
+            (ver salvamento_confere) e o offset está entre a base do último
+            salvamento e o fim do log.
+    '''
+    if _arquivo_registros is None or not salvamento_confere(_arquivo_registros):
+        return False
+    return _ler_salvamento()['base'] <= offset <= tamanho_log_eventos()
+
+
+def _ler_consumidores(arquivo: str) -> dict:
+    try:
+        with open(arquivo, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def offset_consumidor(nome: str, arquivo_consumidores: str | None = None) -> int:
+    '''
+    Retorna o offset salvo de um consumidor.
+
+    Args:
+        nome (str):
+            Nome do consumidor.
+        arquivo_consumidores (str | None):
+            Arquivo onde os offsets dos consumidores são guardados. Padrão:
+            ARQUIVO_CONSUMIDORES junto ao log (ver caminho_junto_ao_log).
+
+    Returns:
+        int:
+            Offset a partir do qual o consumidor deve continuar, ou 0.
+    '''
+    arquivo_consumidores = arquivo_consumidores or caminho_junto_ao_log(ARQUIVO_CONSUMIDORES)
+    return _ler_consumidores(arquivo_consumidores).get(nome, 0)
+
+
+def salvar_offset_consumidor(nome: str, offset: int,
+                             arquivo_consumidores: str | None = None) -> None:
+    '''
+    Salva o offset de um consumidor.
+
+    Args:
+        nome (str):
+            Nome do consumidor.
+        offset (int):
+            Offset do próximo evento a ser processado.
+        arquivo_consumidores (str | None):
+            Arquivo onde os offsets dos consumidores são guardados. Padrão:
+            ARQUIVO_CONSUMIDORES junto ao log (ver caminho_junto_ao_log).
+    '''
+    arquivo_consumidores = arquivo_consumidores or caminho_junto_ao_log(ARQUIVO_CONSUMIDORES)
+    consumidores = _ler_consumidores(arquivo_consumidores)
+    consumidores[nome] = offset
+    temporario = arquivo_consumidores + '.tmp'
+    with open(temporario, 'w') as f:
+        json.dump(consumidores, f, indent=4)
+    os.replace(temporario, arquivo_consumidores)
+
+
+def consumir_eventos(nome: str, processar: Callable[[dict], None],
+                     arquivo_consumidores: str | None = None,
+                     arquivo: str | None = None) -> int:
+    '''
+    Processa os eventos novos de um consumidor e salva o seu offset.
+
+    O consumidor continua do offset salvo na última execução, de modo que
+    apenas as alterações ainda não vistas são processadas. O offset é salvo
+    ao final; se 'processar' falhar, o offset fica no último evento
+    processado com sucesso.
+
+    Args:
+        nome (str):
+            Nome do consumidor.
+        processar (Callable[[dict], None]):
+            Função chamada para cada evento novo.
+        arquivo_consumidores (str | None):
+            Arquivo onde os offsets dos consumidores são guardados. Padrão:
+            ARQUIVO_CONSUMIDORES junto ao log (ver caminho_junto_ao_log).
+        arquivo (str | None):
+            Log de eventos. Padrão: o arquivo configurado.
+
+    Returns:
+        int:
+            Quantidade de eventos processados.
+    '''
+    offset = offset_consumidor(nome, arquivo_consumidores)
+    quantidade = 0
+    try:
+        for evento in ler_eventos(offset, arquivo):
+            processar(evento)
+            offset = evento['proximo_offset']
+            quantidade += 1
+    finally:
+        if quantidade:
+            salvar_offset_consumidor(nome, offset, arquivo_consumidores)
+    return quantidade
@@ -0,0 +1,141 @@
+from datetime import date, datetime
+from typing import Callable, Iterable, Iterator
+
+from utilitarios.entrada_data import montar_data
+from utilitarios.validacao import MOEDA_PADRAO
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+TAMANHO_GRUPO = 65536
+
+
+def _esquema():
+    return pa.schema([
+        ('id', pa.int64()),
+        ('data', pa.date32()),
+        ('tipo', pa.dictionary(pa.int8(), pa.string())),
+        ('valor', pa.float64()),
+        ('moeda', pa.dictionary(pa.int16(), pa.string())),
+        ('montante', pa.float64()),
+        ('rendimento', pa.float64()),
+        ('data_atualizacao', pa.date32()),
+        ('categorias', pa.list_(pa.string())),
+        ('descricao', pa.string()),
+    ])
+
+
+def _para_date(data) -> date | None:
+    if isinstance(data, dict):
+        data = data.get('data_completa')
+    if not data:
+        return None
+    return datetime.strptime(data, '%d/%m/%Y').date()
+
+
+def _lote(registros: list[dict]):
+    colunas = {
+        'id': [registro.get('id') for registro in registros],
+        'data': [_para_date(registro['data']) for registro in registros],
+        'tipo': [registro['tipo'] for registro in registros],
+        'valor': [registro['valor'] for registro in registros],
+        'moeda': [registro.get('moeda') or MOEDA_PADRAO for registro in registros],
+        'montante': [registro.get('montante') for registro in registros],
+        'rendimento': [registro.get('rendimento') for registro in registros],
+        'data_atualizacao': [_para_date(registro.get('data_atualizacao')) for registro in registros],
+        'categorias': [registro.get('categorias') or [] for registro in registros],
+        'descricao': [registro.get('descricao') for registro in registros],
+    }
+    return pa.RecordBatch.from_pydict(colunas, schema=_esquema())
+
+
+def exportar_parquet(registros: Iterable[dict], arquivo: str,
+                     tamanho_grupo: int = TAMANHO_GRUPO, avisar: Callable[[str], None] = print) -> bool:
+    '''
+    Exporta os registros para um arquivo Parquet com colunas tipadas.
+
+    Os registros são consumidos em grupos de 'tamanho_grupo' linhas e cada
+    grupo é gravado como um row group, então 'registros' pode ser um
+    gerador (ex.: iterar_json) sem que todo o arquivo fique em memória.
+    Requer o pacote opcional pyarrow.
+
+    Args:
+        registros (Iterable[dict]):
+            Registros a exportar.
+        arquivo (str):
+            Nome do arquivo de saída.
+        tamanho_grupo (int):
+            Quantidade de registros por row group.
+        avisar (Callable[[str], None]):
+            Função que recebe a mensagem de pyarrow ausente. Padrão: print.
+
+    Returns:
+        bool:
+            True se o arquivo foi gravado.
+    '''
+    if pa is None:
+        avisar("Exportação em Parquet requer o pacote 'pyarrow' (pip install pyarrow).")
+        return False
+
+    with pq.ParquetWriter(arquivo, _esquema(), compression='zstd') as writer:
+        grupo = []
+        for registro in registros:
+            grupo.append(registro)
+            if len(grupo) == tamanho_grupo:
+                writer.write_batch(_lote(grupo), row_group_size=tamanho_grupo)
+                grupo = []
+        if grupo:
+            writer.write_batch(_lote(grupo), row_group_size=tamanho_grupo)
+    return True
+
+
+def iterar_parquet(arquivo: str, colunas: list[str] | None = None) -> Iterator[dict]:
+    '''
+    Lê os registros de um arquivo Parquet, um row group por vez.
+
+    Args:
+        arquivo (str):
+            Arquivo Parquet gerado por exportar_parquet.
+        colunas (list[str] | None):
+            Colunas a ler. Padrão: todas.
+
+    Returns:
+        Iterator[dict]:
+            Gerador com os registros no formato usado pelo sistema.
+    '''
+    if pa is None:
+        raise ImportError("Importação de Parquet requer o pacote 'pyarrow' (pip install pyarrow).")
+
+    for lote in pq.ParquetFile(arquivo).iter_batches(columns=colunas):
+        for linha in lote.to_pylist():
+            if 'data' in linha and linha['data'] is not None:
+                linha['data'] = montar_data(datetime.combine(linha['data'], datetime.min.time()))
+            if linha.get('data_atualizacao') is not None:
+                linha['data_atualizacao'] = linha['data_atualizacao'].strftime('%d/%m/%Y')
+            yield linha
+
+
+def importar_parquet(arquivo: str) -> list[dict]:
+    '''
+    Importa os registros de um arquivo Parquet.
+
+    Args:
+        arquivo (str):
+            Arquivo Parquet gerado por exportar_parquet.
+
+    Returns:
+        list[dict]:
+            Registros lidos. Se o pyarrow não estiver instalado ou o arquivo
+            não puder ser lido, retorna uma lista vazia.
+    '''
+    try:
+        return list(iterar_parquet(arquivo))
+    except ImportError as e:
+        print(e)
+    except Exception as e:
+        print(f"Erro ao importar arquivo Parquet: {e}")
+    return []
@@ -1,9 +1,28 @@
 import csv
 import json
+from typing import Callable, Iterator
 
-def exportar_relatorio(registros: list[dict], arquivo: str, formato: str = 'csv') -> None:
+from src.cotacoes import carregar_cotacoes, converter_registros
+from src.exportar_parquet import exportar_parquet
+from utilitarios.centavos import registro_para_centavos
 
-    '''Exporta o relatório dos registros financeiros para um arquivo nos formatos CSV ou JSON.
+TAMANHO_LOTE_EXPORTACAO = 10_000
+
+
+def _informar_progresso(registros: list[dict], progresso: Callable[[int, int], None]) -> Iterator[dict]:
+    total = len(registros)
+    for posicao, registro in enumerate(registros, 1):
+        yield registro
+        if posicao % TAMANHO_LOTE_EXPORTACAO == 0 or posicao == total:
+            progresso(posicao, total)
+
+
+def exportar_relatorio(registros: list[dict], arquivo: str, formato: str = 'csv',
+                       centavos: bool = False, moeda: str | None = None,
+                       progresso: Callable[[int, int], None] | None = None,
+                       avisar: Callable[[str], None] = print) -> None:
+
+    '''Exporta o relatório dos registros financeiros para um arquivo nos formatos CSV, JSON ou Parquet.
     
          Args:
             registros (list[dict]): 
@@ -11,28 +30,68 @@ def exportar_relatorio(registros: list[dict], arquivo: str, formato: str = 'csv'
             arquivo (str): 
                 Nome do arquivo de saída para o relatório.
             formato (str): 
-                Formato do arquivo de saída, que pode ser 'csv' ou 'json'.
+                Formato do arquivo de saída, que pode ser 'csv', 'json' ou 'parquet'.
+                O formato 'parquet' requer o pacote opcional pyarrow.
+            centavos (bool):
+                Se True, exporta os campos monetários como inteiros em centavos.
+                Não se aplica ao formato 'parquet', que usa colunas tipadas.
+            moeda (str | None):
+                Se informada, os valores são convertidos para esta moeda pela
+                cotação da data de cada registro (ver carregar_cotacoes).
+            progresso (Callable[[int, int], None] | None):
+                Função chamada a cada TAMANHO_LOTE_EXPORTACAO registros gravados
+                com (registros gravados, total de registros).
+            avisar (Callable[[str], None]):
+                Função que recebe as mensagens de sucesso e de erro. Padrão:
+                print. Tarefas em segundo plano passam a sua própria função.
                 
         Returns:
             None: 
                 Não retorna nenhum valor, apenas vai exportar os registros para o arquivo especificado.
     '''
+    if moeda is not None:
+        try:
+            registros = converter_registros(registros, moeda, carregar_cotacoes())
+        except ValueError as e:
+            avisar(f"Erro ao converter os valores: {e}")
+            return
+
+    if centavos and formato != 'parquet':
+        registros = [registro_para_centavos(registro) for registro in registros]
+
     if formato == 'csv':
         try:
             with open(arquivo, 'w', newline='', encoding='utf-8') as f:
-                cabecalho = registros[0].keys() if registros else []
-                writer = csv.DictWriter(f, fieldnames=cabecalho)
+                # União dos campos de todos os registros: registros antigos não
+                # têm campos novos (ex.: 'descricao'), que ficam em branco.
+                cabecalho = list(dict.fromkeys(campo for registro in registros for campo in registro))
+                writer = csv.DictWriter(f, fieldnames=cabecalho, restval='')
                 writer.writeheader()
-                writer.writerows(registros)
-            print("Relatório exportado com sucesso!")
+                writer.writerows(_informar_progresso(registros, progresso) if progresso else registros)
+            avisar("Relatório exportado com sucesso!")
         except Exception as e:
-            print(f"Erro ao exportar relatório CSV: {e}")
+            avisar(f"Erro ao exportar relatório CSV: {e}")
     elif formato == 'json':
         try:
             with open(arquivo, 'w', encoding='utf-8') as f:
-                json.dump(registros, f, indent=4, ensure_ascii=False)
-            print("Relatório exportado com sucesso!")
+                if progresso is None:
+                    json.dump(registros, f, indent=4, ensure_ascii=False)
+                else:
+                    # Mesmo texto de json.dump com indent=4, gravado registro a registro.
+                    f.write('[')
+                    for posicao, registro in enumerate(_informar_progresso(registros, progresso)):
+                        texto = json.dumps(registro, indent=4, ensure_ascii=False).replace('\n', '\n    ')
+                        f.write((',\n    ' if posicao else '\n    ') + texto)
+                    f.write('\n]' if registros else ']')
+            avisar("Relatório exportado com sucesso!")
+        except Exception as e:
+            avisar(f"Erro ao exportar relatório JSON: {e}")
+    elif formato == 'parquet':
+        try:
+            if exportar_parquet(_informar_progresso(registros, progresso) if progresso else registros, arquivo,
+                                avisar=avisar):
+                avisar("Relatório exportado com sucesso!")
         except Exception as e:
-            print(f"Erro ao exportar relatório JSON: {e}")
+            avisar(f"Erro ao exportar relatório Parquet: {e}")
     else:
-        print("Formato inválido. Use 'csv' ou 'json'.")
+        avisar("Formato inválido. Use 'csv', 'json' ou 'parquet'.")
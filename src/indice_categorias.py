@@ -0,0 +1,355 @@
+from datetime import datetime
+from typing import Iterator
+
+from src.cache_consultas import manter_derivado
+from utilitarios.centavos import de_centavos, para_centavos
+from utilitarios.validacao import validar_tipo
+
+DENSIDADE_BITMAP = 32
+
+
+def _bitmap(posicoes: list[int], tamanho: int) -> int:
+    bits = bytearray((tamanho + 7) // 8)
+    for posicao in posicoes:
+        bits[posicao >> 3] |= 1 << (posicao & 7)
+    return int.from_bytes(bits, 'little')
+
+
+def posicoes_bitmap(bitmap: int) -> Iterator[int]:
+    '''
+    Percorre as posições dos bits ligados de um bitmap, em ordem crescente.
+
+    Args:
+        bitmap (int):
+            Bitmap representado como inteiro (bit i = registro na posição i).
+
+    Returns:
+        Iterator[int]:
+            Gerador com as posições.
+    '''
+    bits = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+    for indice, byte in enumerate(bits):
+        while byte:
+            menor = byte & -byte
+            yield indice * 8 + menor.bit_length() - 1
+            byte ^= menor
+
+
+def _contem(conjunto: set[int] | int, slot: int) -> bool:
+    return slot in conjunto if isinstance(conjunto, set) else bool(conjunto >> slot & 1)
+
+
+def _como_bitmap(conjunto: set[int] | int) -> int:
+    if isinstance(conjunto, set):
+        return _bitmap(conjunto, max(conjunto, default=-1) + 1)
+    return conjunto
+
+
+def _interseccao(a: set[int] | int, b: set[int] | int) -> set[int] | int:
+    if isinstance(a, int) and isinstance(b, int):
+        return a & b
+    if isinstance(a, set) and isinstance(b, set):
+        return a & b
+    esparso, outro = (a, b) if isinstance(a, set) else (b, a)
+    return {slot for slot in esparso if _contem(outro, slot)}
+
+
+def _uniao(a: set[int] | int, b: set[int] | int) -> set[int] | int:
+    if isinstance(a, set) and isinstance(b, set):
+        return a | b
+    return _como_bitmap(a) | _como_bitmap(b)
+
+
+def _diferenca(a: set[int] | int, b: set[int] | int) -> set[int] | int:
+    if isinstance(a, set):
+        return {slot for slot in a if not _contem(b, slot)}
+    return a & ~_como_bitmap(b)
+
+
+def quantidade_conjunto(conjunto: set[int] | int) -> int:
+    '''
+    Retorna quantos registros um conjunto do índice contém.
+
+    Args:
+        conjunto (set[int] | int):
+            Conjunto esparso (set de posições) ou bitmap.
+
+    Returns:
+        int:
+            Quantidade de posições no conjunto.
+    '''
+    return len(conjunto) if isinstance(conjunto, set) else conjunto.bit_count()
+
+
+def posicoes_conjunto(conjunto: set[int] | int) -> Iterator[int]:
+    '''
+    Percorre as posições de um conjunto do índice, em ordem crescente.
+
+    Args:
+        conjunto (set[int] | int):
+            Conjunto esparso (set de posições) ou bitmap.
+
+    Returns:
+        Iterator[int]:
+            Gerador com as posições.
+    '''
+    return iter(sorted(conjunto)) if isinstance(conjunto, set) else posicoes_bitmap(conjunto)
+
+
+def _grupos_registro(registro: dict) -> list[tuple[str, str]]:
+    grupos = [('categorias', categoria) for categoria in registro.get('categorias') or []]
+    data = registro.get('data')
+    if isinstance(data, dict):
+        grupos.append(('meses', f"{data['mes']}/{data['ano']}"))
+    grupos.append(('tipos', registro['tipo']))
+    return grupos
+
+
+def _incluir(indice: dict, registro: dict, slot: int | None = None) -> None:
+    if slot is None:
+        slot = indice['proximo']
+        indice['proximo'] += 1
+    indice['slots'][id(registro)] = slot
+    indice['registros'][slot] = registro
+    indice['grupos'][slot] = grupos = _grupos_registro(registro)
+    indice['todos'] |= 1 << slot
+    for grupo, nome in grupos:
+        conjunto = indice[grupo].get(nome, set())
+        if isinstance(conjunto, set):
+            conjunto.add(slot)
+            if len(conjunto) * DENSIDADE_BITMAP > indice['proximo']:
+                conjunto = _como_bitmap(conjunto)
+        else:
+            conjunto |= 1 << slot
+        indice[grupo][nome] = conjunto
+
+
+def _excluir(indice: dict, registro: dict) -> None:
+    slot = indice['slots'].pop(id(registro))
+    del indice['registros'][slot]
+    indice['todos'] &= ~(1 << slot)
+    for grupo, nome in indice['grupos'].pop(slot):
+        conjunto = indice[grupo][nome]
+        if isinstance(conjunto, set):
+            conjunto.discard(slot)
+        else:
+            conjunto &= ~(1 << slot)
+            indice[grupo][nome] = conjunto
+        if not conjunto:
+            del indice[grupo][nome]
+
+
+def construir_indice_categorias(registros: list[dict]) -> dict:
+    '''
+    Constrói os conjuntos de registros por categoria, por mês e por tipo.
+
+    Cada registro recebe uma posição (slot) no índice, na ordem da lista.
+    Grupos com muitos registros são guardados como bitmaps (um inteiro em
+    que o bit i indica o registro no slot i), em que filtros com várias
+    categorias viram operações &, | e ~ feitas em C pelo próprio Python.
+    Grupos pequenos, como a maioria das tags, são guardados como set de
+    slots, que ocupa memória proporcional aos registros do grupo e não ao
+    tamanho da lista. Um grupo passa a bitmap quando tem mais de um a cada
+    DENSIDADE_BITMAP slots.
+
+    Args:
+        registros (list[dict]):
+            Lista de registros financeiros.
+
+    Returns:
+        dict:
+            Dicionário com as chaves 'categorias', 'meses' ('mm/aaaa') e
+            'tipos', cada uma mapeando o nome ao conjunto, 'todos' (bitmap
+            dos slots em uso) e 'registros' (slot -> registro).
+    '''
+    indice = {'categorias': {}, 'meses': {}, 'tipos': {}, 'todos': 0, 'proximo': 0,
+              'slots': {}, 'registros': {}, 'grupos': {}, 'lista': registros, 'valido': True}
+    for registro in registros:
+        if id(registro) in indice['slots']:
+            # O mesmo registro duas vezes na lista (ex.: lista *= 2): os
+            # slots não identificam mais o registro, então o índice vale só
+            # para esta consulta e é reconstruído na próxima.
+            indice['valido'] = False
+        _incluir(indice, registro)
+    return indice
+
+
+def _atualizar_indice(indice: dict, operacao: str, afetados: list[dict],
+                      anteriores: list[dict | None] | None) -> None:
+    if not indice['valido'] or operacao == 'rendimento':
+        return
+    lista = indice['lista']
+    if operacao == 'criar':
+        # Slots novos só mantêm a ordem da lista se os registros foram
+        # acrescentados ao final (append, extend).
+        if (len(afetados) > len(lista) or any(nova is not registro for nova, registro
+                                              in zip(lista[len(lista) - len(afetados):], afetados))
+                or any(id(registro) in indice['slots'] for registro in afetados)):
+            indice['valido'] = False
+            return
+        for registro in afetados:
+            _incluir(indice, registro)
+    elif operacao == 'deletar':
+        for registro in afetados:
+            if id(registro) not in indice['slots']:
+                indice['valido'] = False
+                return
+            _excluir(indice, registro)
+    elif operacao == 'atualizar':
+        for registro in afetados:
+            slot = indice['slots'].get(id(registro))
+            if slot is None:
+                indice['valido'] = False
+                return
+            _excluir(indice, registro)
+            _incluir(indice, registro, slot)
+    else:
+        # 'reordenar' e 'reconstruir': a ordem ou o conteúdo mudaram por inteiro.
+        indice['valido'] = False
+
+
+def obter_indice_categorias(registros: list[dict]) -> dict:
+    '''
+    Retorna o índice de categorias, mantido em dia a cada alteração dos registros.
+
+    O índice fica junto à ListaRegistros (ver manter_derivado): registros
+    acrescentados ao final, removidos ou atualizados mudam apenas os seus
+    próprios slots. Só reordenar a lista, inserir no meio dela ou uma
+    alteração sem detalhes fazem o índice ser reconstruído, na próxima
+    consulta. O mesmo acontece quando os slots abandonados passam da
+    metade.
+
+    Args:
+        registros (list[dict]):
+            Lista de registros financeiros.
+
+    Returns:
+        dict:
+            Índice gerado por construir_indice_categorias.
+    '''
+    indice = manter_derivado(registros, 'indice_categorias', construir_indice_categorias, _atualizar_indice)
+    if not indice['valido'] or indice['proximo'] > 2 * len(indice['registros']) + 64:
+        indice.update(construir_indice_categorias(registros))
+    return indice
+
+
+def selecionar_categorias(indice: dict, todas: list[str] = (), alguma: list[str] = (),
+                          excluir: list[str] = ()) -> set[int] | int:
+    '''
+    Combina os conjuntos das categorias conforme o filtro.
+
+    Args:
+        indice (dict):
+            Índice gerado por construir_indice_categorias.
+        todas (list[str]):
+            O registro precisa ter todas estas categorias (E).
+        alguma (list[str]):
+            O registro precisa ter ao menos uma destas categorias (OU).
+        excluir (list[str]):
+            O registro não pode ter nenhuma destas categorias.
+
+    Returns:
+        set[int] | int:
+            Slots dos registros selecionados (ver posicoes_conjunto).
+    '''
+    conjuntos = indice['categorias']
+    selecao = indice['todos']
+    # As categorias exigidas mais raras primeiro: a interseção com um set
+    # pequeno já reduz a seleção a poucos slots.
+    for categoria in sorted(todas, key=lambda nome: quantidade_conjunto(conjuntos.get(nome, set()))):
+        selecao = _interseccao(selecao, conjuntos.get(categoria, set()))
+    if alguma:
+        uniao = set()
+        for categoria in alguma:
+            uniao = _uniao(uniao, conjuntos.get(categoria, set()))
+        selecao = _interseccao(selecao, uniao)
+    for categoria in excluir:
+        selecao = _diferenca(selecao, conjuntos.get(categoria, set()))
+    return selecao
+
+
+def filtrar_por_categorias(registros: list[dict], todas: list[str] = (), alguma: list[str] = (),
+                           excluir: list[str] = ()) -> list[dict]:
+    '''
+    Filtra os registros por categorias usando os conjuntos do índice.
+
+    Args:
+        registros (list[dict]):
+            Lista de registros financeiros.
+        todas (list[str]):
+            O registro precisa ter todas estas categorias (E).
+        alguma (list[str]):
+            O registro precisa ter ao menos uma destas categorias (OU).
+        excluir (list[str]):
+            O registro não pode ter nenhuma destas categorias.
+
+    Returns:
+        list[dict]:
+            Registros selecionados, na ordem da lista.
+    '''
+    indice = obter_indice_categorias(registros)
+    selecao = selecionar_categorias(indice, todas, alguma, excluir)
+    return [indice['registros'][slot] for slot in posicoes_conjunto(selecao)]
+
+
+def totais_por_categoria(registros: list[dict], mes: str | None = None,
+                         tipo: str | None = None) -> dict:
+    '''
+    Calcula o total de valor de cada categoria, opcionalmente em um mês e tipo.
+
+    Args:
+        registros (list[dict]):
+            Lista de registros financeiros.
+        mes (str | None):
+            Mês no formato 'mm/aaaa'.
+        tipo (str | None):
+            Tipo do registro.
+
+    Returns:
+        dict:
+            Dicionário categoria -> {'valor': total, 'quantidade': registros}.
+            Categorias sem registros no filtro não aparecem.
+    '''
+    indice = obter_indice_categorias(registros)
+    filtro = indice['todos']
+    if mes is not None:
+        filtro = _interseccao(filtro, indice['meses'].get(mes, set()))
+    if tipo is not None:
+        filtro = _interseccao(filtro, indice['tipos'].get(tipo, set()))
+
+    totais = {}
+    for categoria, conjunto in sorted(indice['categorias'].items()):
+        selecao = _interseccao(conjunto, filtro)
+        if not selecao:
+            continue
+        centavos = sum(para_centavos(indice['registros'][slot]['valor']) for slot in posicoes_conjunto(selecao))
+        totais[categoria] = {'valor': de_centavos(centavos), 'quantidade': quantidade_conjunto(selecao)}
+    return totais
+
+
+def exibir_totais_categoria(registros: list[dict]) -> None:
+    '''
+    Solicita um mês e um tipo e exibe o total de cada categoria.
+
+    Args:
+        registros (list[dict]):
+            Lista de registros financeiros.
+
+    Returns:
+        None:
+            Apenas imprime os totais.
+    '''
+    tipo = validar_tipo('Digite o tipo que deseja agrupar. [Receita, Despesa, Investimento]: ')
+    while True:
+        mes = input('Digite o mês e ano que deseja agrupar (mm/aaaa): ')
+        try:
+            mes = datetime.strptime(mes, '%m/%Y').strftime('%m/%Y')
+            break
+        except ValueError:
+            print('Digite o mês e o ano de acordo com o exemplo: 05/2000')
+
+    totais = totais_por_categoria(registros, mes, tipo)
+    if not totais:
+        print(f'Nenhum registro com categoria encontrado para {mes} com o tipo {tipo}.')
+    for categoria, total in totais.items():
+        print(f"{categoria}: {total['valor']} ({total['quantidade']} registros)")
@@ -0,0 +1,402 @@
+import json
+import math
+import os
+from bisect import bisect_left
+from collections import Counter
+
+from src.cache_consultas import consultar_cache, eventos_pendentes, manter_derivado
+from src.eventos import caminho_junto_ao_log, ler_eventos, lista_sincronizada, offset_confere, tamanho_log_eventos
+from utilitarios.texto import tokenizar
+
+ARQUIVO_INDICE = 'indice_descricoes.json'
+
+
+def novo_indice() -> dict:
+    '''
+    Cria um índice invertido de descrições vazio.
+
+    O índice guarda, para cada palavra, os 'id' dos registros em que ela
+    aparece e quantas vezes ('termos'), a quantidade de palavras de cada
+    registro ('documentos') e o offset do log de eventos até onde o índice
+    está atualizado ('offset').
+
+    Returns:
+        dict:
+            Índice vazio.
+    '''
+    return {'offset': 0, 'documentos': {}, 'termos': {}}
+
+
+def indexar_registro(indice: dict, registro: dict, chave: str | None = None) -> None:
+    '''
+    Adiciona a descrição de um registro ao índice.
+
+    Args:
+        indice (dict):
+            Índice invertido.
+        registro (dict):
+            Registro com 'id' e 'descricao'. Registros sem 'id' são ignorados.
+        chave (str | None):
+            Chave do registro no índice. Padrão: o 'id' do registro.
+    '''
+    if chave is None:
+        if not isinstance(registro.get('id'), int):
+            return
+        chave = str(registro['id'])
+    palavras = tokenizar(registro.get('descricao'))
+    if not palavras:
+        return
+
+    indice['documentos'][chave] = len(palavras)
+    for palavra in palavras:
+        postagens = indice['termos'].setdefault(palavra, {})
+        postagens[chave] = postagens.get(chave, 0) + 1
+    indice.pop('_ordenados', None)
+
+
+def remover_do_indice(indice: dict, registro: dict, chave: str | None = None) -> None:
+    '''
+    Remove a descrição de um registro do índice.
+
+    Args:
+        indice (dict):
+            Índice invertido.
+        registro (dict):
+            Registro como estava quando foi indexado.
+        chave (str | None):
+            Chave do registro no índice. Padrão: o 'id' do registro.
+    '''
+    if chave is None:
+        chave = str(registro.get('id'))
+    if indice['documentos'].pop(chave, None) is None:
+        return
+    for palavra in set(tokenizar(registro.get('descricao'))):
+        postagens = indice['termos'].get(palavra)
+        if postagens is None:
+            continue
+        postagens.pop(chave, None)
+        if not postagens:
+            del indice['termos'][palavra]
+    indice.pop('_ordenados', None)
+
+
+def aplicar_evento(indice: dict, evento: dict) -> None:
+    '''
+    Atualiza o índice com um evento do log de alterações.
+
+    Args:
+        indice (dict):
+            Índice invertido.
+        evento (dict):
+            Evento lido com ler_eventos.
+    '''
+    operacao = evento['operacao']
+    if operacao == 'criar':
+        indexar_registro(indice, evento['registro'])
+    elif operacao == 'atualizar':
+        remover_do_indice(indice, evento.get('anterior') or evento['registro'])
+        indexar_registro(indice, evento['registro'])
+    elif operacao == 'deletar':
+        remover_do_indice(indice, evento['registro'])
+
+
+def construir_indice_descricoes(registros: list[dict]) -> dict:
+    '''
+    Constrói o índice com todos os registros e o posiciona no fim do log de eventos.
+
+    Args:
+        registros (list[dict]):
+            Lista de registros financeiros.
+
+    Returns:
+        dict:
+            Índice invertido.
+    '''
+    indice = novo_indice()
+    indice['offset'] = tamanho_log_eventos()
+    for registro in registros:
+        indexar_registro(indice, registro)
+    return indice
+
+
+def atualizar_indice_descricoes(indice: dict) -> int:
+    '''
+    Aplica ao índice os eventos gravados desde a última atualização.
+
+    Args:
+        indice (dict):
+            Índice invertido.
+
+    Returns:
+        int:
+            Quantidade de eventos aplicados.
+    '''
+    quantidade = 0
+    for evento in ler_eventos(indice['offset']):
+        aplicar_evento(indice, evento)
+        indice['offset'] = evento['proximo_offset']
+        quantidade += 1
+    return quantidade
+
+
+def carregar_indice_descricoes(arquivo: str | None = None) -> dict | None:
+    '''
+    Lê o índice salvo em disco.
+
+    Args:
+        arquivo (str | None):
+            Arquivo do índice. Padrão: ARQUIVO_INDICE junto ao log de eventos.
+
+    Returns:
+        dict | None:
+            Índice lido, ou None se o arquivo não existir.
+    '''
+    arquivo = arquivo or caminho_junto_ao_log(ARQUIVO_INDICE)
+    try:
+        with open(arquivo, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def salvar_indice_descricoes(indice: dict, arquivo: str | None = None) -> None:
+    '''
+    Grava o índice em disco.
+
+    Args:
+        indice (dict):
+            Índice invertido.
+        arquivo (str | None):
+            Arquivo do índice. Padrão: ARQUIVO_INDICE junto ao log de eventos.
+    '''
+    arquivo = arquivo or caminho_junto_ao_log(ARQUIVO_INDICE)
+    dados = {chave: valor for chave, valor in indice.items() if not chave.startswith('_')}
+    temporario = arquivo + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(dados, f)
+    os.replace(temporario, arquivo)
+
+
+def _expandir_prefixo(indice: dict, prefixo: str) -> list[str]:
+    if '_ordenados' not in indice:
+        indice['_ordenados'] = sorted(indice['termos'])
+    ordenados = indice['_ordenados']
+    encontrados = []
+    for posicao in range(bisect_left(ordenados, prefixo), len(ordenados)):
+        if not ordenados[posicao].startswith(prefixo):
+            break
+        encontrados.append(ordenados[posicao])
+    return encontrados
+
+
+def buscar_descricoes(indice: dict, consulta: str, limite: int = 20) -> list[tuple[int, float]]:
+    '''
+    Busca registros cuja descrição contém todas as palavras da consulta.
+
+    Cada palavra da consulta é tratada como prefixo ('merc' encontra
+    'mercado'), sem diferenciar acentos e maiúsculas. O resultado é ordenado
+    por relevância (TF-IDF): palavras raras e repetidas na descrição pesam
+    mais, e descrições curtas são favorecidas.
+
+    Args:
+        indice (dict):
+            Índice invertido.
+        consulta (str):
+            Texto da busca.
+        limite (int):
+            Quantidade máxima de resultados.
+
+    Returns:
+        list[tuple[int, float]]:
+            Pares ('id' do registro, pontuação), do mais relevante ao menos.
+    '''
+    palavras = tokenizar(consulta)
+    if not palavras:
+        return []
+
+    total_documentos = len(indice['documentos'])
+    pontuacoes = None
+    for palavra in palavras:
+        parcial = {}
+        for termo in _expandir_prefixo(indice, palavra):
+            postagens = indice['termos'][termo]
+            idf = math.log(1 + total_documentos / len(postagens))
+            for chave, frequencia in postagens.items():
+                parcial[chave] = parcial.get(chave, 0) + frequencia * idf
+        if pontuacoes is None:
+            pontuacoes = parcial
+        else:
+            pontuacoes = {chave: pontuacao + parcial[chave]
+                          for chave, pontuacao in pontuacoes.items() if chave in parcial}
+        if not pontuacoes:
+            return []
+
+    resultado = [(int(chave), pontuacao / math.sqrt(indice['documentos'][chave]))
+                 for chave, pontuacao in pontuacoes.items()]
+    resultado.sort(key=lambda item: (-item[1], item[0]))
+    return resultado[:limite]
+
+
+def _contar_id(estado: dict, registro: dict, passo: int) -> None:
+    # 'repetidos' soma os registros sem 'id' inteiro e as cópias extras de cada
+    # 'id'; enquanto for maior que zero, o índice por 'id' não pode ser usado.
+    id_registro = registro.get('id') if isinstance(registro.get('id'), int) else None
+    anterior = estado['ids'][id_registro]
+    estado['ids'][id_registro] += passo
+    if id_registro is None or (anterior >= 1 if passo > 0 else anterior >= 2):
+        estado['repetidos'] += passo
+
+
+def _novo_estado(registros: list[dict], arquivo_indice: str | None) -> dict:
+    return {'registros': registros, 'arquivo': arquivo_indice, 'ids': None, 'repetidos': 0, 'indice': None,
+            'alterado': False}
+
+
+def _atualizar_estado(estado: dict, operacao: str, afetados: list[dict],
+                      anteriores: list[dict | None] | None) -> None:
+    if estado['ids'] is None:
+        return
+    if operacao == 'reconstruir':
+        estado.update(_novo_estado(estado['registros'], estado['arquivo']))
+        return
+    if operacao not in ('criar', 'deletar', 'atualizar'):
+        return
+
+    anteriores = anteriores or [None] * len(afetados)
+    for registro, anterior in zip(afetados, anteriores):
+        if operacao == 'criar':
+            _contar_id(estado, registro, 1)
+        elif operacao == 'deletar':
+            _contar_id(estado, registro, -1)
+        elif anterior is not None:
+            _contar_id(estado, anterior, -1)
+            _contar_id(estado, registro, 1)
+
+    if estado['repetidos']:
+        estado['indice'] = None
+    elif estado['indice'] is not None:
+        for registro, anterior in zip(afetados, anteriores):
+            evento = {'operacao': operacao, 'registro': registro}
+            if anterior is not None:
+                evento['anterior'] = anterior
+            aplicar_evento(estado['indice'], evento)
+        estado['alterado'] = True
+
+
+def _persistir_estado(estado: dict) -> None:
+    # Só vale gravar quando o índice descreve exatamente o fim do log: com o
+    # log desligado, com outra lista ou com eventos ainda pendentes, o
+    # offset não seria válido.
+    registros = estado['registros']
+    if (not estado['alterado'] or estado['indice'] is None or not lista_sincronizada(registros)
+            or eventos_pendentes(registros)):
+        return
+    estado['indice']['offset'] = tamanho_log_eventos()
+    salvar_indice_descricoes(estado['indice'], estado['arquivo'])
+    estado['alterado'] = False
+
+
+def _carregar_indice(registros: list[dict], estado: dict) -> dict:
+    indice = None
+    if lista_sincronizada(registros):
+        indice = carregar_indice_descricoes(estado['arquivo'])
+    if indice is None or not offset_confere(indice['offset']):
+        # Sem log, com um log mais curto que o índice ou com o arquivo de
+        # registros regravado fora do log, não há como saber o que mudou
+        # desde que o índice foi salvo: ele é refeito.
+        estado['alterado'] = True
+        indice = novo_indice()
+        for registro in registros:
+            indexar_registro(indice, registro)
+        return indice
+
+    pendentes = eventos_pendentes(registros)
+    estado['alterado'] = bool(atualizar_indice_descricoes(indice) or pendentes)
+    for evento in pendentes:
+        aplicar_evento(indice, evento)
+    return indice
+
+
+def obter_indice_descricoes(registros: list[dict], arquivo_indice: str | None = None) -> dict | None:
+    '''
+    Retorna o índice de descrições dos registros, mantido em memória.
+
+    Na primeira chamada o índice é lido do disco e posto em dia com os
+    eventos gravados desde então e com os ainda pendentes; se o log de
+    eventos estiver desligado, se o arquivo não existir ou se o arquivo de
+    registros foi regravado fora do log (ver offset_confere), ele é
+    construído a partir dos registros. Depois disso, cada registro criado, alterado ou
+    removido da ListaRegistros atualiza o índice na memória, e o arquivo só
+    é regravado quando os registros são salvos e o índice mudou.
+
+    O índice usa o 'id' como chave. Se houver registros sem 'id' ou com
+    'id' repetido (como o 'id' 0 do formato antigo), a função retorna None.
+
+    Args:
+        registros (list[dict]):
+            Lista de registros financeiros.
+        arquivo_indice (str | None):
+            Arquivo do índice. Padrão: ARQUIVO_INDICE junto ao log de eventos.
+
+    Returns:
+        dict | None:
+            Índice invertido, ou None se os 'id' não forem únicos.
+    '''
+    estado = manter_derivado(registros, 'indice_descricoes', lambda lista: _novo_estado(lista, arquivo_indice),
+                             _atualizar_estado, _persistir_estado)
+    if estado['ids'] is None:
+        estado['ids'] = Counter()
+        estado['repetidos'] = 0
+        for registro in registros:
+            _contar_id(estado, registro, 1)
+    if estado['repetidos']:
+        return None
+    if estado['indice'] is None:
+        estado['indice'] = _carregar_indice(registros, estado)
+        _persistir_estado(estado)
+    return estado['indice']
+
+
+def _indice_por_posicao(registros: list[dict]) -> dict:
+    indice = novo_indice()
+    for posicao, registro in enumerate(registros):
+        indexar_registro(indice, registro, str(posicao))
+    return indice
+
+
+def _registros_por_id(registros: list[dict]) -> dict:
+    return {registro['id']: registro for registro in registros}
+
+
+def buscar_registros_por_descricao(registros: list[dict], consulta: str, limite: int = 20,
+                                   arquivo_indice: str | None = None) -> list[dict]:
+    '''
+    Busca registros pela descrição usando o índice mantido junto aos registros.
+
+    O índice fica em memória (ver obter_indice_descricoes), então buscas
+    seguidas não leem nem gravam o arquivo. Se os 'id' dos registros não
+    forem únicos, a busca usa um índice temporário pela posição de cada
+    registro na lista, refeito apenas quando a lista muda.
+
+    Args:
+        registros (list[dict]):
+            Lista de registros financeiros.
+        consulta (str):
+            Texto da busca.
+        limite (int):
+            Quantidade máxima de resultados.
+        arquivo_indice (str | None):
+            Arquivo do índice. Padrão: ARQUIVO_INDICE junto ao log de eventos.
+
+    Returns:
+        list[dict]:
+            Registros encontrados, do mais relevante ao menos.
+    '''
+    indice = obter_indice_descricoes(registros, arquivo_indice)
+    if indice is None:
+        indice = consultar_cache(registros, 'indice_descricoes', (), lambda: _indice_por_posicao(registros))
+        return [registros[posicao] for posicao, _ in buscar_descricoes(indice, consulta, limite)]
+
+    por_id = consultar_cache(registros, 'registros_por_id', (), lambda: _registros_por_id(registros))
+    return [por_id[id_registro] for id_registro, _ in buscar_descricoes(indice, consulta, limite)
+            if id_registro in por_id]
@@ -1,5 +1,10 @@
 import csv
 import json
+import os
+
+from src.cache_consultas import ListaRegistros
+from src.eventos import salvamento_confere
+from utilitarios.centavos import SUFIXO_CENTAVOS, registro_de_centavos
 
 
 def ler_registros(arquivo: str) -> list[dict]:
@@ -9,22 +14,30 @@ def ler_registros(arquivo: str) -> list[dict]:
 
     Essa função tenta abrir os registros a partir de um arquivo JSON.
     Se o arquivo não for encontrado, ela retorna uma lista vazia e exibe uma mensagem de erro.
+    Registros gravados em centavos são convertidos de volta para reais, e o
+    atributo centavos da lista indica esse formato para salvar_registros.
+    Os atributos origem e sincronizada indicam o arquivo lido e se ele
+    conferia com o último salvamento registrado no log (ver salvamento_confere).
+    A lista retornada é uma ListaRegistros, que acompanha a própria versão para o cache de consultas.
 
     Args:
         arquivo (str): 
             O caminho do arquivo a ser lido.
 
     Returns:
-        list[Dict]: 
+        ListaRegistros: 
             Retorna uma lista de dicionários com os registros financeiros.
      '''
     
     try:
         with open(arquivo, 'r') as f:
-            registros = json.load(f)
+            dados = json.load(f)
+        registros = ListaRegistros(registro_de_centavos(registro) for registro in dados)
+        registros.centavos = any('valor' + SUFIXO_CENTAVOS in registro for registro in dados)
+        registros.sincronizada = salvamento_confere(arquivo)
     except FileNotFoundError:
         print('Ainda não há nenhum registro')
-        registros = []  # Cria uma lista vazia se o arquivo não existir
-
+        registros = ListaRegistros()  # Cria uma lista vazia se o arquivo não existir
+    registros.origem = os.path.abspath(arquivo)
 
     return registros
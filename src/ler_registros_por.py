@@ -1,14 +1,73 @@
 import csv
 import json
+from src.cache_consultas import consultar_cache
+from src.consultar_registros import consultar_registros
+from src.indice_categorias import filtrar_por_categorias
+from src.indice_descricoes import buscar_registros_por_descricao
 from utilitarios.entrada_data import validar_data
-from utilitarios.validacao import validar_tipo, validar_valor
+from utilitarios.validacao import validar_categorias, validar_tipo, validar_valor
+
+
+def _atende(registro: dict, criterio: str, valor) -> bool:
+    if criterio == 'valor':
+        return abs(registro['valor']) == valor
+    return registro[criterio] == valor
+
+
+def filtrar_registros(registros: list[dict], criterio: str, valor) -> list[dict]:
+    '''
+    Filtra os registros pelo critério informado, reaproveitando consultas em cache.
+
+    Args:
+        registros (list[dict]):
+            Todos os registros.
+        criterio (str):
+            Campo usado no filtro: 'data', 'tipo' ou 'valor'.
+        valor:
+            Valor procurado. Para 'valor' é comparado o valor absoluto do registro.
+
+    Returns:
+        list[dict]:
+            Registros que atendem ao critério.
+    '''
+    chave = tuple(sorted(valor.items())) if isinstance(valor, dict) else valor
+
+    def calcular() -> list[dict]:
+        return [registro for registro in registros if _atende(registro, criterio, valor)]
+
+    return list(consultar_cache(registros, 'filtrar', (criterio, chave), calcular))
+
+def _confirmar(msg: str) -> bool:
+    return input(f'{msg} (s/n): ').strip().lower() == 's'
+
+
+def _criterios_combinados() -> dict:
+    criterios = {}
+    if _confirmar('Filtrar por período?'):
+        criterios['data_inicio'] = validar_data('Data inicial')
+        criterios['data_fim'] = validar_data('Data final')
+    if _confirmar('Filtrar por tipo?'):
+        criterios['tipo'] = validar_tipo('Digite o tipo que deseja filtrar. [Receita, Despesa, Investimento]: ')
+    if _confirmar('Filtrar por faixa de valor?'):
+        criterios['valor_min'] = validar_valor('Valor mínimo: ')
+        criterios['valor_max'] = validar_valor('Valor máximo: ')
+    if _confirmar('Ordenar resultado?'):
+        while (ordem := input('Ordenar por (data ou valor): ').strip().lower()) not in ('data', 'valor'):
+            print('Escolha data ou valor')
+        criterios['ordenar_por'] = ordem
+        criterios['decrescente'] = _confirmar('Do maior para o menor?')
+    limite = input('Quantidade máxima de registros (em branco para todos): ').strip()
+    if limite.isdigit():
+        criterios['limite'] = int(limite)
+    return criterios
+
 
 def ler_registros_por(arquivo: list[dict]) -> list[dict]:
     
     '''
      Recebe todos os registros e realiza filtros de acordo com os critérios escolhidos.
 
-    Filtra por Data, Tipo ou Valor.
+    Filtra por Data, Tipo, Valor, Categorias, Descrição ou por uma combinação de período, tipo e faixa de valor.
 
     Args:
         list[Dict]: 
@@ -25,30 +84,36 @@ def ler_registros_por(arquivo: list[dict]) -> list[dict]:
         print("1. Por Data")
         print("2. Por Tipo")
         print("3. Por valor")
+        print("4. Consulta combinada")
+        print("5. Por categorias")
+        print("6. Por descrição")
         print("9. Todos")
 
         opcao = input("Escolha uma opção: ")
 
         if opcao == '1':
             nova_data = validar_data('Data pela qual deseja filtrar: ')
-            registros_filtrados = []
-            for registro in registros:
-                if registro['data'] == nova_data:
-                    registros_filtrados.append(registro)
+            registros_filtrados = filtrar_registros(registros, 'data', nova_data)
             break
         if opcao == '2':
             tipo = validar_tipo('Digite o tipo que deseja filtrar. [Receita, Despesa, Investimento]: ')
-            registros_filtrados = []
-            for registro in registros:
-                if registro['tipo'] == tipo:
-                    registros_filtrados.append(registro)
+            registros_filtrados = filtrar_registros(registros, 'tipo', tipo)
             break
         if opcao == '3':
             novo_valor = validar_valor("Digite o valor pelo qual filtrar: ")
-            registros_filtrados = []
-            for registro in registros:
-                if abs(registro['valor']) == novo_valor:
-                    registros_filtrados.append(registro)
+            registros_filtrados = filtrar_registros(registros, 'valor', novo_valor)
+            break
+        if opcao == '4':
+            registros_filtrados = list(consultar_registros(registros, **_criterios_combinados()))
+            break
+        if opcao == '5':
+            todas = validar_categorias('Categorias que o registro deve ter todas (separadas por vírgula): ')
+            alguma = validar_categorias('Categorias das quais deve ter ao menos uma (separadas por vírgula): ')
+            registros_filtrados = filtrar_por_categorias(registros, todas, alguma)
+            break
+        if opcao == '6':
+            consulta = input('Palavras da descrição (ou início delas): ')
+            registros_filtrados = buscar_registros_por_descricao(registros, consulta)
             break
         if opcao == '9':
             registros_filtrados = registros
@@ -0,0 +1,216 @@
+import argparse
+import json
+import os
+from datetime import datetime
+
+from src.atualizar_rendimento import atualiza_rendimento
+from utilitarios.centavos import registro_de_centavos, registro_para_centavos
+from utilitarios.entrada_data import montar_data
+from utilitarios.iterar_json import TAMANHO_BLOCO, iterar_json
+from utilitarios.validacao import MOEDA_PADRAO, normalizar_categorias
+
+VERSAO_ATUAL = 2
+TIPOS_VALIDOS = ('Receita', 'Despesa', 'Investimento')
+FORMATOS_DATA = ('%d/%m/%Y', '%Y-%m-%d', '%d-%m-%Y')
+
+
+def detectar_versao(registro: dict) -> int:
+    '''
+    Detecta a versão do esquema de um registro.
+
+    Versão 0: formato antigo de projeto.py, com 'data' em texto.
+    Versão 1: 'data' como dicionário, sem 'id'.
+    Versão 2: formato atual, com 'data' como dicionário e 'id' inteiro.
+
+    Args:
+        registro (dict):
+            Registro lido do arquivo.
+
+    Returns:
+        int:
+            Versão do esquema do registro.
+    '''
+    if not isinstance(registro.get('data'), dict):
+        return 0
+    if not isinstance(registro.get('id'), int):
+        return 1
+    return VERSAO_ATUAL
+
+
+def _converter_data(data) -> dict:
+    if isinstance(data, dict):
+        data = data.get('data_completa')
+    if not isinstance(data, str):
+        raise ValueError('data ausente')
+    for formato in FORMATOS_DATA:
+        try:
+            return montar_data(datetime.strptime(data.strip(), formato))
+        except ValueError:
+            continue
+    raise ValueError(f'data inválida: {data!r}')
+
+
+def normalizar_registro(registro: dict) -> dict:
+    '''
+    Converte um registro de qualquer versão para o formato atual, exceto o 'id'.
+
+    A data é convertida para o dicionário de montar_data, a moeda para
+    maiúsculas e as categorias são normalizadas com normalizar_categorias.
+    Registros sem 'descricao' recebem uma descrição vazia.
+
+    Montante e rendimento não são copiados do registro antigo: eles são
+    recalculados com atualiza_rendimento a partir do valor e da data.
+
+    Args:
+        registro (dict):
+            Registro lido do arquivo.
+
+    Returns:
+        dict:
+            Registro normalizado.
+
+    Raises:
+        ValueError: Se a data, o tipo ou o valor do registro forem inválidos.
+    '''
+    if not isinstance(registro, dict):
+        raise ValueError('registro não é um objeto JSON')
+
+    data = _converter_data(registro.get('data'))
+
+    tipo = str(registro.get('tipo', '')).capitalize()
+    if tipo not in TIPOS_VALIDOS:
+        raise ValueError(f'tipo inválido: {registro.get("tipo")!r}')
+
+    try:
+        valor = float(registro['valor'])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f'valor inválido: {registro.get("valor")!r}')
+
+    normalizado = dict(registro)
+    normalizado.update({
+        'data': data,
+        'tipo': tipo,
+        'valor': -abs(valor) if tipo == 'Despesa' else abs(valor),
+        'moeda': str(registro.get('moeda') or MOEDA_PADRAO).upper(),
+        'categorias': normalizar_categorias(registro.get('categorias')),
+        'descricao': str(registro.get('descricao') or ''),
+        'montante': None,
+        'rendimento': None,
+        'data_atualizacao': registro.get('data_atualizacao')
+    })
+    try:
+        atualiza_rendimento([normalizado])
+    except OverflowError:
+        raise ValueError(f'data muito antiga para calcular o rendimento: {data["data_completa"]}')
+    return normalizado
+
+
+def _progresso_padrao(bytes_lidos: int, total_bytes: int, migrados: int, quarentena: int) -> None:
+    percentual = bytes_lidos / total_bytes * 100 if total_bytes else 100
+    print(f'{percentual:5.1f}% - {migrados} migrados, {quarentena} em quarentena')
+
+
+def migrar_registros(entrada: str, saida: str | None = None, quarentena: str | None = None,
+                     tamanho_bloco: int = TAMANHO_BLOCO, progresso=_progresso_padrao,
+                     centavos: bool = False) -> dict:
+    '''
+    Migra um arquivo de registros para o formato atual, em fluxo e com memória constante.
+
+    O arquivo de entrada é lido em blocos e cada registro é normalizado e
+    gravado assim que lido. Registros com 'id' único e crescente são mantidos;
+    os demais (como o 'id' 0 fixo do formato antigo) recebem um novo 'id'.
+    Registros inválidos são gravados no arquivo de quarentena (um JSON por
+    linha, com o motivo) e não vão para a saída. Registros gravados em
+    centavos são lidos normalmente, e a saída usa o formato escolhido.
+
+    Args:
+        entrada (str):
+            Arquivo JSON com os registros a migrar.
+        saida (str | None):
+            Arquivo de saída. Se None, a entrada é substituída ao final.
+        quarentena (str | None):
+            Arquivo para os registros inválidos. Padrão: '<entrada>.quarentena.jsonl'.
+        tamanho_bloco (int):
+            Quantidade de bytes lidos por vez.
+        progresso (Callable | None):
+            Função chamada a cada ponto percentual processado com
+            (bytes_processados, total_bytes, migrados, em_quarentena).
+        centavos (bool):
+            Se True, grava os campos monetários como inteiros em centavos
+            (ver salvar_registros).
+
+    Returns:
+        dict:
+            Resumo com as chaves 'migrados', 'quarentena' e 'por_versao'.
+    '''
+    destino = saida or entrada
+    temporario = destino + '.tmp'
+    quarentena = quarentena or entrada + '.quarentena.jsonl'
+    total_bytes = os.path.getsize(entrada)
+
+    resumo = {'migrados': 0, 'quarentena': 0, 'por_versao': {}}
+    proximo_id = 0
+    ultimo_percentual = 0
+    bytes_lidos = 0
+
+    def relatar(bytes_processados: int) -> None:
+        nonlocal ultimo_percentual
+        percentual = bytes_processados * 100 // total_bytes if total_bytes else 100
+        if progresso and percentual != ultimo_percentual:
+            ultimo_percentual = percentual
+            progresso(bytes_processados, total_bytes, resumo['migrados'], resumo['quarentena'])
+
+    def informar(lidos: int) -> None:
+        # Chamada ao ler um bloco novo: os registros dos blocos anteriores já
+        # foram processados, então o progresso relatado é o deles.
+        nonlocal bytes_lidos
+        relatar(bytes_lidos)
+        bytes_lidos = lidos
+
+    try:
+        with open(temporario, 'w', encoding='utf-8') as f_saida, \
+                open(quarentena, 'w', encoding='utf-8') as f_quarentena:
+            f_saida.write('[')
+            for posicao, registro in enumerate(iterar_json(entrada, tamanho_bloco, informar)):
+                try:
+                    registro = registro_de_centavos(registro) if isinstance(registro, dict) else registro
+                    versao = detectar_versao(registro)
+                    normalizado = normalizar_registro(registro)
+                except (AttributeError, ValueError) as e:
+                    f_quarentena.write(json.dumps({'posicao': posicao, 'motivo': str(e), 'registro': registro},
+                                                  ensure_ascii=False) + '\n')
+                    resumo['quarentena'] += 1
+                    continue
+
+                if versao == VERSAO_ATUAL and normalizado['id'] >= proximo_id:
+                    proximo_id = normalizado['id']
+                else:
+                    normalizado['id'] = proximo_id
+                proximo_id += 1
+
+                texto = json.dumps(registro_para_centavos(normalizado) if centavos else normalizado, indent=4).replace('\n', '\n    ')
+                f_saida.write((',\n    ' if resumo['migrados'] else '\n    ') + texto)
+                resumo['migrados'] += 1
+                resumo['por_versao'][versao] = resumo['por_versao'].get(versao, 0) + 1
+            f_saida.write('\n]' if resumo['migrados'] else ']')
+        relatar(total_bytes)
+        os.replace(temporario, destino)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+    if not resumo['quarentena']:
+        os.remove(quarentena)
+    return resumo
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Migra um arquivo de registros para o formato atual.')
+    parser.add_argument('entrada', help='arquivo JSON de registros')
+    parser.add_argument('saida', nargs='?', help='arquivo de saída (padrão: substitui a entrada)')
+    parser.add_argument('--quarentena', help='arquivo para os registros inválidos')
+    parser.add_argument('--centavos', action='store_true', help='grava os valores como inteiros em centavos')
+    args = parser.parse_args()
+
+    resumo = migrar_registros(args.entrada, args.saida, args.quarentena, centavos=args.centavos)
+    print(f"Migração concluída: {resumo['migrados']} registros migrados, "
+          f"{resumo['quarentena']} em quarentena.")
@@ -0,0 +1,507 @@
+import json
+import os
+from datetime import datetime
+
+from src.cache_consultas import ListaRegistros, eventos_pendentes, manter_derivado
+from src.cotacoes import ARQUIVO_COTACOES, carregar_cotacoes, converter_registros
+from src.eventos import caminho_junto_ao_log, ler_eventos, lista_sincronizada, offset_confere, tamanho_log_eventos
+from utilitarios.centavos import de_centavos, para_centavos
+from utilitarios.relogio import agora
+from utilitarios.validacao import MOEDA_PADRAO, validar_moeda, validar_tipo, validar_valor
+
+ARQUIVO_ORCAMENTOS = 'orcamentos.json'
+ARQUIVO_TOTAIS = 'totais_orcamentos.json'
+LIMIARES_PADRAO = (0.8, 1.0)
+TODO_MES = '*'
+TAMANHO_LOTE = 50
+
+
+def ler_orcamentos(arquivo: str | None = None) -> list[dict]:
+    '''
+    Lê os orçamentos de um arquivo JSON.
+
+    Args:
+        arquivo (str | None):
+            Arquivo dos orçamentos. Padrão: ARQUIVO_ORCAMENTOS junto ao log de eventos.
+
+    Returns:
+        list[dict]:
+            Orçamentos cadastrados, ou uma lista vazia se o arquivo não existir.
+    '''
+    arquivo = arquivo or caminho_junto_ao_log(ARQUIVO_ORCAMENTOS)
+    try:
+        with open(arquivo, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def salvar_orcamentos(orcamentos: list[dict], arquivo: str | None = None) -> None:
+    '''
+    Salva os orçamentos em um arquivo JSON.
+
+    Args:
+        orcamentos (list[dict]):
+            Orçamentos cadastrados.
+        arquivo (str | None):
+            Arquivo dos orçamentos. Padrão: ARQUIVO_ORCAMENTOS junto ao log de eventos.
+    '''
+    arquivo = arquivo or caminho_junto_ao_log(ARQUIVO_ORCAMENTOS)
+    with open(arquivo, 'w', encoding='utf-8') as f:
+        json.dump(orcamentos, f, indent=4, ensure_ascii=False)
+
+
+def _chave(mes: str, tipo: str, moeda: str, categoria: str | None) -> str:
+    return f"{mes}|{tipo}|{moeda}|{categoria or ''}"
+
+
+def _chaves_registro(registro: dict, moeda: str) -> list[str]:
+    data = registro.get('data')
+    if not isinstance(data, dict):
+        return []
+    mes = f"{data['mes']}/{data['ano']}"
+    return [_chave(mes, registro['tipo'], moeda, categoria)
+            for categoria in [None, *(registro.get('categorias') or [])]]
+
+
+def _valores_registro(estado: dict, registro: dict) -> dict:
+    # Valor absoluto do registro em centavos, convertido para cada moeda de
+    # orçamento. Moedas sem cotação até a data do registro ficam de fora.
+    moeda = registro.get('moeda') or MOEDA_PADRAO
+    valores = {}
+    for destino in estado['moedas']:
+        if destino == moeda:
+            valores[destino] = abs(para_centavos(registro['valor']))
+            continue
+        try:
+            convertido = converter_registros([registro], destino, estado['_tabelas'])[0]
+        except ValueError:
+            continue
+        valores[destino] = abs(para_centavos(convertido['valor']))
+    return valores
+
+
+def _somar(estado: dict, registro: dict, sinal: int) -> None:
+    totais = estado['totais']
+    for moeda, centavos in _valores_registro(estado, registro).items():
+        for chave in _chaves_registro(registro, moeda):
+            total = totais.get(chave, 0) + sinal * centavos
+            if total:
+                totais[chave] = total
+            else:
+                totais.pop(chave, None)
+
+
+def _modificacao_cotacoes() -> float | None:
+    try:
+        return os.path.getmtime(caminho_junto_ao_log(ARQUIVO_COTACOES))
+    except OSError:
+        return None
+
+
+def construir_totais_orcamentos(registros: list[dict], moedas: list[str] | None = None,
+                                tabelas: dict | None = None) -> dict:
+    '''
+    Calcula os totais acumulados usados pelos orçamentos e os posiciona no fim do log.
+
+    Há um total por (mês, tipo, moeda) e um por (mês, tipo, moeda,
+    categoria), com a soma dos valores absolutos em centavos. Os registros
+    entram no total de cada moeda de orçamento: os de outra moeda são
+    convertidos pela cotação do dia do registro (ver converter_registros) e
+    os que não têm cotação até essa data ficam de fora.
+
+    Args:
+        registros (list[dict]):
+            Lista de registros financeiros.
+        moedas (list[str] | None):
+            Moedas dos orçamentos. Padrão: apenas MOEDA_PADRAO.
+        tabelas (dict | None):
+            Tabelas de cotação. Padrão: as de carregar_cotacoes().
+
+    Returns:
+        dict:
+            Estado com as chaves 'offset' (posição no log de eventos),
+            'moedas', 'cotacoes' (data de modificação do arquivo de
+            cotações usado) e 'totais'.
+    '''
+    estado = {'offset': tamanho_log_eventos(), 'moedas': sorted(moedas or [MOEDA_PADRAO]),
+              'cotacoes': _modificacao_cotacoes(), 'totais': {},
+              '_tabelas': tabelas if tabelas is not None else carregar_cotacoes()}
+    for registro in registros:
+        _somar(estado, registro, 1)
+    return estado
+
+
+def aplicar_evento_orcamentos(estado: dict, evento: dict) -> None:
+    '''
+    Atualiza os totais acumulados com um evento do log de alterações.
+
+    Cada evento altera apenas os totais do mês, tipo e categorias do
+    registro, sem percorrer os demais registros.
+
+    Args:
+        estado (dict):
+            Estado gerado por construir_totais_orcamentos.
+        evento (dict):
+            Evento lido com ler_eventos.
+    '''
+    operacao = evento['operacao']
+    if operacao == 'criar':
+        _somar(estado, evento['registro'], 1)
+    elif operacao == 'atualizar':
+        _somar(estado, evento.get('anterior') or evento['registro'], -1)
+        _somar(estado, evento['registro'], 1)
+    elif operacao == 'deletar':
+        _somar(estado, evento['registro'], -1)
+
+
+def indexar_orcamentos(orcamentos: list[dict]) -> dict:
+    '''
+    Agrupa os orçamentos pela chave dos totais que eles acompanham.
+
+    Args:
+        orcamentos (list[dict]):
+            Orçamentos cadastrados.
+
+    Returns:
+        dict:
+            Dicionário chave -> lista de orçamentos. Orçamentos válidos para
+            todos os meses usam TODO_MES no lugar do mês.
+    '''
+    indice = {}
+    for orcamento in orcamentos:
+        chave = _chave(orcamento.get('mes') or TODO_MES, orcamento['tipo'],
+                       orcamento.get('moeda') or MOEDA_PADRAO, orcamento.get('categoria'))
+        indice.setdefault(chave, []).append(orcamento)
+    return indice
+
+
+def _orcamentos_da_chave(indice: dict, chave: str) -> list[dict]:
+    _, resto = chave.split('|', 1)
+    return indice.get(chave, []) + indice.get(f'{TODO_MES}|{resto}', [])
+
+
+def aplicar_evento_com_alertas(estado: dict, indice: dict, evento: dict) -> list[dict]:
+    '''
+    Aplica um evento aos totais e retorna os alertas dos limites ultrapassados.
+
+    Apenas os totais tocados pelo registro do evento são consultados, e os
+    orçamentos de cada total vêm do índice, então o custo não depende da
+    quantidade de registros nem de orçamentos. Um alerta é gerado quando o
+    total passa de abaixo para acima (ou igual) de um dos limiares; se a
+    mesma alteração passar de vários, apenas o maior é informado. Se o
+    registro não puder ser convertido para a moeda de um orçamento que o
+    acompanharia, é gerado um alerta com a chave 'sem_cotacao'.
+
+    Args:
+        estado (dict):
+            Estado gerado por construir_totais_orcamentos.
+        indice (dict):
+            Orçamentos agrupados por indexar_orcamentos.
+        evento (dict):
+            Evento lido com ler_eventos.
+
+    Returns:
+        list[dict]:
+            Alertas com as chaves 'orcamento', 'mes', 'limiar', 'total' e
+            'limite', ou 'orcamento', 'mes' e 'sem_cotacao' (moeda do registro).
+    '''
+    alertas = []
+    chaves = []
+    if evento['operacao'] in ('criar', 'atualizar'):
+        registro = evento['registro']
+        valores = _valores_registro(estado, registro)
+        for moeda in estado['moedas']:
+            if moeda in valores:
+                chaves.extend(_chaves_registro(registro, moeda))
+                continue
+            for chave in _chaves_registro(registro, moeda):
+                for orcamento in _orcamentos_da_chave(indice, chave):
+                    alertas.append({'orcamento': orcamento, 'mes': chave.split('|', 1)[0],
+                                    'sem_cotacao': registro.get('moeda') or MOEDA_PADRAO})
+    antes = {chave: estado['totais'].get(chave, 0) for chave in chaves}
+    aplicar_evento_orcamentos(estado, evento)
+
+    for chave in chaves:
+        depois = estado['totais'].get(chave, 0)
+        if depois <= antes[chave]:
+            continue
+        for orcamento in _orcamentos_da_chave(indice, chave):
+            limite = para_centavos(orcamento['limite'])
+            cruzados = [limiar for limiar in orcamento.get('limiares') or LIMIARES_PADRAO
+                        if antes[chave] < limite * limiar <= depois]
+            if cruzados:
+                alertas.append({'orcamento': orcamento, 'mes': chave.split('|', 1)[0], 'limiar': max(cruzados),
+                                'total': de_centavos(depois), 'limite': orcamento['limite']})
+    return alertas
+
+
+def carregar_totais_orcamentos(arquivo: str | None = None) -> dict | None:
+    '''
+    Lê os totais acumulados salvos em disco.
+
+    Args:
+        arquivo (str | None):
+            Arquivo dos totais. Padrão: ARQUIVO_TOTAIS junto ao log de eventos.
+
+    Returns:
+        dict | None:
+            Estado lido, ou None se o arquivo não existir.
+    '''
+    arquivo = arquivo or caminho_junto_ao_log(ARQUIVO_TOTAIS)
+    try:
+        with open(arquivo, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def salvar_totais_orcamentos(estado: dict, arquivo: str | None = None) -> None:
+    '''
+    Grava os totais acumulados em disco.
+
+    Args:
+        estado (dict):
+            Estado gerado por construir_totais_orcamentos.
+        arquivo (str | None):
+            Arquivo dos totais. Padrão: ARQUIVO_TOTAIS junto ao log de eventos.
+    '''
+    arquivo = arquivo or caminho_junto_ao_log(ARQUIVO_TOTAIS)
+    dados = {chave: valor for chave, valor in estado.items() if not chave.startswith('_')}
+    temporario = arquivo + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(dados, f, ensure_ascii=False)
+    os.replace(temporario, arquivo)
+
+
+def _novo_acompanhamento(registros: list[dict], arquivo_totais: str | None) -> dict:
+    return {'registros': registros, 'arquivo': arquivo_totais, 'estado': None, 'indice': {}, 'alertas': [],
+            'alterados': 0}
+
+
+def _atualizar_acompanhamento(acompanhamento: dict, operacao: str, afetados: list[dict],
+                              anteriores: list[dict | None] | None) -> None:
+    if acompanhamento['estado'] is None:
+        return
+    if operacao == 'reconstruir':
+        acompanhamento['estado'] = None
+        return
+    if operacao not in ('criar', 'deletar', 'atualizar'):
+        return
+    for registro, anterior in zip(afetados, anteriores or [None] * len(afetados)):
+        evento = {'operacao': operacao, 'registro': registro}
+        if anterior is not None:
+            evento['anterior'] = anterior
+        acompanhamento['alertas'].extend(
+            aplicar_evento_com_alertas(acompanhamento['estado'], acompanhamento['indice'], evento))
+    acompanhamento['alterados'] += len(afetados)
+
+
+def _persistir_acompanhamento(acompanhamento: dict, minimo: int = TAMANHO_LOTE) -> None:
+    # O arquivo só vale para a lista do arquivo do log e sem eventos
+    # pendentes: o offset gravado precisa descrever exatamente o estado dos totais.
+    registros = acompanhamento['registros']
+    if (acompanhamento['estado'] is None or not acompanhamento['alterados']
+            or acompanhamento['alterados'] < minimo or not lista_sincronizada(registros)
+            or eventos_pendentes(registros)):
+        return
+    acompanhamento['estado']['offset'] = tamanho_log_eventos()
+    salvar_totais_orcamentos(acompanhamento['estado'], acompanhamento['arquivo'])
+    acompanhamento['alterados'] = 0
+
+
+def _carregar_estado(registros: list[dict], acompanhamento: dict, moedas: list[str], tabelas: dict) -> dict:
+    estado = carregar_totais_orcamentos(acompanhamento['arquivo']) if lista_sincronizada(registros) else None
+    if (estado is None or estado.get('moedas') != moedas or estado.get('cotacoes') != _modificacao_cotacoes()
+            or not offset_confere(estado['offset'])):
+        # Sem log, ou com o arquivo de registros regravado fora dele
+        # (migração, restauração de backup, edição manual), não há como
+        # saber o que mudou desde que os totais foram gravados; com outras
+        # moedas ou cotações, os valores mudam.
+        estado = construir_totais_orcamentos(registros, moedas, tabelas)
+        acompanhamento['alterados'] += 1
+        return estado
+
+    # Alterações gravadas por outra lista (ex.: pela interface em tela
+    # cheia) e as ainda pendentes geram alertas como as feitas aqui.
+    estado['_tabelas'] = tabelas
+    for evento in ler_eventos(estado['offset']):
+        acompanhamento['alertas'].extend(aplicar_evento_com_alertas(estado, acompanhamento['indice'], evento))
+        estado['offset'] = evento['proximo_offset']
+        acompanhamento['alterados'] += 1
+    for evento in eventos_pendentes(registros):
+        acompanhamento['alertas'].extend(aplicar_evento_com_alertas(estado, acompanhamento['indice'], evento))
+        acompanhamento['alterados'] += 1
+    return estado
+
+
+def _acompanhar(registros: list[dict], orcamentos: list[dict], arquivo_totais: str | None) -> dict:
+    acompanhamento = manter_derivado(registros, 'orcamentos',
+                                     lambda lista: _novo_acompanhamento(lista, arquivo_totais),
+                                     _atualizar_acompanhamento, _persistir_acompanhamento)
+    acompanhamento['indice'] = indexar_orcamentos(orcamentos)
+    moedas = sorted({orcamento.get('moeda') or MOEDA_PADRAO for orcamento in orcamentos}) or [MOEDA_PADRAO]
+    tabelas = carregar_cotacoes()
+    estado = acompanhamento['estado']
+    if estado is not None and (estado['moedas'] != moedas or estado['_tabelas'] is not tabelas):
+        acompanhamento['estado'] = construir_totais_orcamentos(registros, moedas, tabelas)
+        acompanhamento['alterados'] += 1
+    elif estado is None:
+        acompanhamento['estado'] = _carregar_estado(registros, acompanhamento, moedas, tabelas)
+        _persistir_acompanhamento(acompanhamento, minimo=1)
+    return acompanhamento
+
+
+def verificar_orcamentos(registros: list[dict], orcamentos: list[dict] | None = None,
+                         arquivo_totais: str | None = None) -> list[dict]:
+    '''
+    Retorna os alertas gerados pelas alterações desde a última verificação.
+
+    Os totais ficam em memória, junto à ListaRegistros (ver
+    manter_derivado), e cada registro criado, alterado ou removido atualiza
+    apenas os totais que toca e já calcula os seus alertas. Na primeira
+    chamada os totais são lidos do disco e postos em dia com o log de
+    eventos; se o log estiver desligado, se o arquivo não existir ou se o
+    arquivo de registros foi regravado fora do log (ver offset_confere),
+    são construídos a partir dos registros, sem gerar alertas. O arquivo é
+    regravado depois de um salvamento dos registros a cada TAMANHO_LOTE
+    alterações, e por gravar_totais_orcamentos.
+
+    Args:
+        registros (list[dict]):
+            Lista de registros financeiros.
+        orcamentos (list[dict] | None):
+            Orçamentos cadastrados. Padrão: os de ler_orcamentos().
+        arquivo_totais (str | None):
+            Arquivo dos totais. Padrão: ARQUIVO_TOTAIS junto ao log de eventos.
+
+    Returns:
+        list[dict]:
+            Alertas no formato de aplicar_evento_com_alertas.
+    '''
+    acompanhamento = _acompanhar(registros, ler_orcamentos() if orcamentos is None else orcamentos,
+                                 arquivo_totais)
+    alertas, acompanhamento['alertas'] = acompanhamento['alertas'], []
+    return alertas
+
+
+def gravar_totais_orcamentos(registros: list[dict]) -> None:
+    '''
+    Grava em disco os totais dos orçamentos mantidos em memória, se mudaram.
+
+    Deve ser chamada depois do último salvamento dos registros (ao sair do
+    programa), para que as alterações já avisadas não gerem alertas de novo
+    na próxima execução.
+
+    Args:
+        registros (list[dict]):
+            Lista de registros financeiros.
+    '''
+    acompanhamento = registros.derivados.get('orcamentos') if isinstance(registros, ListaRegistros) else None
+    if acompanhamento is not None:
+        _persistir_acompanhamento(acompanhamento, minimo=1)
+
+
+def formatar_alerta(alerta: dict) -> str:
+    '''
+    Monta a mensagem exibida ao usuário para um alerta de orçamento.
+
+    Args:
+        alerta (dict):
+            Alerta gerado por aplicar_evento_com_alertas.
+
+    Returns:
+        str:
+            Mensagem do alerta.
+    '''
+    orcamento = alerta['orcamento']
+    alvo = orcamento['tipo'] + (f" ({orcamento['categoria']})" if orcamento.get('categoria') else '')
+    moeda = orcamento.get('moeda') or MOEDA_PADRAO
+    if 'sem_cotacao' in alerta:
+        return (f"Atenção: registro em {alerta['sem_cotacao']} sem cotação para {moeda}; "
+                f"ele não entrou no orçamento de {alvo} em {alerta['mes']}")
+    if alerta['limiar'] >= 1:
+        situacao = 'ultrapassou o limite'
+    else:
+        situacao = f"atingiu {int(alerta['limiar'] * 100)}% do limite"
+    return (f"Atenção: {alvo} em {alerta['mes']} {situacao}: "
+            f"{alerta['total']} de {alerta['limite']} {moeda}")
+
+
+def criar_orcamento(orcamentos: list[dict]) -> dict:
+    '''
+    Cadastra um novo orçamento com interação do usuário.
+
+    Args:
+        orcamentos (list[dict]):
+            Orçamentos já cadastrados. O novo orçamento é acrescentado a esta lista.
+
+    Returns:
+        dict:
+            Orçamento criado, com as chaves 'tipo', 'categoria', 'mes',
+            'moeda', 'limite' e 'limiares'.
+    '''
+    tipo = validar_tipo('Digite o tipo do orçamento. [Receita, Despesa, Investimento]: ')
+    categoria = input('Categoria (em branco para todas): ').strip().lower() or None
+    while True:
+        mes = input('Mês (mm/aaaa, em branco para todos os meses): ').strip()
+        if not mes:
+            mes = None
+            break
+        try:
+            mes = datetime.strptime(mes, '%m/%Y').strftime('%m/%Y')
+            break
+        except ValueError:
+            print('Digite o mês e o ano de acordo com o exemplo: 05/2000')
+    moeda = validar_moeda()
+    limite = validar_valor('Limite: ')
+    while True:
+        aviso = input('Avisar a partir de quantos % do limite (em branco para 80): ').strip()
+        if not aviso:
+            limiares = list(LIMIARES_PADRAO)
+            break
+        if aviso.isdigit() and 0 < int(aviso) < 100:
+            limiares = [int(aviso) / 100, 1.0]
+            break
+        print('Digite um número inteiro entre 1 e 99')
+
+    orcamento = {'tipo': tipo, 'categoria': categoria, 'mes': mes, 'moeda': moeda,
+                 'limite': limite, 'limiares': limiares}
+    orcamentos.append(orcamento)
+    return orcamento
+
+
+def exibir_orcamentos(registros: list[dict], orcamentos: list[dict] | None = None,
+                      arquivo_totais: str | None = None) -> None:
+    '''
+    Exibe quanto de cada orçamento já foi usado no mês atual.
+
+    Registros em outra moeda entram convertidos para a moeda do orçamento
+    (ver construir_totais_orcamentos).
+
+    Args:
+        registros (list[dict]):
+            Lista de registros financeiros.
+        orcamentos (list[dict] | None):
+            Orçamentos cadastrados. Padrão: os de ler_orcamentos().
+        arquivo_totais (str | None):
+            Arquivo dos totais. Padrão: ARQUIVO_TOTAIS junto ao log de eventos.
+
+    Returns:
+        None:
+            Apenas imprime a situação dos orçamentos.
+    '''
+    orcamentos = ler_orcamentos() if orcamentos is None else orcamentos
+    if not orcamentos:
+        print('Nenhum orçamento cadastrado.')
+        return
+    totais = _acompanhar(registros, orcamentos, arquivo_totais)['estado']['totais']
+
+    mes_atual = agora().strftime('%m/%Y')
+    for orcamento in orcamentos:
+        mes = orcamento.get('mes') or mes_atual
+        moeda = orcamento.get('moeda') or MOEDA_PADRAO
+        total = de_centavos(totais.get(_chave(mes, orcamento['tipo'], moeda, orcamento.get('categoria')), 0))
+        alvo = orcamento['tipo'] + (f" ({orcamento['categoria']})" if orcamento.get('categoria') else '')
+        usado = total / orcamento['limite'] * 100 if orcamento['limite'] else 0
+        print(f"{alvo} em {mes}: {total} de {orcamento['limite']} {moeda} ({usado:.0f}%)")
@@ -0,0 +1,310 @@
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime
+
+from src.cache_consultas import manter_derivado
+from utilitarios.centavos import registro_de_centavos
+
+MANIFESTO = 'manifesto.json'
+PARTICAO_SEM_DATA = 'sem_data'
+
+
+def chave_particao(registro: dict) -> str:
+    '''
+    Retorna a chave da partição (AAAA-MM) de um registro.
+
+    A chave é montada a partir do dicionário 'data' gerado por validar_data.
+    Registros sem data no formato esperado vão para a partição 'sem_data'.
+
+    Args:
+        registro (dict):
+            Registro financeiro.
+
+    Returns:
+        str:
+            Chave da partição no formato 'AAAA-MM' ou 'sem_data'.
+    '''
+    data = registro.get('data')
+    if isinstance(data, dict) and data.get('ano') and data.get('mes'):
+        return f"{data['ano']}-{data['mes']}"
+    return PARTICAO_SEM_DATA
+
+
+def chave_mes(mes: str) -> str:
+    '''
+    Converte um mês no formato 'mm/aaaa' para a chave de partição 'AAAA-MM'.
+
+    Args:
+        mes (str):
+            Mês no formato 'mm/aaaa'.
+
+    Returns:
+        str:
+            Chave da partição correspondente.
+    '''
+    return datetime.strptime(mes, '%m/%Y').strftime('%Y-%m')
+
+
+def ler_manifesto(diretorio: str) -> dict:
+    '''
+    Lê o manifesto das partições de um diretório.
+
+    Args:
+        diretorio (str):
+            Diretório onde as partições estão armazenadas.
+
+    Returns:
+        dict:
+            Manifesto com as partições existentes. Se o diretório ainda não
+            tiver manifesto, retorna um manifesto vazio.
+    '''
+    try:
+        with open(os.path.join(diretorio, MANIFESTO), 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'versao': 1, 'particoes': {}}
+
+
+def _gravar_atomico(caminho: str, conteudo: bytes, compactar: bool = False) -> None:
+    temporario = caminho + '.tmp'
+    abrir = gzip.open if compactar else open
+    with abrir(temporario, 'wb') as f:
+        f.write(conteudo)
+    os.replace(temporario, caminho)
+
+
+def _salvar_manifesto(diretorio: str, manifesto: dict) -> None:
+    conteudo = json.dumps(manifesto, indent=4).encode('utf-8')
+    _gravar_atomico(os.path.join(diretorio, MANIFESTO), conteudo)
+
+
+def _agrupar_por_particao(registros: list[dict]) -> dict:
+    agrupados = {}
+    for registro in registros:
+        agrupados.setdefault(chave_particao(registro), []).append(registro)
+    return agrupados
+
+
+def _retirar_da_particao(meses: dict, chave: str, registro: dict) -> None:
+    lista = meses.get(chave, [])
+    for posicao, item in enumerate(lista):
+        if item is registro:
+            del lista[posicao]
+            break
+    if not lista:
+        meses.pop(chave, None)
+
+
+def _atualizar_particoes(estado: dict, operacao: str, registros: list[dict],
+                         anteriores: list[dict | None] | None) -> None:
+    # estado['sujas']: diretório -> meses alterados desde o último salvamento
+    # nele, ou None quando não há como saber e todas as partições são
+    # comparadas. estado['meses']: registros agrupados por partição, na
+    # ordem da lista, ou None quando precisam ser agrupados de novo.
+    for diretorio, sujas in estado['sujas'].items():
+        if sujas is None:
+            continue
+        if operacao == 'reconstruir':
+            estado['sujas'][diretorio] = None
+            continue
+        sujas.update(chave_particao(registro) for registro in registros)
+        sujas.update(chave_particao(anterior) for anterior in anteriores or [] if anterior is not None)
+
+    meses = estado['meses']
+    if meses is None:
+        return
+    if operacao in ('reconstruir', 'reordenar'):
+        estado['meses'] = None
+        return
+    for registro, anterior in zip(registros, anteriores or [None] * len(registros)):
+        chave = chave_particao(registro)
+        if operacao == 'criar':
+            meses.setdefault(chave, []).append(registro)
+        elif operacao == 'deletar':
+            _retirar_da_particao(meses, chave, registro)
+        elif anterior is not None and chave_particao(anterior) != chave:
+            _retirar_da_particao(meses, chave_particao(anterior), registro)
+            meses.setdefault(chave, []).append(registro)
+        elif anterior is None and operacao != 'rendimento':
+            # Atualização sem o registro anterior: a data pode ter mudado.
+            estado['meses'] = None
+            return
+
+
+def salvar_registros_particionado(registros: list[dict], diretorio: str) -> list[str]:
+    '''
+    Salva os registros em partições por ano/mês, regravando apenas as alteradas.
+
+    Com uma ListaRegistros, a lista avisa quais meses foram tocados (criar,
+    deletar, atualizar, rendimento) desde o último salvamento no mesmo
+    diretório, e só as partições desses meses são serializadas e gravadas.
+    Os registros ficam agrupados por mês junto à lista (ver manter_derivado),
+    então um salvamento percorre apenas os registros dos meses alterados.
+    No primeiro salvamento, com listas comuns ou depois de marcar_alteracao
+    sem detalhes, todas as partições são serializadas e comparadas com o
+    hash guardado no manifesto. Partições que ficaram vazias são removidas.
+    Uma partição compactada que sofre alteração volta a ser gravada sem
+    compactação.
+
+    Args:
+        registros (list[dict]):
+            Lista com todos os registros financeiros.
+        diretorio (str):
+            Diretório onde as partições serão armazenadas.
+
+    Returns:
+        list[str]:
+            Chaves das partições que foram gravadas ou removidas.
+    '''
+    os.makedirs(diretorio, exist_ok=True)
+    manifesto = ler_manifesto(diretorio)
+    particoes = manifesto['particoes']
+    estado = manter_derivado(registros, 'particoes', lambda _: {'meses': None, 'sujas': {}},
+                             _atualizar_particoes)
+    if estado['meses'] is None:
+        estado['meses'] = _agrupar_por_particao(registros)
+    destino = os.path.abspath(diretorio)
+    meses = estado['sujas'].get(destino)
+
+    if meses is None:
+        agrupados = estado['meses']
+    else:
+        agrupados = {chave: estado['meses'][chave] for chave in meses if chave in estado['meses']}
+
+    alteradas = []
+    for chave, lista in agrupados.items():
+        conteudo = json.dumps(lista, indent=4).encode('utf-8')
+        hash_conteudo = hashlib.sha256(conteudo).hexdigest()
+        atual = particoes.get(chave)
+        if atual and atual['hash'] == hash_conteudo:
+            continue
+
+        nome = f'{chave}.json'
+        _gravar_atomico(os.path.join(diretorio, nome), conteudo)
+        if atual and atual['arquivo'] != nome:
+            os.remove(os.path.join(diretorio, atual['arquivo']))
+        particoes[chave] = {
+            'arquivo': nome,
+            'hash': hash_conteudo,
+            'quantidade': len(lista),
+            'compactada': False
+        }
+        alteradas.append(chave)
+
+    vazias = particoes if meses is None else meses
+    for chave in [chave for chave in vazias if chave in particoes and chave not in agrupados]:
+        caminho = os.path.join(diretorio, particoes.pop(chave)['arquivo'])
+        if os.path.exists(caminho):
+            os.remove(caminho)
+        alteradas.append(chave)
+
+    if alteradas:
+        _salvar_manifesto(diretorio, manifesto)
+    estado['sujas'][destino] = set()
+    return alteradas
+
+
+def ler_particao(diretorio: str, chave: str, manifesto: dict | None = None) -> list[dict]:
+    '''
+    Lê os registros de uma única partição.
+
+    Registros gravados em centavos são convertidos de volta para reais,
+    como em ler_registros.
+
+    Args:
+        diretorio (str):
+            Diretório onde as partições estão armazenadas.
+        chave (str):
+            Chave da partição ('AAAA-MM' ou 'sem_data').
+        manifesto (dict | None):
+            Manifesto já carregado. Se não for informado, será lido do disco.
+
+    Returns:
+        list[dict]:
+            Registros da partição, ou uma lista vazia se ela não existir.
+    '''
+    if manifesto is None:
+        manifesto = ler_manifesto(diretorio)
+    particao = manifesto['particoes'].get(chave)
+    if particao is None:
+        return []
+
+    caminho = os.path.join(diretorio, particao['arquivo'])
+    abrir = gzip.open if particao['compactada'] else open
+    with abrir(caminho, 'rb') as f:
+        return [registro_de_centavos(registro) for registro in json.loads(f.read().decode('utf-8'))]
+
+
+def ler_registros_particionado(diretorio: str, inicio: str | None = None,
+                               fim: str | None = None) -> list[dict]:
+    '''
+    Lê os registros das partições, abrindo apenas as do intervalo pedido.
+
+    Args:
+        diretorio (str):
+            Diretório onde as partições estão armazenadas.
+        inicio (str | None):
+            Primeiro mês do intervalo no formato 'mm/aaaa'.
+        fim (str | None):
+            Último mês do intervalo no formato 'mm/aaaa'.
+
+    Returns:
+        list[dict]:
+            Registros das partições selecionadas. Registros sem data só são
+            retornados quando nenhum intervalo é informado.
+    '''
+    manifesto = ler_manifesto(diretorio)
+    chave_inicio = chave_mes(inicio) if inicio else None
+    chave_fim = chave_mes(fim) if fim else None
+    sem_intervalo = chave_inicio is None and chave_fim is None
+
+    registros = []
+    for chave in sorted(manifesto['particoes']):
+        if chave == PARTICAO_SEM_DATA:
+            if not sem_intervalo:
+                continue
+        elif (chave_inicio and chave < chave_inicio) or (chave_fim and chave > chave_fim):
+            continue
+        registros.extend(ler_particao(diretorio, chave, manifesto))
+    return registros
+
+
+def compactar_particoes(diretorio: str, antes_de: str) -> list[str]:
+    '''
+    Compacta com gzip as partições anteriores ao mês informado.
+
+    Partições antigas raramente mudam e podem ficar armazenadas compactadas.
+    Elas continuam sendo lidas normalmente por ler_particao.
+
+    Args:
+        diretorio (str):
+            Diretório onde as partições estão armazenadas.
+        antes_de (str):
+            Mês no formato 'mm/aaaa'. Partições anteriores a ele são compactadas.
+
+    Returns:
+        list[str]:
+            Chaves das partições compactadas.
+    '''
+    manifesto = ler_manifesto(diretorio)
+    limite = chave_mes(antes_de)
+
+    compactadas = []
+    for chave, particao in manifesto['particoes'].items():
+        if chave == PARTICAO_SEM_DATA or chave >= limite or particao['compactada']:
+            continue
+        caminho = os.path.join(diretorio, particao['arquivo'])
+        with open(caminho, 'rb') as f:
+            conteudo = f.read()
+        nome = f'{chave}.json.gz'
+        _gravar_atomico(os.path.join(diretorio, nome), conteudo, compactar=True)
+        os.remove(caminho)
+        particao['arquivo'] = nome
+        particao['compactada'] = True
+        compactadas.append(chave)
+
+    if compactadas:
+        _salvar_manifesto(diretorio, manifesto)
+    return compactadas
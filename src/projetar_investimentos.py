@@ -0,0 +1,149 @@
+from datetime import datetime
+
+from utilitarios.calcular_tempo import somar_meses
+from utilitarios.relogio import agora
+
+TAXA_JUROS = 0.01
+
+_tabelas_fatores = {}
+
+
+def fatores_crescimento(taxa: float, dias: int) -> list[float]:
+    '''
+    Retorna a tabela de fatores (1 + taxa) ** d para d de 0 até 'dias'.
+
+    As tabelas ficam em cache por taxa e só são estendidas quando um
+    horizonte maior é pedido, de modo que projeções seguidas reaproveitam
+    os fatores já calculados.
+
+    Args:
+        taxa (float):
+            Taxa de juros diária.
+        dias (int):
+            Maior quantidade de dias necessária.
+
+    Returns:
+        list[float]:
+            Tabela em que a posição d contém o fator de crescimento de d dias.
+    '''
+    tabela = _tabelas_fatores.setdefault(taxa, [])
+    base = 1 + taxa
+    for d in range(len(tabela), dias + 1):
+        try:
+            tabela.append(base ** d)
+        except OverflowError:
+            tabela.append(float('inf'))
+    return tabela
+
+
+def gerar_datas_futuras(meses: int, inicio: datetime | None = None, passo: int = 1) -> list[datetime]:
+    '''
+    Gera as datas de um horizonte de projeção mensal.
+
+    Args:
+        meses (int):
+            Quantidade de meses do horizonte (ex.: 360 para 30 anos).
+        inicio (datetime | None):
+            Data inicial. Padrão: hoje.
+        passo (int):
+            Intervalo em meses entre duas datas.
+
+    Returns:
+        list[datetime]:
+            Datas do horizonte, começando 'passo' meses após o início.
+    '''
+    inicio = inicio or agora()
+    return [somar_meses(inicio, m) for m in range(passo, meses + 1, passo)]
+
+
+def projetar_carteira(registros: list[dict], datas: list[datetime], taxa: float = TAXA_JUROS,
+                      por_investimento: bool = False) -> dict:
+    '''
+    Projeta o montante dos investimentos em várias datas futuras de uma só vez.
+
+    Usa a mesma fórmula de atualiza_rendimento (M = C * (1 + i) ** dias).
+    Os capitais são agrupados pela data de aplicação, então o valor total
+    da carteira em cada data custa uma multiplicação por data de aplicação
+    distinta, e não por investimento. Os fatores vêm da tabela em cache.
+
+    Args:
+        registros (list[dict]):
+            Lista de registros. Apenas os do tipo 'Investimento' são projetados.
+        datas (list[datetime]):
+            Datas em que o montante deve ser calculado.
+        taxa (float):
+            Taxa de juros diária.
+        por_investimento (bool):
+            Se True, inclui a matriz com o montante de cada investimento
+            (linhas) em cada data (colunas).
+
+    Returns:
+        dict:
+            Dicionário com as chaves 'datas', 'totais' (montante da carteira
+            em cada data) e, se pedido, 'ids' e 'matriz'.
+    '''
+    investimentos = []
+    capitais_por_aplicacao = {}
+    for registro in registros:
+        if registro['tipo'] != 'Investimento':
+            continue
+        aplicacao = datetime.strptime(registro['data']['data_completa'], '%d/%m/%Y').toordinal()
+        capital = float(registro['valor'])
+        investimentos.append((registro.get('id'), aplicacao, capital))
+        capitais_por_aplicacao[aplicacao] = capitais_por_aplicacao.get(aplicacao, 0) + capital
+
+    ordinais = [data.toordinal() for data in datas]
+    resultado = {'datas': [data.strftime('%d/%m/%Y') for data in datas], 'totais': []}
+    if not investimentos or not ordinais:
+        resultado['totais'] = [0.0] * len(ordinais)
+        if por_investimento:
+            resultado['ids'] = [id_registro for id_registro, _, _ in investimentos]
+            resultado['matriz'] = [[0.0] * len(ordinais) for _ in investimentos]
+        return resultado
+
+    primeira_aplicacao = min(capitais_por_aplicacao)
+    fatores = fatores_crescimento(taxa, max(0, max(ordinais) - primeira_aplicacao))
+
+    def fator(dias: int) -> float:
+        return fatores[dias] if dias >= 0 else 0.0
+
+    grupos = list(capitais_por_aplicacao.items())
+    resultado['totais'] = [
+        round(sum(capital * fator(ordinal - aplicacao) for aplicacao, capital in grupos), 2)
+        for ordinal in ordinais
+    ]
+
+    if por_investimento:
+        resultado['ids'] = [id_registro for id_registro, _, _ in investimentos]
+        resultado['matriz'] = [
+            [round(capital * fator(ordinal - aplicacao), 2) for ordinal in ordinais]
+            for _, aplicacao, capital in investimentos
+        ]
+    return resultado
+
+
+def exibir_projecao(registros: list[dict]) -> None:
+    '''
+    Solicita um horizonte em anos e exibe o montante projetado da carteira ano a ano.
+
+    Args:
+        registros (list[dict]):
+            Lista de registros financeiros.
+
+    Returns:
+        None:
+            Apenas imprime a projeção.
+    '''
+    while True:
+        try:
+            anos = int(input('Horizonte da projeção em anos: '))
+            if anos > 0:
+                break
+        except ValueError:
+            pass
+        print('Digite um número inteiro positivo')
+
+    datas = gerar_datas_futuras(anos * 12)
+    projecao = projetar_carteira(registros, datas)
+    for data, total in list(zip(projecao['datas'], projecao['totais']))[11::12]:
+        print(f'{data}: {total}')
@@ -0,0 +1,204 @@
+import json
+from datetime import datetime, timedelta
+
+from src.criar_registro import proximo_id
+from src.eventos import caminho_junto_ao_log
+from src.projetar_investimentos import TAXA_JUROS, fatores_crescimento
+from utilitarios.calcular_tempo import somar_meses
+from utilitarios.entrada_data import montar_data, validar_data
+from utilitarios.relogio import agora
+from utilitarios.validacao import (MOEDA_PADRAO, validar_categorias, validar_moeda, validar_tipo,
+                                   validar_valor)
+
+ARQUIVO_RECORRENCIAS = 'recorrencias.json'
+FREQUENCIAS = {'diaria': ('dias', 1), 'semanal': ('dias', 7), 'mensal': ('meses', 1), 'anual': ('meses', 12)}
+
+
+def ler_recorrencias(arquivo: str | None = None) -> list[dict]:
+    '''
+    Lê as regras de recorrência de um arquivo JSON.
+
+    Args:
+        arquivo (str | None):
+            Arquivo das regras. Padrão: ARQUIVO_RECORRENCIAS junto ao log de eventos.
+
+    Returns:
+        list[dict]:
+            Regras cadastradas, ou uma lista vazia se o arquivo não existir.
+    '''
+    arquivo = arquivo or caminho_junto_ao_log(ARQUIVO_RECORRENCIAS)
+    try:
+        with open(arquivo, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def salvar_recorrencias(regras: list[dict], arquivo: str | None = None) -> None:
+    '''
+    Salva as regras de recorrência em um arquivo JSON.
+
+    Args:
+        regras (list[dict]):
+            Regras de recorrência.
+        arquivo (str | None):
+            Arquivo das regras. Padrão: ARQUIVO_RECORRENCIAS junto ao log de eventos.
+    '''
+    arquivo = arquivo or caminho_junto_ao_log(ARQUIVO_RECORRENCIAS)
+    with open(arquivo, 'w', encoding='utf-8') as f:
+        json.dump(regras, f, indent=4, ensure_ascii=False)
+
+
+def ocorrencias(regra: dict, ate: datetime) -> list[datetime]:
+    '''
+    Calcula as datas da regra ainda não lançadas, até a data informada.
+
+    As datas são obtidas por aritmética a partir da data de início
+    (início + k * intervalo), sem percorrer o calendário dia a dia. Nas
+    regras mensais e anuais o dia do início é mantido; em meses mais curtos
+    é usado o último dia do mês.
+
+    Args:
+        regra (dict):
+            Regra com 'frequencia', 'inicio' e, opcionalmente, 'fim' e
+            'ultima_execucao' (datas em 'dd/mm/aaaa').
+        ate (datetime):
+            Última data a considerar.
+
+    Returns:
+        list[datetime]:
+            Datas das ocorrências pendentes, em ordem.
+    '''
+    unidade, passo = FREQUENCIAS[regra['frequencia']]
+    inicio = datetime.strptime(regra['inicio'], '%d/%m/%Y')
+    limite = ate
+    if regra.get('fim'):
+        limite = min(limite, datetime.strptime(regra['fim'], '%d/%m/%Y'))
+
+    desde = inicio
+    if regra.get('ultima_execucao'):
+        desde = max(inicio, datetime.strptime(regra['ultima_execucao'], '%d/%m/%Y') + timedelta(days=1))
+    if desde > limite:
+        return []
+
+    if unidade == 'dias':
+        primeiro = -(-(desde - inicio).days // passo)
+        ultimo = (limite - inicio).days // passo
+        return [inicio + timedelta(days=k * passo) for k in range(primeiro, ultimo + 1)]
+
+    meses_desde = (desde.year - inicio.year) * 12 + desde.month - inicio.month
+    primeiro = max(0, meses_desde // passo)
+    if somar_meses(inicio, primeiro * passo) < desde:
+        primeiro += 1
+    meses_limite = (limite.year - inicio.year) * 12 + limite.month - inicio.month
+    ultimo = meses_limite // passo
+    if ultimo >= 0 and somar_meses(inicio, ultimo * passo) > limite:
+        ultimo -= 1
+    return [somar_meses(inicio, k * passo) for k in range(primeiro, ultimo + 1)]
+
+
+def materializar_recorrencias(regras: list[dict], registros: list[dict],
+                              hoje: datetime | None = None) -> list[dict]:
+    '''
+    Lança de uma vez todas as ocorrências pendentes das regras de recorrência.
+
+    Os novos registros são montados em memória e acrescentados à lista com
+    uma única operação; com uma ListaRegistros, a versão é incrementada e os
+    eventos de criação são preparados em lote. Cada regra guarda a data da execução
+    em 'ultima_execucao', então chamar a função de novo não duplica registros.
+
+    Args:
+        regras (list[dict]):
+            Regras de recorrência. São alteradas com a nova 'ultima_execucao'.
+        registros (list[dict]):
+            Lista de registros onde os lançamentos serão acrescentados.
+        hoje (datetime | None):
+            Data até a qual as ocorrências são lançadas. Padrão: hoje.
+
+    Returns:
+        list[dict]:
+            Registros criados.
+    '''
+    hoje = hoje or agora()
+    hoje = hoje.replace(hour=0, minute=0, second=0, microsecond=0)
+    proximo = proximo_id(registros)
+
+    novos = []
+    for regra in regras:
+        valor = abs(float(regra['valor']))
+        for data in ocorrencias(regra, hoje):
+            montante = None
+            rendimento = None
+            if regra['tipo'] == 'Investimento':
+                dias = (hoje - data).days
+                montante = round(valor * fatores_crescimento(TAXA_JUROS, dias)[dias], 2)
+                rendimento = round(montante - valor, 2)
+            novos.append({
+                'id': proximo,
+                'data': montar_data(data),
+                'tipo': regra['tipo'],
+                'valor': -valor if regra['tipo'] == 'Despesa' else valor,
+                'moeda': regra.get('moeda') or MOEDA_PADRAO,
+                'montante': montante,
+                'rendimento': rendimento,
+                'data_atualizacao': None,
+                'categorias': list(regra.get('categorias') or []),
+                'descricao': regra.get('descricao', ''),
+                'recorrencia': regra['id_regra']
+            })
+            proximo += 1
+        regra['ultima_execucao'] = hoje.strftime('%d/%m/%Y')
+
+    if novos:
+        registros.extend(novos)
+    return novos
+
+
+def _ler_data_opcional(msg: str) -> str | None:
+    while True:
+        texto = input(msg).strip()
+        if not texto:
+            return None
+        try:
+            return datetime.strptime(texto, '%d/%m/%Y').strftime('%d/%m/%Y')
+        except ValueError:
+            print('Data inválida. Por favor, digite no formato esperado - Exemplo: 18/01/2024 (DD/MM/AAAA)')
+
+
+def criar_recorrencia(regras: list[dict]) -> dict:
+    '''
+    Cadastra uma nova regra de recorrência com interação do usuário.
+
+    Args:
+        regras (list[dict]):
+            Regras já cadastradas. A nova regra é acrescentada a esta lista.
+
+    Returns:
+        dict:
+            Regra criada, com as chaves 'id_regra', 'descricao', 'tipo',
+            'valor', 'moeda', 'frequencia', 'inicio', 'fim', 'categorias' e 'ultima_execucao'.
+    '''
+    descricao = input('Descrição: ').strip()
+    tipo = validar_tipo('Digite o tipo da recorrência. [Receita, Despesa, Investimento]: ')
+    valor = validar_valor()
+    moeda = validar_moeda()
+    while (frequencia := input('Frequência (diaria, semanal, mensal ou anual): ').strip().lower()) not in FREQUENCIAS:
+        print('Frequência inválida')
+    inicio = validar_data('Data do primeiro lançamento')
+    fim = _ler_data_opcional('Data final (dd/mm/aaaa, em branco para sem fim): ')
+    categorias = validar_categorias()
+
+    regra = {
+        'id_regra': max((r['id_regra'] for r in regras), default=-1) + 1,
+        'descricao': descricao,
+        'tipo': tipo,
+        'valor': valor,
+        'moeda': moeda,
+        'frequencia': frequencia,
+        'inicio': inicio['data_completa'],
+        'fim': fim,
+        'categorias': categorias,
+        'ultima_execucao': None
+    }
+    regras.append(regra)
+    return regra
@@ -1,20 +1,92 @@
 import json
+import os
 
-def salvar_registros(registros: list[dict], arquivo: str) -> None:
+from src.cache_consultas import ListaRegistros, avisar_salvamento, retirar_eventos_pendentes
+from src.eventos import gravar_eventos, lista_sincronizada, log_dos_registros, registrar_salvamento
+from utilitarios.centavos import registro_para_centavos
+
+
+def salvar_registros(registros: list[dict], arquivo: str, centavos: bool | None = None) -> None:
     '''
     Salva os registros no arquivo JSON.
 
-    Grava uma lista de registros em um arquivo JSON.
+    Grava uma lista de registros em um arquivo JSON e, depois disso, os
+    eventos das alterações feitas nessa lista desde o último salvamento no
+    log, se o log for o desse arquivo (ver log_dos_registros), junto com o
+    tamanho e a data do arquivo salvo (ver registrar_salvamento). Por
+    fim, as estruturas derivadas da lista (ver avisar_salvamento) são
+    avisadas do salvamento.
 
     Args:
         registros: list[dict]
             Lista de dicionários que contém os registros a serem salvos.
         arquivo (str): 
             Caminho do arquivo onde os registros serão salvos.
+        centavos (bool | None):
+            Se True, grava 'valor', 'montante' e 'rendimento' como inteiros em centavos
+            ('valor_centavos', ...), evitando erros de arredondamento do float.
+            Se None, mantém o formato em que a lista foi lida (ver ler_registros).
 
     Returns:
         Não retorna nada, apenas salva os registros.
     '''
 
+    if centavos is None:
+        centavos = getattr(registros, 'centavos', False)
+    elif isinstance(registros, ListaRegistros):
+        registros.centavos = centavos
+
+    continuacao = lista_sincronizada(registros)
+    gravar_registros(registros, arquivo, centavos, retirar_eventos_pendentes(registros), continuacao)
+    marcar_salvamento(registros, arquivo)
+    avisar_salvamento(registros)
+
+
+def marcar_salvamento(registros: list[dict], arquivo: str) -> None:
+    '''
+    Registra na lista o arquivo em que ela foi salva e se ele pertence ao log.
+
+    Args:
+        registros (list[dict]):
+            Lista de registros salva.
+        arquivo (str):
+            Arquivo onde a lista foi salva.
+    '''
+    if isinstance(registros, ListaRegistros):
+        registros.origem = os.path.abspath(arquivo)
+        registros.sincronizada = log_dos_registros(arquivo) is not None
+
+
+def gravar_registros(registros: list[dict], arquivo: str, centavos: bool = False,
+                     eventos: list[str] | None = None, continuacao: bool = False) -> None:
+    '''
+    Grava os registros no arquivo JSON e os eventos no log, sem avisar as estruturas derivadas.
+
+    É a parte de salvar_registros que acessa o disco. As tarefas em segundo
+    plano a usam para gravar uma cópia dos registros, com os eventos
+    retirados da lista ao montar a tarefa (ver tarefa_salvar).
+
+    Args:
+        registros (list[dict]):
+            Registros a gravar.
+        arquivo (str):
+            Caminho do arquivo onde os registros serão salvos.
+        centavos (bool):
+            Se True, grava os campos monetários como inteiros em centavos.
+        eventos (list[str] | None):
+            Linhas de eventos (ver retirar_eventos_pendentes), gravadas no
+            log depois do arquivo se o log for o desse arquivo.
+        continuacao (bool):
+            Se a lista estava sincronizada com o arquivo do log antes deste
+            salvamento (ver registrar_salvamento).
+    '''
+    dados = registros
+    if centavos:
+        dados = [registro_para_centavos(registro) for registro in registros]
+
     with open(arquivo, 'w') as f:
-        json.dump(registros, f, indent=4)
+        json.dump(dados, f, indent=4)
+    log = log_dos_registros(arquivo)
+    if log is not None:
+        gravar_eventos(eventos or [], log)
+        registrar_salvamento(arquivo, continuacao)
@@ -0,0 +1,339 @@
+import os
+import queue
+import threading
+from typing import Callable
+
+from src.agregacao_externa import iterar_registros
+from src.atualizar_rendimento import atualiza_rendimento
+from src.cache_consultas import avisar_salvamento, marcar_alteracao, retirar_eventos_pendentes
+from src.criar_registro import proximo_id
+from src.eventos import lista_sincronizada
+from src.exportar_relatorio import exportar_relatorio
+from src.migrar_registros import normalizar_registro
+from src.salvar_registros import gravar_registros, marcar_salvamento
+
+TAMANHO_LOTE_TAREFA = 5_000
+
+Progresso = Callable[[float, str], None]
+Resultado = str | Callable[[dict], str | None] | None
+
+
+def iniciar_trabalhador() -> dict:
+    '''
+    Inicia uma thread que executa tarefas demoradas em segundo plano, uma por vez.
+
+    Cada tarefa é uma função que recebe uma função de progresso (fração
+    entre 0 e 1 e mensagem) e retorna a mensagem final ou uma função que
+    aplica o resultado. As tarefas nunca alteram os registros: o resultado
+    vai para uma fila e é aplicado pela thread da interface, com
+    aplicar_resultados. A aplicação só altera a memória; a gravação em
+    disco é outra tarefa (ver tarefa_salvar). O estado da tarefa em andamento pode ser lido a
+    qualquer momento com estado_trabalhador, sem bloquear quem está
+    consultando.
+
+    Returns:
+        dict:
+            Trabalhador, usado nas demais funções deste módulo.
+    '''
+    trabalhador = {
+        'fila': queue.Queue(),
+        'resultados': queue.Queue(),
+        'trava': threading.Lock(),
+        'salvamentos': 0,
+        'estado': {'tarefa': None, 'fracao': 0.0, 'mensagem': '', 'pendentes': 0}
+    }
+
+    def executar() -> None:
+        while (item := trabalhador['fila'].get()) is not None:
+            nome, funcao = item
+
+            def progresso(fracao: float, mensagem: str = '') -> None:
+                with trabalhador['trava']:
+                    trabalhador['estado']['fracao'] = max(0.0, min(1.0, fracao))
+                    trabalhador['estado']['mensagem'] = mensagem
+
+            with trabalhador['trava']:
+                trabalhador['estado'].update(tarefa=nome, fracao=0.0, mensagem='')
+                trabalhador['estado']['pendentes'] -= 1
+            try:
+                resultado = funcao(progresso)
+            except Exception as e:
+                resultado = f'Erro em {nome}: {e}'
+            trabalhador['resultados'].put((nome, resultado))
+            with trabalhador['trava']:
+                trabalhador['estado'].update(tarefa=None, fracao=1.0, mensagem='')
+            trabalhador['fila'].task_done()
+
+    trabalhador['thread'] = threading.Thread(target=executar, daemon=True)
+    trabalhador['thread'].start()
+    return trabalhador
+
+
+def agendar_tarefa(trabalhador: dict, nome: str, funcao: Callable[[Progresso], Resultado]) -> None:
+    '''
+    Coloca uma tarefa na fila do trabalhador.
+
+    Args:
+        trabalhador (dict):
+            Trabalhador criado por iniciar_trabalhador.
+        nome (str):
+            Nome exibido enquanto a tarefa é executada.
+        funcao (Callable[[Progresso], Resultado]):
+            Tarefa. Recebe a função de progresso e retorna a mensagem final
+            ou uma função executada por aplicar_resultados, que recebe o
+            trabalhador (para agendar o salvamento), altera os registros e
+            retorna a mensagem final.
+    '''
+    with trabalhador['trava']:
+        trabalhador['estado']['pendentes'] += 1
+    trabalhador['fila'].put((nome, funcao))
+
+
+def aplicar_resultados(trabalhador: dict) -> list[str]:
+    '''
+    Aplica os resultados das tarefas terminadas e retorna as suas mensagens.
+
+    Deve ser chamada pela thread que usa os registros (a da interface), que
+    assim é a única a alterá-los e a agendar o seu salvamento.
+
+    Args:
+        trabalhador (dict):
+            Trabalhador criado por iniciar_trabalhador.
+
+    Returns:
+        list[str]:
+            Mensagens finais das tarefas terminadas desde a última chamada.
+    '''
+    mensagens = []
+    while True:
+        try:
+            nome, resultado = trabalhador['resultados'].get_nowait()
+        except queue.Empty:
+            return mensagens
+        if callable(resultado):
+            try:
+                resultado = resultado(trabalhador)
+            except Exception as e:
+                resultado = f'Erro em {nome}: {e}'
+        mensagens.append(resultado or f'{nome} concluída')
+
+
+def estado_trabalhador(trabalhador: dict) -> dict:
+    '''
+    Retorna uma cópia do estado do trabalhador.
+
+    Args:
+        trabalhador (dict):
+            Trabalhador criado por iniciar_trabalhador.
+
+    Returns:
+        dict:
+            Estado com as chaves 'tarefa' (nome da tarefa em andamento ou None),
+            'fracao', 'mensagem' e 'pendentes'.
+    '''
+    with trabalhador['trava']:
+        return dict(trabalhador['estado'])
+
+
+def encerrar_trabalhador(trabalhador: dict) -> list[str]:
+    '''
+    Espera as tarefas da fila terminarem, aplica os resultados e encerra a thread do trabalhador.
+
+    Resultados que agendam outras tarefas (como o salvamento) são aplicados
+    e as novas tarefas também são esperadas.
+
+    Args:
+        trabalhador (dict):
+            Trabalhador criado por iniciar_trabalhador.
+
+    Returns:
+        list[str]:
+            Mensagens finais das tarefas ainda não aplicadas.
+    '''
+    mensagens = []
+    while True:
+        trabalhador['fila'].join()
+        mensagens.extend(aplicar_resultados(trabalhador))
+        if trabalhador['fila'].empty():
+            break
+    trabalhador['fila'].put(None)
+    trabalhador['thread'].join()
+    return mensagens
+
+
+def tarefa_salvar(trabalhador: dict, registros: list[dict], arquivo: str) -> Callable[[Progresso], Resultado]:
+    '''
+    Monta a tarefa que salva os registros em segundo plano.
+
+    Ao montar a tarefa, na thread da interface, são feitas cópias rasas dos
+    registros e retirados os eventos pendentes da lista; a tarefa grava as
+    cópias e os eventos com gravar_registros, sem bloquear a interface. As
+    estruturas derivadas só são avisadas do salvamento (ver
+    avisar_salvamento) se nenhuma alteração foi feita nem outro salvamento
+    agendado desde então, já que elas gravam o offset do log.
+
+    Args:
+        trabalhador (dict):
+            Trabalhador criado por iniciar_trabalhador.
+        registros (list[dict]):
+            Lista de registros financeiros.
+        arquivo (str):
+            Arquivo onde os registros são salvos.
+
+    Returns:
+        Callable[[Progresso], Resultado]:
+            Tarefa para agendar_tarefa.
+    '''
+    copias = [dict(registro) for registro in registros]
+    centavos = getattr(registros, 'centavos', False)
+    eventos = retirar_eventos_pendentes(registros)
+    continuacao = lista_sincronizada(registros)
+    marcar_salvamento(registros, arquivo)
+    trabalhador['salvamentos'] += 1
+    numero = trabalhador['salvamentos']
+
+    def tarefa(progresso: Progresso) -> Callable[[dict], str]:
+        gravar_registros(copias, arquivo, centavos, eventos, continuacao)
+
+        def aplicar(trabalhador: dict) -> str:
+            if numero == trabalhador['salvamentos'] and not getattr(registros, 'pendentes', None):
+                avisar_salvamento(registros)
+            return f'Registros salvos em {arquivo}.'
+        return aplicar
+    return tarefa
+
+
+def salvar_em_segundo_plano(trabalhador: dict, registros: list[dict], arquivo: str) -> None:
+    '''
+    Agenda o salvamento dos registros (ver tarefa_salvar).
+
+    Args:
+        trabalhador (dict):
+            Trabalhador criado por iniciar_trabalhador.
+        registros (list[dict]):
+            Lista de registros financeiros.
+        arquivo (str):
+            Arquivo onde os registros são salvos.
+    '''
+    agendar_tarefa(trabalhador, 'Salvando', tarefa_salvar(trabalhador, registros, arquivo))
+
+
+def tarefa_rendimento(registros: list[dict], arquivo: str,
+                      tamanho_lote: int = TAMANHO_LOTE_TAREFA) -> Callable[[Progresso], Resultado]:
+    '''
+    Monta a tarefa que atualiza o rendimento dos investimentos e salva os registros.
+
+    O rendimento é calculado em lotes, sobre cópias dos registros feitas ao
+    montar a tarefa, informando o progresso a cada lote. Os valores novos
+    são copiados para os registros por aplicar_resultados, que agenda o
+    salvamento (ver salvar_em_segundo_plano).
+
+    Args:
+        registros (list[dict]):
+            Lista de registros financeiros.
+        arquivo (str):
+            Arquivo onde os registros são salvos ao final.
+        tamanho_lote (int):
+            Quantidade de registros atualizados entre dois avisos de progresso.
+
+    Returns:
+        Callable[[Progresso], Resultado]:
+            Tarefa para agendar_tarefa.
+    '''
+    originais = list(registros)
+    copias = [dict(registro) for registro in originais]
+
+    def tarefa(progresso: Progresso) -> Callable[[dict], str]:
+        total = len(copias)
+        for inicio in range(0, total, tamanho_lote):
+            atualiza_rendimento(copias[inicio:inicio + tamanho_lote])
+            progresso(min(inicio + tamanho_lote, total) / (total + 1), 'atualizando')
+
+        def aplicar(trabalhador: dict) -> str:
+            alterados = []
+            for original, copia in zip(originais, copias):
+                novos = {campo: copia.get(campo) for campo in ('rendimento', 'montante', 'data_atualizacao')}
+                if any(original.get(campo) != valor for campo, valor in novos.items()):
+                    original.update(novos)
+                    alterados.append(original)
+            marcar_alteracao(registros, 'rendimento', alterados)
+            salvar_em_segundo_plano(trabalhador, registros, arquivo)
+            return 'Rendimento atualizado! Salvando...'
+        return aplicar
+    return tarefa
+
+
+def tarefa_exportar(registros: list[dict], saida: str, formato: str) -> Callable[[Progresso], Resultado]:
+    '''
+    Monta a tarefa que exporta o relatório dos registros.
+
+    A tarefa exporta cópias dos registros feitas ao montá-la, e a última
+    mensagem de exportar_relatorio é retornada como mensagem final.
+
+    Args:
+        registros (list[dict]):
+            Lista de registros financeiros.
+        saida (str):
+            Arquivo de saída.
+        formato (str):
+            'csv', 'json' ou 'parquet'.
+
+    Returns:
+        Callable[[Progresso], Resultado]:
+            Tarefa para agendar_tarefa.
+    '''
+    copias = [dict(registro) for registro in registros]
+
+    def tarefa(progresso: Progresso) -> str:
+        mensagens = []
+        exportar_relatorio(copias, saida, formato, avisar=mensagens.append,
+                           progresso=lambda gravados, total: progresso(gravados / total, f'{gravados}/{total}'))
+        return mensagens[-1] if mensagens else f'Relatório exportado para {saida}'
+    return tarefa
+
+
+def tarefa_importar(registros: list[dict], entrada: str, arquivo: str) -> Callable[[Progresso], Resultado]:
+    '''
+    Monta a tarefa que importa os registros de um arquivo e salva o resultado.
+
+    O arquivo é lido em fluxo (JSON, JSON lines ou Parquet) e cada registro
+    passa pela mesma normalização da migração (normalizar_registro: data,
+    tipo, valor, moeda e categorias). Registros inválidos são ignorados e
+    contados na mensagem final. Os registros importados recebem novos 'id'
+    e são acrescentados à lista de uma só vez por aplicar_resultados, que
+    agenda o salvamento (ver salvar_em_segundo_plano).
+
+    Args:
+        registros (list[dict]):
+            Lista de registros financeiros.
+        entrada (str):
+            Arquivo a importar.
+        arquivo (str):
+            Arquivo onde os registros são salvos ao final.
+
+    Returns:
+        Callable[[Progresso], Resultado]:
+            Tarefa para agendar_tarefa.
+    '''
+    def tarefa(progresso: Progresso) -> Callable[[dict], str]:
+        total_bytes = os.path.getsize(entrada)
+        novos = []
+        invalidos = 0
+        informar = (lambda lidos: progresso(lidos / total_bytes, f'{len(novos)} lidos')) \
+            if total_bytes else None
+        for registro in iterar_registros(entrada, progresso=informar):
+            try:
+                novos.append(normalizar_registro(registro))
+            except (AttributeError, ValueError):
+                invalidos += 1
+
+        def aplicar(trabalhador: dict) -> str:
+            proximo = proximo_id(registros)
+            for posicao, registro in enumerate(novos):
+                registro['id'] = proximo + posicao
+            registros.extend(novos)
+            salvar_em_segundo_plano(trabalhador, registros, arquivo)
+            mensagem = f'{len(novos)} registros importados de {entrada}. Salvando...'
+            return mensagem + (f' {invalidos} registros inválidos ignorados.' if invalidos else '')
+        return aplicar
+    return tarefa
@@ -0,0 +1,416 @@
+import argparse
+import copy
+import random
+import sys
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from src.agruparmes import totalizar_mes
+from src.atualizar_rendimento import atualiza_rendimento
+from src.cache_consultas import ListaRegistros, marcar_alteracao
+from src.consultar_registros import consultar_registros
+from src.cotacoes import montar_tabelas
+from src.estatisticas import maiores_registros, quantis_registros
+from src import eventos
+from src.indice_categorias import filtrar_por_categorias
+from src.indice_descricoes import (buscar_descricoes, buscar_registros_por_descricao,
+                                   construir_indice_descricoes)
+from src.ler_registros_por import filtrar_registros
+from src.projetar_investimentos import projetar_carteira
+from src.recorrencias import FREQUENCIAS, ocorrencias
+from utilitarios.calcular_tempo import somar_meses
+from utilitarios.entrada_data import montar_data
+from utilitarios.relogio import relogio_fixo
+from utilitarios.texto import tokenizar
+
+HOJE = datetime(2024, 6, 15)
+TOLERANCIA_QUANTIL = 0.05
+TIPOS = ('Receita', 'Despesa', 'Investimento')
+MOEDAS = ('BRL', 'USD', 'EUR')
+CATEGORIAS = ('mercado', 'lazer', 'salario', 'aluguel', 'viagem', 'cartao')
+PALAVRAS = ('Pão', 'açúcar', 'mercado', 'Mercadão', 'farmácia', 'salário', 'aluguel',
+            'conta', 'luz', 'água', 'viagem', 'São', 'Paulo', 'café', 'cafeteria')
+
+
+def gerar_registros(aleatorio: random.Random, quantidade: int) -> list[dict]:
+    '''
+    Gera uma lista aleatória de registros no formato atual.
+
+    Alguns valores e datas se repetem de propósito, para exercitar empates
+    em ordenações e índices. A lista é uma ListaRegistros, para que as
+    consultas passem pelo cache.
+
+    Args:
+        aleatorio (random.Random):
+            Gerador de números aleatórios (com semente fixa para reproduzir).
+        quantidade (int):
+            Quantidade de registros.
+
+    Returns:
+        ListaRegistros:
+            Registros gerados.
+    '''
+    valores_repetidos = [round(aleatorio.uniform(1, 500), 2) for _ in range(5)]
+    registros = ListaRegistros()
+    for id_registro in range(quantidade):
+        data = HOJE - timedelta(days=aleatorio.randint(0, 900))
+        tipo = aleatorio.choice(TIPOS)
+        if aleatorio.random() < 0.2:
+            valor = aleatorio.choice(valores_repetidos)
+        else:
+            valor = round(aleatorio.uniform(0.01, 5000), 2)
+        registros.append({
+            'id': id_registro,
+            'data': montar_data(data),
+            'tipo': tipo,
+            'valor': -valor if tipo == 'Despesa' else valor,
+            'moeda': aleatorio.choice(MOEDAS) if aleatorio.random() < 0.3 else 'BRL',
+            'montante': None,
+            'rendimento': None,
+            'data_atualizacao': None,
+            'categorias': aleatorio.sample(CATEGORIAS, aleatorio.randint(0, 3)),
+            'descricao': ' '.join(aleatorio.sample(PALAVRAS, aleatorio.randint(0, 4)))
+        })
+    return registros
+
+
+def _ordinal(registro: dict) -> int:
+    return datetime.strptime(registro['data']['data_completa'], '%d/%m/%Y').toordinal()
+
+
+def verificar_filtros(aleatorio: random.Random, registros: list[dict]) -> None:
+    escolhido = aleatorio.choice(registros)
+    for criterio, valor in (('data', escolhido['data']), ('tipo', escolhido['tipo']),
+                            ('valor', abs(escolhido['valor']))):
+        referencia = [r for r in registros
+                      if (abs(r['valor']) if criterio == 'valor' else r[criterio]) == valor]
+        assert filtrar_registros(registros, criterio, valor) == referencia, criterio
+
+
+def verificar_consulta(aleatorio: random.Random, registros: list[dict]) -> None:
+    inicio = HOJE - timedelta(days=aleatorio.randint(0, 900))
+    fim = inicio + timedelta(days=aleatorio.randint(0, 400))
+    criterios = {
+        'data_inicio': inicio.strftime('%d/%m/%Y') if aleatorio.random() < 0.7 else None,
+        'data_fim': fim.strftime('%d/%m/%Y') if aleatorio.random() < 0.7 else None,
+        'tipo': aleatorio.choice(TIPOS) if aleatorio.random() < 0.5 else None,
+        'valor_min': aleatorio.uniform(0, 1000) if aleatorio.random() < 0.5 else None,
+        'valor_max': aleatorio.uniform(1000, 5000) if aleatorio.random() < 0.5 else None,
+        'ordenar_por': aleatorio.choice(['data', 'valor', None]),
+        'decrescente': aleatorio.random() < 0.5,
+        'limite': aleatorio.choice([None, 1, 5, 50])
+    }
+
+    def atende(r: dict) -> bool:
+        ordinal = _ordinal(r)
+        return ((criterios['data_inicio'] is None or ordinal >= inicio.toordinal())
+                and (criterios['data_fim'] is None or ordinal <= fim.toordinal())
+                and (criterios['tipo'] is None or r['tipo'] == criterios['tipo'])
+                and (criterios['valor_min'] is None or abs(r['valor']) >= criterios['valor_min'])
+                and (criterios['valor_max'] is None or abs(r['valor']) <= criterios['valor_max']))
+
+    referencia = [r for r in registros if atende(r)]
+    resultado = list(consultar_registros(registros, **criterios))
+    if criterios['ordenar_por'] is None:
+        referencia.sort(key=lambda r: r['id'])
+        resultado.sort(key=lambda r: r['id'])
+    else:
+        chave = _ordinal if criterios['ordenar_por'] == 'data' else lambda r: abs(r['valor'])
+        referencia.sort(key=chave, reverse=criterios['decrescente'])
+    if criterios['limite'] is not None and criterios['ordenar_por'] is not None:
+        referencia = referencia[:criterios['limite']]
+        assert resultado == referencia, criterios
+    elif criterios['limite'] is not None:
+        assert len(resultado) == min(len(referencia), criterios['limite']), criterios
+        assert all(atende(r) for r in resultado), criterios
+    else:
+        assert resultado == referencia, criterios
+
+
+def verificar_totais(aleatorio: random.Random, registros: list[dict]) -> None:
+    escolhido = aleatorio.choice(registros)
+    mes = f"{escolhido['data']['mes']}/{escolhido['data']['ano']}"
+    for tipo in TIPOS:
+        selecionados = [r for r in registros
+                        if f"{r['data']['mes']}/{r['data']['ano']}" == mes and r['tipo'] == tipo]
+        valor = sum(Decimal(str(r['valor'])) for r in selecionados)
+        rendimento = sum(Decimal(str(r['rendimento'] or 0)) for r in selecionados) if tipo == 'Investimento' else 0
+        totais = totalizar_mes(registros, mes, tipo)
+        assert totais['quantidade'] == len(selecionados), (mes, tipo)
+        assert totais['valor'] == float(valor), (mes, tipo, totais['valor'], valor)
+        assert totais['rendimento'] == float(rendimento), (mes, tipo)
+
+
+def verificar_cache(aleatorio: random.Random, registros: list[dict]) -> None:
+    registros = copy.deepcopy(registros)
+    escolhido = aleatorio.choice(registros)
+    mes = f"{escolhido['data']['mes']}/{escolhido['data']['ano']}"
+
+    def conferir(motivo: str) -> None:
+        valor = sum(Decimal(str(r['valor'])) for r in registros
+                    if f"{r['data']['mes']}/{r['data']['ano']}" == mes and r['tipo'] == escolhido['tipo'])
+        assert totalizar_mes(registros, mes, escolhido['tipo'])['valor'] == float(valor), motivo
+        referencia = [r for r in registros if r['tipo'] == escolhido['tipo']]
+        assert filtrar_registros(registros, 'tipo', escolhido['tipo']) == referencia, motivo
+
+    conferir('inicial')
+    registros.append(dict(copy.deepcopy(escolhido), id=len(registros)))
+    conferir('append')
+    escolhido['valor'] = round(escolhido['valor'] + 1, 2)
+    marcar_alteracao(registros)
+    conferir('edição')
+    registros.pop(0)
+    conferir('pop')
+
+    # Listas descartadas não podem emprestar o resultado para listas novas.
+    for valor in range(5):
+        lista = ListaRegistros([dict(escolhido, valor=float(valor))])
+        assert totalizar_mes(lista, mes, escolhido['tipo'])['valor'] == valor, 'lista nova'
+
+
+def gerar_cotacoes(aleatorio: random.Random) -> dict:
+    '''
+    Gera cotações diárias aleatórias de USD e EUR, sem fins de semana.
+
+    Args:
+        aleatorio (random.Random):
+            Gerador de números aleatórios.
+
+    Returns:
+        dict:
+            Cotações no formato aceito por montar_tabelas.
+    '''
+    cotacoes = {}
+    for moeda, taxa in (('USD', 5.0), ('EUR', 5.5)):
+        cotacoes[moeda] = {}
+        for dias in range(1000):
+            data = HOJE - timedelta(days=dias)
+            if data.weekday() < 5:
+                cotacoes[moeda][data.strftime('%d/%m/%Y')] = round(taxa * aleatorio.uniform(0.8, 1.2), 4)
+    return cotacoes
+
+
+def verificar_conversao(aleatorio: random.Random, registros: list[dict]) -> None:
+    cotacoes = gerar_cotacoes(aleatorio)
+    tabelas = montar_tabelas(cotacoes)
+
+    def taxa(moeda: str, data: datetime) -> Decimal:
+        if moeda == 'BRL':
+            return Decimal(1)
+        while data.strftime('%d/%m/%Y') not in cotacoes[moeda]:
+            data -= timedelta(days=1)
+        return Decimal(repr(cotacoes[moeda][data.strftime('%d/%m/%Y')]))
+
+    escolhido = aleatorio.choice(registros)
+    mes = f"{escolhido['data']['mes']}/{escolhido['data']['ano']}"
+    destino = aleatorio.choice(MOEDAS)
+    for tipo in TIPOS:
+        selecionados = [r for r in registros
+                        if f"{r['data']['mes']}/{r['data']['ano']}" == mes and r['tipo'] == tipo]
+        referencia = sum((Decimal(str(r['valor'])) * taxa(r['moeda'], datetime.strptime(
+            r['data']['data_completa'], '%d/%m/%Y')) / taxa(destino, datetime.strptime(
+            r['data']['data_completa'], '%d/%m/%Y')) for r in selecionados), Decimal(0))
+        totais = totalizar_mes(registros, mes, tipo, destino, tabelas)
+        # Cada soma por (moeda, dia) é arredondada para o centavo uma vez.
+        grupos = len({(r['moeda'], r['data']['data_completa']) for r in selecionados})
+        assert totais['quantidade'] == len(selecionados), (mes, tipo, destino)
+        assert abs(Decimal(repr(totais['valor'])) - referencia) <= Decimal('0.006') * grupos, \
+            (mes, tipo, destino, totais['valor'], referencia)
+
+
+def verificar_projecao(aleatorio: random.Random, registros: list[dict]) -> None:
+    referencia = copy.deepcopy(registros)
+    atualiza_rendimento(referencia)
+    projecao = projetar_carteira(registros, [HOJE], por_investimento=True)
+    esperados = [r['montante'] for r in referencia if r['tipo'] == 'Investimento']
+    assert [linha[0] for linha in projecao['matriz']] == esperados
+
+
+def verificar_categorias(aleatorio: random.Random, registros: list[dict]) -> None:
+    todas = aleatorio.sample(CATEGORIAS, aleatorio.randint(0, 2))
+    alguma = aleatorio.sample(CATEGORIAS, aleatorio.randint(0, 2))
+    excluir = aleatorio.sample(CATEGORIAS, aleatorio.randint(0, 1))
+    referencia = [r for r in registros
+                  if all(c in r['categorias'] for c in todas)
+                  and (not alguma or any(c in r['categorias'] for c in alguma))
+                  and not any(c in r['categorias'] for c in excluir)]
+    assert filtrar_por_categorias(registros, todas, alguma, excluir) == referencia, (todas, alguma, excluir)
+
+
+def verificar_maiores(aleatorio: random.Random, registros: list[dict]) -> None:
+    escolhido = aleatorio.choice(registros)
+    ano, tipo = escolhido['data']['ano'], escolhido['tipo']
+    mes = escolhido['data']['mes'] if aleatorio.random() < 0.5 else None
+    n = aleatorio.choice([1, 5, 20])
+    referencia = sorted((r for r in registros if r['data']['ano'] == ano and r['tipo'] == tipo
+                         and (mes is None or r['data']['mes'] == mes)),
+                        key=lambda r: abs(r['valor']), reverse=True)[:n]
+    assert maiores_registros(registros, tipo, ano, mes, n) == referencia, (ano, mes, tipo, n)
+
+
+def verificar_quantis(aleatorio: random.Random, registros: list[dict]) -> None:
+    escolhido = aleatorio.choice(registros)
+    ano, tipo = escolhido['data']['ano'], escolhido['tipo']
+    valores = sorted(abs(r['valor']) for r in registros if r['data']['ano'] == ano and r['tipo'] == tipo)
+    for q, estimado in quantis_registros(registros, tipo, ano).items():
+        # Com valores repetidos, qualquer posto dentro da sequência de iguais vale.
+        inicio, fim = bisect_left(valores, estimado) / len(valores), bisect_right(valores, estimado) / len(valores)
+        folga = TOLERANCIA_QUANTIL + 1 / len(valores)
+        assert inicio - folga <= q <= fim + folga, (ano, tipo, q, estimado)
+
+
+def verificar_estatisticas(aleatorio: random.Random, registros: list[dict]) -> None:
+    registros = copy.deepcopy(registros)
+    escolhido = aleatorio.choice(registros)
+    maiores_registros(registros, escolhido['tipo'], escolhido['data']['ano'])
+    mesmo_grupo = [r for r in registros if r['tipo'] == escolhido['tipo']]
+    for _ in range(40):
+        sorteio = aleatorio.random()
+        if sorteio < 0.4:
+            novo = copy.deepcopy(aleatorio.choice(mesmo_grupo))
+            novo['id'] = max(r['id'] for r in registros) + 1
+            registros.append(novo)
+        elif sorteio < 0.7 and len(registros) > 1:
+            registros.pop(aleatorio.randrange(len(registros)))
+        else:
+            registro = aleatorio.choice(registros)
+            anterior = copy.deepcopy(registro)
+            registro['valor'] = aleatorio.choice([abs(escolhido['valor']), round(aleatorio.uniform(0.01, 5000), 2)])
+            if aleatorio.random() < 0.3:
+                registro['tipo'] = aleatorio.choice(TIPOS)
+            marcar_alteracao(registros, 'atualizar', [registro], [anterior])
+    verificar_maiores(aleatorio, registros)
+    verificar_quantis(aleatorio, registros)
+
+
+def verificar_descricoes(aleatorio: random.Random, registros: list[dict]) -> None:
+    consulta = ' '.join(palavra[:aleatorio.randint(2, len(palavra))]
+                        for palavra in aleatorio.sample(PALAVRAS, aleatorio.randint(1, 2)))
+    prefixos = tokenizar(consulta)
+    referencia = {r['id'] for r in registros
+                  if all(any(t.startswith(p) for t in tokenizar(r['descricao'])) for p in prefixos)}
+    if not prefixos:
+        referencia = set()
+    indice = construir_indice_descricoes(registros)
+    resultado = {id_registro for id_registro, _ in buscar_descricoes(indice, consulta, len(registros))}
+    assert resultado == referencia, consulta
+
+    # Índice em memória, mantido a cada alteração da lista, e busca por
+    # posição quando há 'id' repetido.
+    registros = copy.deepcopy(registros)
+
+    def conferir(motivo: str) -> None:
+        esperado = sorted(id(r) for r in registros
+                          if prefixos and all(any(t.startswith(p) for t in tokenizar(r['descricao']))
+                                              for p in prefixos))
+        encontrados = buscar_registros_por_descricao(registros, consulta, len(registros))
+        assert sorted(id(r) for r in encontrados) == esperado, f'{motivo}: {consulta}'
+
+    conferir('inicial')
+    novo = dict(aleatorio.choice(registros), id=max(r['id'] for r in registros) + 1, descricao=consulta)
+    registros.append(novo)
+    conferir('append')
+    alvo = aleatorio.choice(registros)
+    anterior = dict(alvo)
+    alvo['descricao'] = aleatorio.choice(PALAVRAS)
+    marcar_alteracao(registros, 'atualizar', [alvo], [anterior])
+    conferir('atualização')
+    registros.pop(0)
+    conferir('pop')
+    registros.append(dict(novo))
+    conferir('id repetido')
+    registros.pop()
+    conferir('id único de novo')
+
+
+def verificar_recorrencias(aleatorio: random.Random, registros: list[dict]) -> None:
+    inicio = HOJE - timedelta(days=aleatorio.randint(0, 900))
+    regra = {
+        'frequencia': aleatorio.choice(list(FREQUENCIAS)),
+        'inicio': inicio.strftime('%d/%m/%Y'),
+        'fim': (inicio + timedelta(days=aleatorio.randint(0, 900))).strftime('%d/%m/%Y')
+        if aleatorio.random() < 0.5 else None,
+        'ultima_execucao': (inicio + timedelta(days=aleatorio.randint(-30, 900))).strftime('%d/%m/%Y')
+        if aleatorio.random() < 0.5 else None
+    }
+    fim = datetime.strptime(regra['fim'], '%d/%m/%Y') if regra['fim'] else HOJE
+    ultima = datetime.strptime(regra['ultima_execucao'], '%d/%m/%Y') if regra['ultima_execucao'] else None
+    unidade, passo = FREQUENCIAS[regra['frequencia']]
+
+    referencia = []
+    k = 0
+    while True:
+        data = inicio + timedelta(days=k * passo) if unidade == 'dias' else somar_meses(inicio, k * passo)
+        if data > min(fim, HOJE):
+            break
+        if ultima is None or data > ultima:
+            referencia.append(data)
+        k += 1
+    assert ocorrencias(regra, HOJE) == referencia, regra
+
+
+VERIFICACOES = {
+    'filtros': verificar_filtros,
+    'consulta combinada': verificar_consulta,
+    'totais do mês': verificar_totais,
+    'cache': verificar_cache,
+    'conversão de moeda': verificar_conversao,
+    'projeção': verificar_projecao,
+    'categorias': verificar_categorias,
+    'maiores registros': verificar_maiores,
+    'quantis': verificar_quantis,
+    'estatísticas incrementais': verificar_estatisticas,
+    'descrições': verificar_descricoes,
+    'recorrências': verificar_recorrencias,
+}
+
+
+def verificar(sementes: int = 50, quantidade: int = 300) -> dict:
+    '''
+    Compara as versões otimizadas com implementações de referência em registros aleatórios.
+
+    Cada semente gera uma lista de registros e, para cada verificação, uma
+    consulta aleatória. O relógio fica fixo em HOJE e o log de eventos é
+    desativado durante a execução, então os resultados são reproduzíveis.
+
+    Args:
+        sementes (int):
+            Quantidade de listas aleatórias (sementes 0 a sementes - 1).
+        quantidade (int):
+            Quantidade de registros por lista.
+
+    Returns:
+        dict:
+            Dicionário verificação -> lista de falhas (semente, mensagem).
+    '''
+    falhas = {nome: [] for nome in VERIFICACOES}
+    arquivo_eventos = eventos._arquivo_eventos
+    eventos.configurar_eventos(None)
+    try:
+        with relogio_fixo(HOJE):
+            for semente in range(sementes):
+                aleatorio = random.Random(semente)
+                registros = gerar_registros(aleatorio, quantidade)
+                for nome, verificacao in VERIFICACOES.items():
+                    try:
+                        verificacao(aleatorio, registros)
+                    except AssertionError as e:
+                        falhas[nome].append((semente, str(e)))
+    finally:
+        eventos.configurar_eventos(arquivo_eventos)
+    return falhas
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Verificação diferencial das funções otimizadas.')
+    parser.add_argument('--sementes', type=int, default=50, help='quantidade de listas aleatórias')
+    parser.add_argument('--quantidade', type=int, default=300, help='registros por lista')
+    args = parser.parse_args()
+
+    falhas = verificar(args.sementes, args.quantidade)
+    for nome, lista in falhas.items():
+        print(f"{nome}: {'ok' if not lista else f'{len(lista)} falhas'}")
+        for semente, mensagem in lista[:3]:
+            print(f'    semente {semente}: {mensagem}')
+    sys.exit(1 if any(falhas.values()) else 0)
@@ -0,0 +1,317 @@
+import os
+import sys
+
+from src.cache_consultas import manter_derivado, versao_registros
+from src.eventos import caminho_eventos, configurar_eventos
+from src.ler_registros import ler_registros
+from src.tarefas import (agendar_tarefa, aplicar_resultados, encerrar_trabalhador, estado_trabalhador,
+                         iniciar_trabalhador, tarefa_exportar, tarefa_importar, tarefa_rendimento)
+from utilitarios.texto import normalizar_texto
+
+try:
+    import curses
+except ImportError:
+    curses = None
+
+COLUNAS = (('id', 7), ('data', 11), ('tipo', 13), ('valor', 14), ('moeda', 6), ('categorias', 24), ('descricao', 0))
+AJUDA = '/ buscar  Esc limpar  r rendimento  e exportar  i importar  q sair'
+INTERVALO_ATUALIZACAO = 100
+
+
+def texto_busca(registro: dict) -> str:
+    '''
+    Monta o texto normalizado em que a busca incremental procura.
+
+    Args:
+        registro (dict):
+            Registro financeiro.
+
+    Returns:
+        str:
+            Data, tipo, valor, moeda, categorias e descrição, sem acentos e em minúsculas.
+    '''
+    data = registro.get('data')
+    partes = [data.get('data_completa', '') if isinstance(data, dict) else str(data or ''),
+              registro.get('tipo', ''), str(registro.get('valor', '')), registro.get('moeda') or '',
+              ' '.join(registro.get('categorias') or []), registro.get('descricao') or '']
+    return normalizar_texto(' '.join(partes))
+
+
+def _atualizar_textos(textos: dict, operacao: str, afetados: list[dict],
+                      anteriores: list[dict | None] | None) -> None:
+    # Só os registros afetados perdem o texto guardado; reordenar não muda
+    # nenhum texto.
+    if operacao == 'reconstruir':
+        textos.clear()
+    elif operacao != 'reordenar':
+        for registro in afetados:
+            textos.pop(id(registro), None)
+
+
+def filtrar_busca(registros: list[dict], posicoes, consulta: str) -> list[int]:
+    '''
+    Filtra as posições dos registros que contêm todas as palavras da consulta.
+
+    O texto normalizado de cada registro (ver texto_busca) é montado uma
+    única vez e guardado junto à ListaRegistros (ver manter_derivado); só os
+    registros alterados precisam ser normalizados de novo.
+
+    Args:
+        registros (list[dict]):
+            Lista de registros financeiros.
+        posicoes (Iterable[int]):
+            Posições candidatas. Na busca incremental, o resultado da consulta
+            anterior, já que cada letra digitada só pode reduzir o resultado.
+        consulta (str):
+            Texto digitado.
+
+    Returns:
+        list[int]:
+            Posições dos registros encontrados, na ordem original.
+    '''
+    palavras = normalizar_texto(consulta).split()
+    textos = manter_derivado(registros, 'textos_busca', lambda _: {}, _atualizar_textos)
+    encontradas = []
+    for posicao in posicoes:
+        registro = registros[posicao]
+        texto = textos.get(id(registro))
+        if texto is None:
+            texto = textos[id(registro)] = texto_busca(registro)
+        if all(palavra in texto for palavra in palavras):
+            encontradas.append(posicao)
+    return encontradas
+
+
+def formatar_linha(registro: dict, largura: int) -> str:
+    '''
+    Formata um registro como uma linha da tabela.
+
+    Args:
+        registro (dict):
+            Registro financeiro.
+        largura (int):
+            Largura disponível na tela.
+
+    Returns:
+        str:
+            Linha com as colunas de COLUNAS, cortada na largura da tela.
+    '''
+    data = registro.get('data')
+    valores = {
+        'id': str(registro.get('id', '')),
+        'data': data.get('data_completa', '') if isinstance(data, dict) else str(data or ''),
+        'tipo': registro.get('tipo', ''),
+        'valor': f"{registro.get('valor', 0):>12.2f}" if isinstance(registro.get('valor'), (int, float)) else '',
+        'moeda': registro.get('moeda') or '',
+        'categorias': ', '.join(registro.get('categorias') or []),
+        'descricao': registro.get('descricao') or '',
+    }
+    return ''.join(valores[nome][:tamanho - 1].ljust(tamanho) if tamanho else valores[nome]
+                   for nome, tamanho in COLUNAS)[:largura]
+
+
+def _escrever(tela, linha: int, coluna: int, texto: str, atributo: int = 0) -> None:
+    altura, largura = tela.getmaxyx()
+    if 0 <= linha < altura and coluna < largura:
+        try:
+            tela.addnstr(linha, coluna, texto, largura - coluna - (1 if linha == altura - 1 else 0), atributo)
+        except curses.error:
+            pass
+
+
+def _barra_progresso(estado: dict, largura: int) -> str:
+    rotulo = f"{estado['tarefa']} {estado['mensagem']}".strip()
+    pendentes = f" (+{estado['pendentes']} na fila)" if estado['pendentes'] else ''
+    tamanho = max(10, min(40, largura - len(rotulo) - len(pendentes) - 10))
+    cheio = int(estado['fracao'] * tamanho)
+    return f"{rotulo} [{'#' * cheio}{' ' * (tamanho - cheio)}] {int(estado['fracao'] * 100):3d}%{pendentes}"
+
+
+def _desenhar(tela, registros: list[dict], tela_estado: dict, trabalhador_estado: dict) -> None:
+    tela.erase()
+    altura, largura = tela.getmaxyx()
+    posicoes = tela_estado['posicoes']
+    linhas_tabela = max(1, altura - 4)
+
+    cabecalho = ''.join(nome.ljust(tamanho) if tamanho else nome for nome, tamanho in COLUNAS)
+    _escrever(tela, 0, 0, f"{len(posicoes)} de {len(registros)} registros"
+                          + (f" - busca: {tela_estado['consulta']}" if tela_estado['consulta'] else ''))
+    _escrever(tela, 1, 0, cabecalho.ljust(largura), curses.A_REVERSE)
+
+    # Apenas as linhas visíveis são formatadas, qualquer que seja a quantidade de registros.
+    for linha in range(linhas_tabela):
+        indice = tela_estado['topo'] + linha
+        if indice >= len(posicoes):
+            break
+        atributo = curses.A_STANDOUT if indice == tela_estado['cursor'] else 0
+        _escrever(tela, 2 + linha, 0, formatar_linha(registros[posicoes[indice]], largura).ljust(largura), atributo)
+
+    if trabalhador_estado['tarefa'] is not None:
+        rodape = _barra_progresso(trabalhador_estado, largura)
+    else:
+        rodape = tela_estado['mensagem']
+    _escrever(tela, altura - 2, 0, rodape)
+    if tela_estado['editando'] is not None:
+        _escrever(tela, altura - 1, 0, tela_estado['editando']['prompt'] + tela_estado['editando']['texto'])
+    else:
+        _escrever(tela, altura - 1, 0, AJUDA, curses.A_DIM)
+    tela.refresh()
+
+
+def _reiniciar_busca(registros: list[dict], tela_estado: dict) -> None:
+    tela_estado['pilha'] = [('', range(len(registros)))]
+    if tela_estado['consulta']:
+        tela_estado['pilha'].append((tela_estado['consulta'],
+                                     filtrar_busca(registros, range(len(registros)), tela_estado['consulta'])))
+    tela_estado['posicoes'] = tela_estado['pilha'][-1][1]
+    tela_estado['versao'] = versao_registros(registros)
+
+
+def _buscar(registros: list[dict], tela_estado: dict, consulta: str) -> None:
+    pilha = tela_estado['pilha']
+    while len(pilha) > 1 and not consulta.startswith(pilha[-1][0]):
+        pilha.pop()
+    if consulta != pilha[-1][0]:
+        pilha.append((consulta, filtrar_busca(registros, pilha[-1][1], consulta)))
+    tela_estado['consulta'] = consulta
+    tela_estado['posicoes'] = pilha[-1][1]
+    tela_estado['cursor'] = 0
+    tela_estado['topo'] = 0
+
+
+def _mover(tela_estado: dict, deslocamento: int, linhas_tabela: int) -> None:
+    total = len(tela_estado['posicoes'])
+    tela_estado['cursor'] = max(0, min(total - 1, tela_estado['cursor'] + deslocamento))
+    if tela_estado['cursor'] < tela_estado['topo']:
+        tela_estado['topo'] = tela_estado['cursor']
+    elif tela_estado['cursor'] >= tela_estado['topo'] + linhas_tabela:
+        tela_estado['topo'] = tela_estado['cursor'] - linhas_tabela + 1
+
+
+def _concluir_edicao(registros: list[dict], arquivo: str, tela_estado: dict, trabalhador: dict) -> None:
+    edicao = tela_estado['editando']
+    tela_estado['editando'] = None
+    texto = edicao['texto'].strip()
+    if edicao['acao'] == 'exportar':
+        formato = texto.lower() or 'csv'
+        if formato not in ('csv', 'json', 'parquet'):
+            tela_estado['mensagem'] = "Formato inválido. Use 'csv', 'json' ou 'parquet'."
+            return
+        agendar_tarefa(trabalhador, 'Exportando', tarefa_exportar(registros, 'relatorio.' + formato, formato))
+    elif edicao['acao'] == 'importar' and texto:
+        agendar_tarefa(trabalhador, 'Importando', tarefa_importar(registros, texto, arquivo))
+
+
+def interface(tela, registros: list[dict], arquivo: str) -> None:
+    '''
+    Executa o laço da interface de tela cheia até o usuário sair.
+
+    A tela é redesenhada a cada INTERVALO_ATUALIZACAO milissegundos, mesmo
+    sem teclas pressionadas, para acompanhar o progresso das tarefas em
+    segundo plano.
+
+    Args:
+        tela:
+            Janela principal do curses.
+        registros (list[dict]):
+            Lista de registros financeiros.
+        arquivo (str):
+            Arquivo onde os registros são salvos pelas tarefas.
+    '''
+    curses.curs_set(0)
+    tela.timeout(INTERVALO_ATUALIZACAO)
+    tela.keypad(True)
+
+    trabalhador = iniciar_trabalhador()
+    tela_estado = {'consulta': '', 'cursor': 0, 'topo': 0, 'mensagem': '', 'editando': None}
+    _reiniciar_busca(registros, tela_estado)
+
+    try:
+        while True:
+            # Os resultados das tarefas são aplicados aqui, na thread da
+            # interface, que é a única a alterar os registros; a gravação em
+            # disco fica com o trabalhador.
+            concluidas = aplicar_resultados(trabalhador)
+            if concluidas:
+                tela_estado['mensagem'] = concluidas[-1]
+            estado = estado_trabalhador(trabalhador)
+            if tela_estado['versao'] != versao_registros(registros):
+                _reiniciar_busca(registros, tela_estado)
+                _mover(tela_estado, 0, 1)
+            _desenhar(tela, registros, tela_estado, estado)
+
+            try:
+                tecla = tela.get_wch()
+            except curses.error:
+                continue
+            linhas_tabela = max(1, tela.getmaxyx()[0] - 4)
+            edicao = tela_estado['editando']
+
+            if edicao is not None:
+                if tecla in ('\n', '\r', curses.KEY_ENTER):
+                    if edicao['acao'] != 'buscar':
+                        _concluir_edicao(registros, arquivo, tela_estado, trabalhador)
+                    else:
+                        tela_estado['editando'] = None
+                elif tecla == '\x1b':
+                    tela_estado['editando'] = None
+                    if edicao['acao'] == 'buscar':
+                        _buscar(registros, tela_estado, '')
+                elif tecla in (curses.KEY_BACKSPACE, '\x7f', '\b'):
+                    edicao['texto'] = edicao['texto'][:-1]
+                elif isinstance(tecla, str) and tecla.isprintable():
+                    edicao['texto'] += tecla
+                if edicao['acao'] == 'buscar' and tela_estado['editando'] is not None:
+                    _buscar(registros, tela_estado, edicao['texto'])
+                continue
+
+            if tecla in ('q', 'Q'):
+                break
+            elif tecla == '/':
+                tela_estado['editando'] = {'acao': 'buscar', 'prompt': '/', 'texto': tela_estado['consulta']}
+            elif tecla == '\x1b':
+                _buscar(registros, tela_estado, '')
+            elif tecla == 'r':
+                agendar_tarefa(trabalhador, 'Rendimento', tarefa_rendimento(registros, arquivo))
+            elif tecla == 'e':
+                tela_estado['editando'] = {'acao': 'exportar', 'prompt': 'Formato (csv, json ou parquet): ', 'texto': ''}
+            elif tecla == 'i':
+                tela_estado['editando'] = {'acao': 'importar', 'prompt': 'Arquivo a importar: ', 'texto': ''}
+            elif tecla in (curses.KEY_DOWN, 'j'):
+                _mover(tela_estado, 1, linhas_tabela)
+            elif tecla in (curses.KEY_UP, 'k'):
+                _mover(tela_estado, -1, linhas_tabela)
+            elif tecla == curses.KEY_NPAGE:
+                _mover(tela_estado, linhas_tabela, linhas_tabela)
+            elif tecla == curses.KEY_PPAGE:
+                _mover(tela_estado, -linhas_tabela, linhas_tabela)
+            elif tecla in (curses.KEY_HOME, 'g'):
+                _mover(tela_estado, -len(tela_estado['posicoes']), linhas_tabela)
+            elif tecla in (curses.KEY_END, 'G'):
+                _mover(tela_estado, len(tela_estado['posicoes']), linhas_tabela)
+    finally:
+        _escrever(tela, tela.getmaxyx()[0] - 2, 0, 'Aguardando as tarefas em andamento...')
+        tela.refresh()
+        encerrar_trabalhador(trabalhador)
+
+
+def executar(arquivo: str = 'financas.json') -> None:
+    '''
+    Abre a interface de tela cheia com os registros do arquivo.
+
+    Args:
+        arquivo (str):
+            Arquivo JSON dos registros.
+    '''
+    if curses is None:
+        print("A interface de tela cheia requer o módulo 'curses' (no Windows: pip install windows-curses).")
+        return
+    registros = ler_registros(arquivo)
+    os.environ.setdefault('ESCDELAY', '25')
+    curses.wrapper(interface, registros, arquivo)
+
+
+if __name__ == '__main__':
+    arquivo = sys.argv[1] if len(sys.argv) > 1 else 'financas.json'
+    configurar_eventos(caminho_eventos(arquivo), arquivo)
+    executar(arquivo)
@@ -1,4 +1,5 @@
 from datetime import datetime, timedelta
+from utilitarios.relogio import agora
 
 
 def tempo(data: str) -> int:
@@ -15,7 +16,32 @@ def tempo(data: str) -> int:
             Retorna a diferença em dias entre a data fornecida e a data atual.
     '''
     data_convertido = datetime.strptime(data, '%d/%m/%Y')
-    data_referencia = datetime.now()
+    data_referencia = agora()
     diferenca = data_referencia - data_convertido
     diferenca_days = diferenca.days
     return diferenca_days
+
+
+def somar_meses(data: datetime, meses: int) -> datetime:
+    '''
+    Soma uma quantidade de meses a uma data, mantendo o dia quando possível.
+
+    Se o dia não existir no mês de destino (ex.: 31/01 + 1 mês), é usado
+    o último dia desse mês.
+
+    Args:
+        data (datetime):
+            Data inicial.
+        meses (int):
+            Quantidade de meses a somar. Pode ser negativa.
+
+    Returns:
+        datetime:
+            Data resultante.
+    '''
+    indice_mes = data.year * 12 + data.month - 1 + meses
+    ano, mes = divmod(indice_mes, 12)
+    mes += 1
+    proximo_mes = datetime(ano + mes // 12, mes % 12 + 1, 1)
+    ultimo_dia = (proximo_mes - timedelta(days=1)).day
+    return data.replace(year=ano, month=mes, day=min(data.day, ultimo_dia))
@@ -1,6 +1,33 @@
 from datetime import datetime
+from utilitarios.relogio import agora
 from utilitarios.validar_generic import ValidarDadosGeneric
 
+def montar_data(data_valida: datetime) -> dict:
+    """
+    Monta o dicionário de data usado nos registros a partir de um datetime.
+
+    Args:
+        data_valida (datetime): Data já validada.
+
+    Returns:
+        dict: Dicionário contendo dia, mês, ano e a data completa separados como strings.
+    """
+    dia = str(data_valida.day).zfill(2)
+    mes = str(data_valida.month).zfill(2)
+    ano = str(data_valida.year)
+
+    data = f"{dia}/{mes}/{ano}"
+
+    data_dict = {
+        "data_completa": data,
+        "dia": dia,
+        "mes": mes,
+        "ano": ano
+    }
+
+    return data_dict
+
+
 def validar_data(msg: str) -> dict:
     """
     Valida uma string de data no formato 'DD/MM/AAAA' e retorna um dicionário com dia, mês, ano e a data completa como strings.
@@ -16,24 +43,11 @@ def validar_data(msg: str) -> dict:
             data_str = input(f"{msg}: ")
 
             data_valida = datetime.strptime(data_str, '%d/%m/%Y')
-            if data_valida > datetime.now():
+            if data_valida > agora():
                 print('Data não pode ser superior à data de hoje.')
                 continue
             
-            dia = str(data_valida.day).zfill(2)
-            mes = str(data_valida.month).zfill(2)
-            ano = str(data_valida.year)
-            
-            data = f"{dia}/{mes}/{ano}"
-            
-            data_dict = {
-                "data_completa": data,
-                "dia": dia,
-                "mes": mes,
-                "ano": ano  
-            }
-            
-            return data_dict
+            return montar_data(data_valida)
 
         except ValueError:
             print('Data inválida. Por favor, digite no formato esperado - Exemplo: 18/01/2024 (DD/MM/AAAA)') 
@@ -0,0 +1,105 @@
+import codecs
+import json
+from typing import Callable, Iterator
+
+TAMANHO_BLOCO = 1024 * 1024
+
+
+def iterar_json(arquivo: str, tamanho_bloco: int = TAMANHO_BLOCO,
+                progresso: Callable[[int], None] | None = None) -> Iterator:
+    '''
+    Percorre os itens de um arquivo JSON que contém uma lista, sem carregá-lo inteiro.
+
+    O arquivo é lido em blocos e cada item da lista é decodificado assim que
+    estiver completo no buffer, mantendo o uso de memória proporcional ao
+    tamanho do bloco e não ao tamanho do arquivo.
+
+    Args:
+        arquivo (str):
+            Caminho do arquivo JSON.
+        tamanho_bloco (int):
+            Quantidade de bytes lidos por vez.
+        progresso (Callable[[int], None] | None):
+            Função chamada após cada bloco com o total de bytes lidos.
+
+    Returns:
+        Iterator:
+            Gerador com os itens da lista.
+
+    Raises:
+        json.JSONDecodeError: Se o arquivo não contiver uma lista JSON válida
+            (subclasse de ValueError).
+    '''
+    decodificador = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+
+    with open(arquivo, 'rb') as f:
+        buffer = ''
+        posicao = 0
+        bytes_lidos = 0
+        fim_arquivo = False
+        # 'inicio': espera '['; 'primeiro': um item ou ']'; 'item': um item
+        # (depois de ','); 'separador': ',' ou ']'; 'fim': só espaços até o fim.
+        estado = 'inicio'
+
+        def ler_bloco() -> None:
+            nonlocal buffer, posicao, bytes_lidos, fim_arquivo
+            bloco = f.read(tamanho_bloco)
+            fim_arquivo = not bloco
+            bytes_lidos += len(bloco)
+            buffer = buffer[posicao:] + utf8.decode(bloco, final=fim_arquivo)
+            posicao = 0
+            if progresso:
+                progresso(bytes_lidos)
+
+        while True:
+            while posicao < len(buffer) and buffer[posicao] in ' \t\r\n':
+                posicao += 1
+
+            if posicao >= len(buffer):
+                if not fim_arquivo:
+                    ler_bloco()
+                    continue
+                if estado == 'fim':
+                    return
+                raise json.JSONDecodeError('Fim inesperado do arquivo JSON', buffer, posicao)
+
+            caractere = buffer[posicao]
+            if estado == 'fim':
+                raise json.JSONDecodeError('Conteúdo depois do fim da lista', buffer, posicao)
+            if estado == 'inicio':
+                if caractere != '[':
+                    raise json.JSONDecodeError('O arquivo não contém uma lista JSON', buffer, posicao)
+                estado = 'primeiro'
+                posicao += 1
+                continue
+            if caractere == ']' and estado in ('primeiro', 'separador'):
+                estado = 'fim'
+                posicao += 1
+                continue
+            if estado == 'separador':
+                if caractere != ',':
+                    raise json.JSONDecodeError("Esperado ',' ou ']'", buffer, posicao)
+                estado = 'item'
+                posicao += 1
+                continue
+            if caractere in ',]':
+                raise json.JSONDecodeError('Esperado um item da lista', buffer, posicao)
+
+            try:
+                item, fim = decodificador.raw_decode(buffer, posicao)
+            except json.JSONDecodeError:
+                if fim_arquivo:
+                    raise
+                ler_bloco()
+                continue
+
+            # Um número no fim do bloco pode continuar no próximo ('3.' + '5e2'):
+            # o item só vale quando o que vem depois já é um separador.
+            if not fim_arquivo and (fim == len(buffer) or buffer[fim] not in ' \t\r\n,]'):
+                ler_bloco()
+                continue
+
+            posicao = fim
+            estado = 'separador'
+            yield item
@@ -0,0 +1,49 @@
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Iterator
+
+_relogio = datetime.now
+
+
+def agora() -> datetime:
+    '''
+    Retorna a data e hora atuais segundo o relógio configurado.
+
+    Todo o sistema usa esta função no lugar de datetime.now(), o que permite
+    fixar o "hoje" para obter resultados reproduzíveis.
+
+    Returns:
+        datetime:
+            Data e hora atuais.
+    '''
+    return _relogio()
+
+
+def definir_relogio(relogio: Callable[[], datetime] | None) -> None:
+    '''
+    Define a função usada como relógio.
+
+    Args:
+        relogio (Callable[[], datetime] | None):
+            Função sem argumentos que retorna um datetime. Se None, volta a
+            usar datetime.now.
+    '''
+    global _relogio
+    _relogio = relogio or datetime.now
+
+
+@contextmanager
+def relogio_fixo(momento: datetime) -> Iterator[None]:
+    '''
+    Fixa o relógio em um momento enquanto o bloco 'with' estiver ativo.
+
+    Args:
+        momento (datetime):
+            Data e hora retornadas por agora() dentro do bloco.
+    '''
+    anterior = _relogio
+    definir_relogio(lambda: momento)
+    try:
+        yield
+    finally:
+        definir_relogio(anterior)
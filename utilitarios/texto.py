@@ -0,0 +1,41 @@
+import re
+import unicodedata
+
+PALAVRAS_IGNORADAS = {
+    'a', 'o', 'as', 'os', 'e', 'de', 'da', 'do', 'das', 'dos', 'em', 'no', 'na',
+    'nos', 'nas', 'um', 'uma', 'para', 'por', 'com', 'ao', 'aos'
+}
+
+
+def normalizar_texto(texto: str) -> str:
+    '''
+    Converte o texto para minúsculas e remove os acentos.
+
+    Args:
+        texto (str):
+            Texto original (ex.: 'Pão de Açúcar').
+
+    Returns:
+        str:
+            Texto normalizado (ex.: 'pao de acucar').
+    '''
+    decomposto = unicodedata.normalize('NFKD', texto.casefold())
+    return ''.join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def tokenizar(texto: str | None) -> list[str]:
+    '''
+    Separa o texto em palavras normalizadas, sem acentos e sem palavras comuns.
+
+    Args:
+        texto (str | None):
+            Texto a ser separado.
+
+    Returns:
+        list[str]:
+            Lista de palavras, na ordem em que aparecem.
+    '''
+    if not texto:
+        return []
+    return [palavra for palavra in re.findall(r'[a-z0-9]+', normalizar_texto(texto))
+            if palavra not in PALAVRAS_IGNORADAS]
@@ -1,3 +1,6 @@
+MOEDA_PADRAO = 'BRL'
+
+
 def validar_valor(msg: str = "Digite o valor: ") -> float:
     '''
     Valida a entrada de um valor numérico inserida pelo usuário.
@@ -52,3 +55,63 @@ def validar_indice(registros: list[dict]) -> int:
                 print(f'Digite índices de 0 a {len(registros) - 1}')
         except ValueError:
             print('Digite apenas números inteiros')
+
+def normalizar_categorias(categorias) -> list[str]:
+    '''
+    Normaliza as categorias/tags de um registro.
+
+    As categorias são convertidas para minúsculas, sem espaços nas pontas
+    e sem repetição.
+
+    Args:
+        categorias (str | list | None):
+            Texto com as categorias separadas por vírgula ou lista de categorias.
+
+    Returns:
+        list[str]:
+            Lista de categorias, na ordem em que aparecem.
+    '''
+    if isinstance(categorias, str):
+        categorias = categorias.split(',')
+    normalizadas = []
+    for categoria in categorias or []:
+        categoria = str(categoria).strip().lower()
+        if categoria and categoria not in normalizadas:
+            normalizadas.append(categoria)
+    return normalizadas
+
+
+def validar_categorias(msg: str = "Categorias separadas por vírgula (opcional): ") -> list[str]:
+    '''
+    Lê as categorias/tags de um registro, separadas por vírgula.
+
+    As categorias são normalizadas com normalizar_categorias.
+
+    Returns:
+        list[str]: 
+            Lista de categorias. Vazia se o usuário não digitar nada.
+    '''
+    return normalizar_categorias(input(msg))
+
+def validar_moeda(msg: str = f"Moeda (código de 3 letras, em branco para {MOEDA_PADRAO}): ",
+                  padrao: str | None = MOEDA_PADRAO) -> str | None:
+    '''
+    Valida o código da moeda (ISO 4217, ex.: BRL, USD, EUR) inserido pelo usuário.
+
+    Args:
+        msg (str):
+            Mensagem exibida ao usuário.
+        padrao (str | None):
+            Valor retornado se o usuário não digitar nada.
+
+    Returns:
+        str | None: 
+            Código da moeda em maiúsculas, ou o padrão.
+    '''
+    while True:
+        moeda = input(msg).strip().upper()
+        if not moeda:
+            return padrao
+        if len(moeda) == 3 and moeda.isalpha():
+            return moeda
+        print('Digite o código da moeda com três letras. Exemplo: USD')